@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Reproducible generate -> process -> render benchmark.
+
+Synthesizes fixed-size exports with generate_archetype_workouts.py (seeded,
+so every machine benchmarks the same rows), then times process_csv() per
+engine, week bucketing (week_buckets.py against the strptime/strftime code it
+replaced), JSON serialization and dashboard rendering with the v6.1 template.
+Results are saved as JSON; --compare flags every timing that got slower than
+the baseline by more than --threshold.
+
+Usage:
+    python benchmark.py -o baseline.json
+    python benchmark.py --sizes 1k,100k,10m -o baseline.json
+    python benchmark.py --compare baseline.json -o current.json
+    python benchmark.py --compare baseline.json --against current.json
+
+Datasets are cached in --data-dir (default: <tmp>/fitbod-benchmark) and only
+generated once per size, seed and version of generate_archetype_workouts.py
+(a hash of its source is part of the file name). Everything runs offline;
+numpy is optional and the columnar engine is skipped without it.
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from create_archetype_dashboards import BASE_HTML_PATH, render_dashboard
+from dashboard_template import DashboardTemplate
+import generate_archetype_workouts
+from generate_archetype_workouts import ARCHETYPE_GENERATORS, END_DATE, iter_user_workouts, write_csv
+from process_archetype_data import np, process_csv
+from week_buckets import get_week_start, week_start_for_day
+
+# Dataset sizes in CSV rows (sets, warmups included)
+SIZES = {'1k': 1_000, '100k': 100_000, '10m': 10_000_000}
+
+DEFAULT_SIZES = ['1k', '100k']
+
+SEED = 'benchmark'
+
+# Users start here; each contributes ~5 years of workouts before the next begins
+START_DATE = date(2021, 1, 1)
+
+# Slowdowns are flagged above this fraction (0.10 = 10% slower)
+THRESHOLD = 0.10
+
+# Dates timed by the week bucketing metrics (the 10m dataset is sampled)
+MAX_BUCKET_DATES = 1_000_000
+
+# Timings this short are reported but never flagged; they are mostly noise
+MIN_SECONDS = 0.005
+
+RESULTS_VERSION = 1
+
+
+def generator_version():
+    """Short hash of generate_archetype_workouts.py, so its changes get new datasets."""
+    with open(generate_archetype_workouts.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def dataset_path(data_dir, size, seed=SEED):
+    return os.path.join(data_dir, f'benchmark_{size}_{seed}_{generator_version()}.csv')
+
+
+def iter_rows(seed, rows):
+    """First `rows` synthetic workouts, users in turn, archetypes round-robin."""
+    archetypes = list(ARCHETYPE_GENERATORS)
+
+    def workouts():
+        for user_id in itertools.count():
+            yield from iter_user_workouts(seed, user_id, archetypes[user_id % len(archetypes)],
+                                          START_DATE, END_DATE)
+
+    return itertools.islice(workouts(), rows)
+
+
+def ensure_dataset(data_dir, size, seed=SEED):
+    """Path to the dataset for size, generating it first if needed. Returns (path, seconds)."""
+    path = dataset_path(data_dir, size, seed)
+    if os.path.exists(path):
+        return path, None
+    os.makedirs(data_dir, exist_ok=True)
+    started = time.perf_counter()
+    tmp_path = path + '.tmp'
+    write_csv(tmp_path, iter_rows(seed, SIZES[size]), fast=True)
+    os.replace(tmp_path, path)
+    return path, time.perf_counter() - started
+
+
+def best_of(fn, repeat):
+    """(best seconds, last return value) over `repeat` calls."""
+    best, value = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, value
+
+
+def timing(seconds, rows):
+    return {'seconds': round(seconds, 6), 'rows_per_second': round(rows / seconds, 1)}
+
+
+def strptime_week_start(date_str):
+    """The get_week_start() that week_buckets.py replaced, kept as a reference."""
+    dt = datetime.strptime(date_str.split()[0], '%Y-%m-%d')
+    monday = dt - timedelta(days=dt.weekday())
+    return monday.strftime('%Y-%m-%d')
+
+
+def bench_week_buckets(csv_path, repeat):
+    """Time week bucketing of the export's dates, cached parser vs strptime/strftime."""
+    with open(csv_path, 'r', newline='') as f:
+        dates = [row['Date'] for row in itertools.islice(csv.DictReader(f), MAX_BUCKET_DATES)]
+
+    def cached():
+        # Cold cache each run, as in a fresh process
+        week_start_for_day.cache_clear()
+        return [get_week_start(d) for d in dates]
+
+    seconds, weeks = best_of(cached, repeat)
+    legacy_seconds, legacy_weeks = best_of(lambda: [strptime_week_start(d) for d in dates], repeat)
+    if weeks != legacy_weeks:
+        raise AssertionError('week_buckets.get_week_start() disagrees with strptime/strftime')
+    return {'week_bucketing': timing(seconds, len(dates)),
+            'week_bucketing[strptime]': timing(legacy_seconds, len(dates))}
+
+
+def bench_size(csv_path, rows, engines, repeat, work_dir):
+    """Time every stage for one dataset; returns {metric: {seconds, rows_per_second}}."""
+    metrics = {}
+    data = None
+    for engine in engines:
+        seconds, data = best_of(lambda: process_csv(csv_path, engine=engine), repeat)
+        metrics[f'process_csv[{engine}]'] = timing(seconds, rows)
+
+    metrics.update(bench_week_buckets(csv_path, repeat))
+
+    seconds, payload = best_of(lambda: json.dumps(data, indent=2), repeat)
+    metrics['json_serialization'] = timing(seconds, rows)
+
+    data_file = 'benchmark_data.json'
+    with open(os.path.join(work_dir, data_file), 'w') as f:
+        f.write(payload)
+    template = DashboardTemplate.from_file(BASE_HTML_PATH)
+    config = {'data_file': data_file, 'output_file': 'benchmark_dashboard.html',
+              'version': 'Benchmark', 'subtitle': 'Synthetic workload',
+              'tagline': f'{rows:,} sets', 'year': str(START_DATE.year)}
+    seconds, _ = best_of(lambda: render_dashboard(template, config, work_dir, work_dir), repeat)
+    metrics['render_dashboard'] = timing(seconds, rows)
+
+    # generate -> process (first engine) -> write JSON -> render, as a user would run it
+    def end_to_end():
+        result = process_csv(csv_path, engine=engines[0])
+        with open(os.path.join(work_dir, data_file), 'w') as f:
+            json.dump(result, f, indent=2)
+        render_dashboard(template, config, work_dir, work_dir)
+
+    seconds, _ = best_of(end_to_end, repeat)
+    metrics['end_to_end'] = timing(seconds, rows)
+    metrics['exercises'] = len(data)
+    metrics['week_entries'] = sum(len(ex['weeks']) for ex in data.values())
+    return metrics
+
+
+def environment():
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__ if np is not None else None,
+    }
+
+
+def run(sizes, data_dir, repeat, engines, seed=SEED):
+    results = {'version': RESULTS_VERSION,
+               'created': datetime.now(timezone.utc).isoformat(),
+               'seed': seed,
+               'generator': generator_version(),
+               'repeat': repeat,
+               'environment': environment(),
+               'sizes': {}}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in sizes:
+            print(f"{size} ({SIZES[size]:,} rows)")
+            csv_path, generated = ensure_dataset(data_dir, size, seed)
+            if generated is not None:
+                print(f"  generated {os.path.basename(csv_path)} in {generated:.2f}s")
+            # One pass is plenty at 10M rows
+            metrics = bench_size(csv_path, SIZES[size], engines,
+                                 1 if SIZES[size] >= 1_000_000 else repeat, work_dir)
+            results['sizes'][size] = {'rows': SIZES[size], 'metrics': metrics}
+            for name, value in metrics.items():
+                if isinstance(value, dict):
+                    print(f"  {name:<24}{value['seconds']:>10.4f}s"
+                          f"{value['rows_per_second']:>14,.0f} rows/s")
+    return results
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """
+    Print current timings against the baseline. Returns the list of regressions
+    as (size, metric, baseline seconds, current seconds).
+    """
+    if baseline.get('environment') != current.get('environment'):
+        print("Note: baseline was recorded in a different environment; "
+              "expect differences unrelated to the code")
+
+    regressions = []
+    for size, entry in current['sizes'].items():
+        base_entry = baseline['sizes'].get(size)
+        if base_entry is None:
+            print(f"{size}: not in baseline")
+            continue
+        print(size)
+        for name, value in entry['metrics'].items():
+            base = base_entry['metrics'].get(name)
+            if not isinstance(value, dict) or not isinstance(base, dict):
+                continue
+            before, after = base['seconds'], value['seconds']
+            change = (after - before) / before if before else 0.0
+            flagged = change > threshold and max(before, after) >= MIN_SECONDS
+            mark = '✗' if flagged else '✓'
+            print(f"  {mark} {name:<24}{before:>10.4f}s -> {after:.4f}s ({change:+.1%})")
+            if flagged:
+                regressions.append((size, name, before, after))
+    return regressions
+
+
+def load_results(path):
+    with open(path, 'r') as f:
+        results = json.load(f)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported results version {results.get('version')}")
+    return results
+
+
+def parse_sizes(text):
+    sizes = [size.strip().lower() for size in text.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown size(s) {', '.join(unknown)} (expected {', '.join(SIZES)})")
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the generate -> process -> render pipeline.')
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES,
+                        help=f"comma-separated dataset sizes from {', '.join(SIZES)} "
+                             f"(default: {','.join(DEFAULT_SIZES)})")
+    parser.add_argument('-o', '--output', help='save results JSON here (e.g. a new baseline)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'fitbod-benchmark'),
+                        help='where generated datasets are cached')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per timing; the best is kept')
+    parser.add_argument('--engines', default='python,columnar',
+                        help='process_csv engines to time (columnar is skipped without numpy)')
+    parser.add_argument('--compare', metavar='BASELINE_JSON',
+                        help='compare against this baseline; exit 1 on regressions')
+    parser.add_argument('--against', metavar='RESULTS_JSON',
+                        help='with --compare, compare this saved run instead of running now')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'slowdown fraction that counts as a regression (default {THRESHOLD})')
+    args = parser.parse_args(argv)
+
+    if args.against and not args.compare:
+        parser.error('--against needs --compare')
+
+    if args.against:
+        current = load_results(args.against)
+    else:
+        engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+        if 'columnar' in engines and np is None:
+            print("numpy not installed; skipping the columnar engine")
+            engines.remove('columnar')
+        if not engines:
+            parser.error('no engines to benchmark')
+        current = run(args.sizes, args.data_dir, max(1, args.repeat), engines)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(current, f, indent=2)
+            print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        print(f"\nComparing against {args.compare} (threshold {args.threshold:.0%})")
+        regressions = compare(load_results(args.compare), current, args.threshold)
+        if regressions:
+            print(f"\n✗ {len(regressions)} timing(s) slower than baseline by more than "
+                  f"{args.threshold:.0%}")
+            return 1
+        print("\n✓ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Compact binary encoding of process_csv() output (.fbw files).
+
+The indented JSON repeats every exercise name, week date and field name. The
+compact form stores them once:
+
+    magic 'FBW1'
+    string table     u16 count, then u16 length + UTF-8 bytes per string
+                     (exercise and muscle names, dictionary-encoded)
+    week table       u32 count, i32 first week as days since 1970-01-01,
+                     then u16 day deltas between consecutive weeks
+    exercises        u16 count, then per exercise: u16 name, u16 muscle,
+                     u8 secondary count + u16 per secondary, u32 week count
+    week columns     u32 week index, f64 max, u32 sets, u32 maxReps,
+                     i64 load x 10, one fixed-width array per column
+
+decode() rebuilds exactly the dict process_csv() returns. Loads are rounded to
+0.1 by process_csv(), so storing them as tenths is lossless, and a max of 0 is
+always the integer 0 there, never 0.0.
+
+Run this file with JSON files as arguments (default: the archetype data) to
+compare size and parse time against the JSON output.
+"""
+
+import struct
+from datetime import date, timedelta
+
+MAGIC = b'FBW1'
+
+EPOCH = date(1970, 1, 1)
+
+
+def _pack_strings(strings):
+    parts = [struct.pack('<H', len(strings))]
+    for s in strings:
+        encoded = s.encode('utf-8')
+        parts.append(struct.pack('<H', len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def encode(data):
+    """process_csv() output -> compact bytes."""
+    strings = {}
+
+    def intern(s):
+        return strings.setdefault(s, len(strings))
+
+    weeks = sorted({week for ex in data.values() for week in ex['weeks']})
+    week_index = {week: i for i, week in enumerate(weeks)}
+    week_days = [(date.fromisoformat(week) - EPOCH).days for week in weeks]
+
+    exercise_parts = []
+    week_ids, maxes, sets, max_reps, loads = [], [], [], [], []
+    for exercise, ex in data.items():
+        secondary = [intern(m) for m in ex['secondary']]
+        exercise_parts.append(struct.pack('<HHB', intern(exercise), intern(ex['muscle']),
+                                          len(secondary)))
+        exercise_parts.append(struct.pack(f'<{len(secondary)}H', *secondary))
+        exercise_parts.append(struct.pack('<I', len(ex['weeks'])))
+        for week, week_data in ex['weeks'].items():
+            week_ids.append(week_index[week])
+            maxes.append(week_data['max'])
+            sets.append(week_data['sets'])
+            max_reps.append(week_data['maxReps'])
+            loads.append(round(week_data['load'] * 10))
+
+    n = len(week_ids)
+    deltas = [b - a for a, b in zip(week_days, week_days[1:])]
+    return b''.join([
+        MAGIC,
+        _pack_strings(list(strings)),
+        struct.pack('<I', len(weeks)),
+        struct.pack('<i', week_days[0]) if weeks else b'',
+        struct.pack(f'<{len(deltas)}H', *deltas),
+        struct.pack('<H', len(data)),
+        *exercise_parts,
+        struct.pack(f'<{n}I', *week_ids),
+        struct.pack(f'<{n}d', *maxes),
+        struct.pack(f'<{n}I', *sets),
+        struct.pack(f'<{n}I', *max_reps),
+        struct.pack(f'<{n}q', *loads),
+    ])
+
+
+def decode(blob):
+    """Compact bytes -> the same dict process_csv() returned."""
+    if blob[:4] != MAGIC:
+        raise ValueError("Not a compact workout file (bad magic)")
+    pos = 4
+
+    def take(fmt):
+        nonlocal pos
+        values = struct.unpack_from(fmt, blob, pos)
+        pos += struct.calcsize(fmt)
+        return values
+
+    strings = []
+    for _ in range(take('<H')[0]):
+        length = take('<H')[0]
+        strings.append(blob[pos:pos + length].decode('utf-8'))
+        pos += length
+
+    week_count = take('<I')[0]
+    weeks = []
+    if week_count:
+        day = take('<i')[0]
+        days = [day]
+        for delta in take(f'<{week_count - 1}H'):
+            day += delta
+            days.append(day)
+        weeks = [(EPOCH + timedelta(days=d)).isoformat() for d in days]
+
+    exercises = []
+    for _ in range(take('<H')[0]):
+        name, muscle, secondary_count = take('<HHB')
+        secondary = take(f'<{secondary_count}H')
+        exercises.append((strings[name], strings[muscle], [strings[i] for i in secondary],
+                          take('<I')[0]))
+
+    n = sum(ex[3] for ex in exercises)
+    week_ids = take(f'<{n}I')
+    maxes = take(f'<{n}d')
+    sets = take(f'<{n}I')
+    max_reps = take(f'<{n}I')
+    loads = take(f'<{n}q')
+
+    output = {}
+    i = 0
+    for name, muscle, secondary, count in exercises:
+        output[name] = {
+            'muscle': muscle,
+            'secondary': secondary,
+            'weeks': {
+                weeks[week_ids[j]]: {
+                    'max': maxes[j] if maxes[j] else 0,
+                    'sets': sets[j],
+                    'maxReps': max_reps[j],
+                    'load': loads[j] / 10
+                }
+                for j in range(i, i + count)
+            }
+        }
+        i += count
+    return output
+
+
+def dump(data, path):
+    with open(path, 'wb') as f:
+        f.write(encode(data))
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+
+if __name__ == '__main__':
+    import base64
+    import glob
+    import gzip
+    import json
+    import os
+    import sys
+    import timeit
+
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), '..', '..', '05-user-archetypes', 'data', '*.json')))
+
+    for path in paths:
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        indented = json.dumps(data, indent=2).encode()
+        minified = json.dumps(data, separators=(',', ':')).encode()
+        blob = encode(data)
+        assert decode(blob) == data
+        assert json.dumps(decode(blob), indent=2).encode() == indented
+
+        runs = 50
+        json_parse = min(timeit.repeat(lambda: json.loads(indented), number=1, repeat=runs))
+        blob_parse = min(timeit.repeat(lambda: decode(blob), number=1, repeat=runs))
+
+        print(f"\n{os.path.basename(path)}")
+        print(f"  {'format':<22}{'bytes':>10}{'gzip':>10}")
+        for label, payload in [('json indent=2', indented),
+                               ('json minified', minified),
+                               ('compact', blob),
+                               ('compact base64', base64.b64encode(blob))]:
+            print(f"  {label:<22}{len(payload):>10,}{len(gzip.compress(payload)):>10,}")
+        print(f"  parse: json.loads {json_parse * 1000:.2f} ms, "
+              f"decode {blob_parse * 1000:.2f} ms (best of {runs})")
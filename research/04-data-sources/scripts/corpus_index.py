@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+Positional inverted index over the research corpus (transcripts and comments).
+
+Every video transcript (cleaned by transcript_cleaner) and every comment is a
+document. Comments are keyed by a hash of their author and text, and
+transcripts by video_id, so the overlapping batch files and the master data
+file add each document once. The index maps term -> {doc: [positions]} and
+is saved as one JSON file together with the SHA-256 of every source file, so
+`update` only reads files (or manifest batches) it has not seen. Each document
+remembers the source files it came from: when a file changes, the documents
+only it contained are dropped before it is read again, and a transcript whose
+text changed replaces the indexed one.
+
+Query syntax (case-insensitive):
+
+    overthinking                     a term
+    overthink*                       a prefix
+    "can't shake the feeling"        a phrase (consecutive terms)
+    sets AND failure                 both (AND is also implied: `sets failure`)
+    injury OR pain                   either
+    NOT beginner, -beginner          exclude
+    (elbow OR shoulder) pain         grouping
+
+Usage:
+    python corpus_index.py build                     # main data file + manifest batches + comment files
+    python corpus_index.py update --manifest raw/batches/Averagetojacked_manifest.json
+    python corpus_index.py query '"how many sets" OR overthink*' --kind comment
+    python corpus_index.py tags
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from corpus_loader import RAW_DIR, corpus_files, iter_array, normalize_comments, read_header
+from transcript_cleaner import clean_transcript
+
+INDEX_VERSION = 2
+
+INDEX_PATH = os.path.join(RAW_DIR, '..', 'corpus_index.json')
+
+MANIFEST_PATH = os.path.join(RAW_DIR, 'batches', 'Averagetojacked_manifest.json')
+
+# Pain points from research/01-market-analysis/consolidated_30video_analysis.md.
+# Each tag is the OR of its queries; counts are per video, over comments.
+PAIN_POINTS = {
+    'information_overload': [
+        'confus*', 'conflicting', 'contradict*', 'overcomplicat*', '"too many"',
+        '"so much information"', '"everyone says"', '"everyone keeps saying"',
+        '"push pull legs"', '"bro split"', '"which one"', '"what about"',
+    ],
+    'self_doubt': [
+        'overthink*', '"how many sets"', '"is this enough"', '"is it enough"',
+        '"enough volume"', '"did enough"', '"doing enough"', '"doing it right"',
+        '"am i doing"', '"should i"', '"not sure"', '"shake the feeling"',
+    ],
+    'time_constrained': [
+        '"full time"', 'busy', '"no time"', '"shift work"', 'schedule',
+        '"live in the gym"', '"3x a week"', '"three days"', '"45 min"', 'kids', 'job',
+    ],
+    'chronic_injuries': [
+        'injur*', 'pain', 'painful', 'elbow*', 'tendon*', 'tendinitis', 'joint*',
+        'surgery', 'spondylolisthesis', '"threw out my back"',
+    ],
+    'aesthetic_confidence': [
+        'confidence', 'confident', 'physique', 'aesthetic*', 'lagging',
+        'skinny', '"look bigger"', '"look jacked"', 'mirror', 'insecure',
+    ],
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    """Lowercase terms in order; positions are list indexes."""
+    return [token.strip("'") for token in _TOKEN_RE.findall(text.lower()) if token.strip("'")]
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def comment_key(comment):
+    text = f"{comment.get('author', '')}\0{comment.get('text', '')}"
+    return 'comment:' + hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class CorpusIndex:
+    """In-memory positional index; load()/save() persist it as JSON."""
+
+    def __init__(self):
+        self.docs = []            # doc id -> {'key', 'kind', 'video_id', 'text', 'sources'}
+                                  # (None once removed; save() renumbers)
+        self.doc_ids = {}         # doc key -> doc id
+        self.postings = defaultdict(dict)   # term -> {doc id: [positions]}
+        self.videos = {}          # video_id -> title
+        self.sources = {}         # source path (relative to the index) -> sha256
+        self._terms = None        # sorted term list for prefix queries
+
+    # -- building -------------------------------------------------------
+
+    def add_document(self, key, kind, video_id, text, source=None, replace=False):
+        """
+        Index one document found in source. Returns False if its key is already
+        indexed, unless replace is set and the text differs: then the new text
+        replaces the old one.
+        """
+        sources = set()
+        doc_id = self.doc_ids.get(key)
+        if doc_id is not None:
+            doc = self.docs[doc_id]
+            if not replace or doc['text'] == text:
+                if source is not None:
+                    doc['sources'].add(source)
+                return False
+            sources = doc['sources']
+            self.remove_document(key)
+        if source is not None:
+            sources.add(source)
+        doc_id = len(self.docs)
+        self.doc_ids[key] = doc_id
+        self.docs.append({'key': key, 'kind': kind, 'video_id': video_id, 'text': text,
+                          'sources': sources})
+        for position, term in enumerate(tokenize(text)):
+            self.postings[term].setdefault(doc_id, []).append(position)
+        self._terms = None
+        return True
+
+    def remove_document(self, key):
+        """Drop a document and its postings."""
+        doc_id = self.doc_ids.pop(key)
+        doc = self.docs[doc_id]
+        self.docs[doc_id] = None
+        for term in set(tokenize(doc['text'])):
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        self._terms = None
+
+    def remove_source(self, source):
+        """Forget a source file; documents no other source contains are removed."""
+        for doc in self.docs:
+            if doc is not None and source in doc['sources']:
+                doc['sources'].discard(source)
+                if not doc['sources']:
+                    self.remove_document(doc['key'])
+        self.sources.pop(source, None)
+
+    def live_doc_ids(self):
+        return {doc_id for doc_id, doc in enumerate(self.docs) if doc is not None}
+
+    def add_file(self, path, base_dir):
+        """
+        Index a corpus file unless this exact content was indexed before.
+        Returns the number of new documents (None if the file was skipped).
+        """
+        source = os.path.relpath(os.path.abspath(path), base_dir)
+        digest = file_hash(path)
+        if self.sources.get(source) == digest:
+            return None
+        if source in self.sources:
+            # Changed since it was indexed; its old documents may be stale
+            self.remove_source(source)
+
+        added = 0
+        header = read_header(path)
+        if 'total_comments' in header:
+            titles = {title: video_id for video_id, title in self.videos.items()}
+            for comment in iter_array(path, 'comments'):
+                video_id = titles.get(comment.get('video_title'), comment.get('video_title'))
+                added += self.add_document(comment_key(comment), 'comment', video_id,
+                                           comment.get('text', ''), source)
+        else:
+            for video in iter_array(path, 'videos',
+                                    fields=['video_id', 'title', 'transcript', 'comments']):
+                video_id = video['video_id']
+                self.videos.setdefault(video_id, video.get('title', ''))
+                if video.get('transcript'):
+                    text = ' '.join(word for word, _ in clean_transcript(video['transcript']))
+                    added += self.add_document(f'transcript:{video_id}', 'transcript',
+                                               video_id, text, source, replace=True)
+                for comment in normalize_comments(video.get('comments')):
+                    added += self.add_document(comment_key(comment), 'comment', video_id,
+                                               comment.get('text', ''), source)
+        self.sources[source] = digest
+        return added
+
+    # -- querying -------------------------------------------------------
+
+    def term_docs(self, term):
+        """{doc id: positions} for a term, or the union over a 'prefix*'."""
+        if not term.endswith('*'):
+            return self.postings.get(term, {})
+        prefix = term[:-1]
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        merged = {}
+        i = bisect_left(self._terms, prefix)
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            for doc_id, positions in self.postings[self._terms[i]].items():
+                merged.setdefault(doc_id, []).extend(positions)
+            i += 1
+        return merged
+
+    def phrase_docs(self, terms):
+        """Doc ids containing the terms consecutively."""
+        if not terms:
+            return set()
+        postings = [self.term_docs(term) for term in terms]
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates &= p.keys()
+        if len(terms) == 1:
+            return candidates
+        matches = set()
+        for doc_id in candidates:
+            starts = set(postings[0][doc_id])
+            for offset, p in enumerate(postings[1:], 1):
+                starts &= {position - offset for position in p[doc_id]}
+                if not starts:
+                    break
+            if starts:
+                matches.add(doc_id)
+        return matches
+
+    def search(self, query, kind=None):
+        """Doc ids matching a query string, optionally only 'transcript' or 'comment' docs."""
+        doc_ids = _QueryParser(self, query).parse()
+        if kind:
+            doc_ids = {d for d in doc_ids if self.docs[d]['kind'] == kind}
+        return sorted(doc_ids)
+
+    def snippet(self, doc_id, query, width=60):
+        """Text around the longest query term found in a document."""
+        text = self.docs[doc_id]['text']
+        terms = [t for t in tokenize(query) if t not in _OPERATORS]
+        lowered = text.lower()
+        hits = [lowered.find(term) for term in sorted(terms, key=len, reverse=True)]
+        hits = [hit for hit in hits if hit >= 0]
+        start = max(0, hits[0] - width) if hits else 0
+        end = min(len(text), start + 2 * width + 20)
+        return ('...' if start else '') + ' '.join(text[start:end].split()) + ('...' if end < len(text) else '')
+
+    def tag_counts(self, tags=PAIN_POINTS, kind='comment'):
+        """{tag: {'videos', 'video_share', 'documents'}} for each pain-point tag."""
+        total_videos = len(self.videos) or 1
+        counts = {}
+        for tag, queries in tags.items():
+            doc_ids = self.search(' OR '.join(f'({q})' for q in queries), kind)
+            videos = {self.docs[d]['video_id'] for d in doc_ids} & self.videos.keys()
+            counts[tag] = {
+                'videos': len(videos),
+                'video_share': round(len(videos) / total_videos, 3),
+                'documents': len(doc_ids),
+            }
+        return counts
+
+    # -- persistence ----------------------------------------------------
+
+    def save(self, path):
+        # Removed documents leave gaps; number the live ones consecutively
+        renumber = {}
+        docs = []
+        for doc_id, doc in enumerate(self.docs):
+            if doc is not None:
+                renumber[doc_id] = len(docs)
+                docs.append(doc)
+        source_numbers = {source: i for i, source in enumerate(self.sources)}
+        data = {
+            'version': INDEX_VERSION,
+            'sources': self.sources,
+            'videos': self.videos,
+            'docs': [[d['key'], d['kind'], d['video_id'], d['text'],
+                      sorted(source_numbers[s] for s in d['sources'] if s in source_numbers)]
+                     for d in docs],
+            'postings': {term: [[renumber[doc_id]] + positions
+                                for doc_id, positions in docs_positions.items()]
+                         for term, docs_positions in self.postings.items()},
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"{path}: index version {data.get('version')}, expected "
+                             f"{INDEX_VERSION} (rebuild it with `corpus_index.py build`)")
+        index = cls()
+        index.sources = data['sources']
+        index.videos = data['videos']
+        source_names = list(index.sources)
+        for key, kind, video_id, text, sources in data['docs']:
+            index.doc_ids[key] = len(index.docs)
+            index.docs.append({'key': key, 'kind': kind, 'video_id': video_id, 'text': text,
+                               'sources': {source_names[i] for i in sources}})
+        for term, entries in data['postings'].items():
+            index.postings[term] = {entry[0]: entry[1:] for entry in entries}
+        return index
+
+
+_OPERATORS = {'and', 'or', 'not'}
+
+_QUERY_TOKEN_RE = re.compile(r'\s*(?:(")([^"]*)"|([()])|(-)|([^\s()"]+))')
+
+
+class _QueryParser:
+    """Recursive descent: or_expr := and_expr (OR and_expr)*; and_expr := unary+."""
+
+    def __init__(self, index, query):
+        self.index = index
+        self.tokens = []
+        pos = 0
+        query = query.strip()
+        while pos < len(query):
+            match = _QUERY_TOKEN_RE.match(query, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"Cannot parse query at: {query[pos:]!r}")
+            quote, phrase, paren, minus, word = match.groups()
+            if quote:
+                self.tokens.append(('phrase', phrase))
+            elif paren:
+                self.tokens.append((paren, paren))
+            elif minus:
+                self.tokens.append(('not', '-'))
+            elif word.upper() in ('AND', 'OR', 'NOT'):
+                self.tokens.append((word.lower(), word))
+            else:
+                self.tokens.append(('term', word))
+            pos = match.end()
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        if self.pos >= len(self.tokens):
+            raise ValueError('unexpected end of query')
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            return set()
+        result = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.pos][1]!r} in query")
+        return result
+
+    def or_expr(self):
+        result = self.and_expr()
+        while self.peek() == 'or':
+            self.take()
+            result = result | self.and_expr()
+        return result
+
+    def and_expr(self):
+        include, exclude, negated = None, set(), False
+        while self.peek() in ('term', 'phrase', 'not', '(', 'and'):
+            if self.peek() == 'and':
+                self.take()
+                if self.peek() is None:
+                    raise ValueError('unexpected end of query')
+                continue
+            negate = self.peek() == 'not'
+            if negate:
+                self.take()
+            docs = self.unary()
+            if negate:
+                exclude |= docs
+                negated = True
+            else:
+                include = docs if include is None else include & docs
+        if include is None:
+            if not negated:
+                if self.peek() is None:
+                    raise ValueError('unexpected end of query')
+                raise ValueError("Expected a term, phrase or '('")
+            include = self.index.live_doc_ids()
+        return include - exclude
+
+    def unary(self):
+        kind, value = self.take()
+        if kind == '(':
+            result = self.or_expr()
+            if self.peek() != ')':
+                raise ValueError("Missing ')' in query")
+            self.take()
+            return result
+        if kind == 'phrase':
+            return self.index.phrase_docs(tokenize(value))
+        if kind == 'term':
+            terms = tokenize(value.rstrip('*'))
+            if value.endswith('*') and terms:
+                terms[-1] += '*'
+            return self.index.phrase_docs(terms)
+        raise ValueError(f"Unexpected {value!r} in query")
+
+
+def resolve_batch_path(entry, manifest_path):
+    """A manifest batch's file, falling back to its name next to the manifest."""
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    candidates = []
+    if entry.get('file'):
+        path = entry['file']
+        candidates.append(path if os.path.isabs(path) else os.path.join(manifest_dir, path))
+        candidates.append(os.path.join(manifest_dir, os.path.basename(path)))
+    if entry.get('name'):
+        candidates.append(os.path.join(manifest_dir, entry['name'] + '.json'))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    raise FileNotFoundError(f"Batch {entry.get('name')!r} not found (tried {', '.join(candidates)})")
+
+
+def manifest_files(manifest_path):
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+    return [resolve_batch_path(entry, manifest_path) for entry in manifest.get('batches', [])]
+
+
+def update_index(index, paths, base_dir):
+    """Add every path to the index; prints one line per file."""
+    for path in paths:
+        started = time.perf_counter()
+        added = index.add_file(path, base_dir)
+        label = os.path.basename(path)
+        if added is None:
+            print(f"  - {label}: unchanged, skipped")
+        else:
+            print(f"  ✓ {label}: {added} new documents "
+                  f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search transcripts and comments of the research corpus.')
+    parser.add_argument('-i', '--index', default=INDEX_PATH, help='index file')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='build the index from scratch')
+    build.add_argument('files', nargs='*', help='corpus files (default: everything in raw/)')
+    build.add_argument('--manifest', default=MANIFEST_PATH)
+
+    update = commands.add_parser('update', help='index new files and manifest batches')
+    update.add_argument('files', nargs='*')
+    update.add_argument('--manifest', default=MANIFEST_PATH)
+
+    query = commands.add_parser('query', help='run a query')
+    query.add_argument('query')
+    query.add_argument('--kind', choices=['transcript', 'comment'])
+    query.add_argument('--limit', type=int, default=10, help='results to print')
+
+    commands.add_parser('tags', help='pain-point tag counts')
+    args = parser.parse_args(argv)
+
+    base_dir = os.path.dirname(os.path.abspath(args.index))
+    if args.command in ('build', 'update'):
+        index = CorpusIndex()
+        if args.command == 'update' and os.path.exists(args.index):
+            try:
+                index = CorpusIndex.load(args.index)
+            except ValueError as e:
+                print(f"✗ {e}")
+                return 1
+        paths = list(args.files)
+        if args.manifest and os.path.exists(args.manifest):
+            paths += manifest_files(args.manifest)
+        if args.command == 'build' and not args.files:
+            # Master file first so comment-only files can map titles to video ids
+            paths = corpus_files() + paths
+        # De-duplicate while keeping order
+        paths = list(dict.fromkeys(os.path.abspath(p) for p in paths))
+        print(f"Indexing {len(paths)} file(s)...")
+        update_index(index, paths, base_dir)
+        index.save(args.index)
+        print(f"\n✓ {len(index.doc_ids)} documents, {len(index.postings)} terms -> {args.index}")
+        return 0
+
+    started = time.perf_counter()
+    try:
+        index = CorpusIndex.load(args.index)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    loaded = time.perf_counter() - started
+
+    if args.command == 'query':
+        started = time.perf_counter()
+        try:
+            doc_ids = index.search(args.query, args.kind)
+        except ValueError as e:
+            print(f"✗ {e}")
+            return 1
+        elapsed = time.perf_counter() - started
+        print(f"{len(doc_ids)} matches in {elapsed * 1000:.2f} ms (index loaded in {loaded * 1000:.0f} ms)")
+        for doc_id in doc_ids[:args.limit]:
+            doc = index.docs[doc_id]
+            print(f"  [{doc['kind']} {doc['video_id']}] {index.snippet(doc_id, args.query)}")
+        return 0
+
+    started = time.perf_counter()
+    counts = index.tag_counts()
+    elapsed = time.perf_counter() - started
+    print(f"Pain-point tags over comments of {len(index.videos)} videos "
+          f"({elapsed * 1000:.1f} ms)")
+    for tag, count in sorted(counts.items(), key=lambda item: -item[1]['videos']):
+        print(f"  {tag:<22}{count['videos']:>3}/{len(index.videos)} videos "
+              f"({count['video_share']:.0%}), {count['documents']} comments")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Streaming loader for the YouTube research corpus (raw/*.json).
+
+The corpus files are one JSON object with a big array inside:
+
+    Averagetojacked_data.json        {"channel_handle", "extraction_date", "videos": [...]}
+    batches/Averagetojacked_batch_*  {"channel_handle", "batch_name", "video_count", "videos": [...]}
+    batches/batch_*_comments_only    {"total_comments", "comments": [...]}
+
+Instead of json.load() on the whole file, the file is memory-mapped and
+scanned at the byte level: each array element is located by matching
+brackets (strings are skipped with a find() for the closing quote, so a
+megabyte transcript costs a memchr, not a Python loop), and only the
+requested fields of each element are decoded with json.loads. Memory use is
+one element at a time, whatever the size of the file.
+
+    for video in iter_videos(path, exclude=['transcript']):
+        ...
+
+Usage:
+    python corpus_loader.py [FILE ...]      # field/size summary, default: all of raw/
+"""
+
+import ast
+import json
+import mmap
+import os
+import re
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RAW_DIR = os.path.join(SCRIPT_DIR, '..', 'raw')
+
+CORPUS_PATH = os.path.join(RAW_DIR, 'Averagetojacked_data.json')
+
+_TOKEN_RE = re.compile(rb'[{}\[\]"]')
+_SCALAR_RE = re.compile(rb'[^,}\]\s]+')
+_SPACE_RE = re.compile(rb'\s*')
+
+
+class CorpusFormatError(ValueError):
+    """The file is not shaped like a corpus file (or is truncated)."""
+
+
+def _skip_space(buf, pos):
+    return _SPACE_RE.match(buf, pos).end()
+
+
+def _string_end(buf, pos):
+    """End offset of the JSON string whose opening quote is at pos."""
+    end = pos
+    while True:
+        end = buf.find(b'"', end + 1)
+        if end < 0:
+            raise CorpusFormatError(f"Unterminated string at byte {pos}")
+        # A quote preceded by an odd number of backslashes is escaped
+        backslash = end - 1
+        while buf[backslash] == 0x5c:
+            backslash -= 1
+        if (end - 1 - backslash) % 2 == 0:
+            return end + 1
+
+
+def _value_end(buf, pos):
+    """End offset of the JSON value starting at pos (no leading whitespace)."""
+    first = buf[pos:pos + 1]
+    if first == b'"':
+        return _string_end(buf, pos)
+    if first in (b'{', b'['):
+        depth = 0
+        while True:
+            match = _TOKEN_RE.search(buf, pos)
+            if not match:
+                raise CorpusFormatError(f"Unterminated value at byte {pos}")
+            token = match.group()
+            if token == b'"':
+                pos = _string_end(buf, match.start())
+                continue
+            depth += 1 if token in (b'{', b'[') else -1
+            pos = match.end()
+            if depth == 0:
+                return pos
+    match = _SCALAR_RE.match(buf, pos)
+    if not match:
+        raise CorpusFormatError(f"Expected a value at byte {pos}")
+    return match.end()
+
+
+def _expect(buf, pos, char):
+    pos = _skip_space(buf, pos)
+    if buf[pos:pos + 1] != char:
+        raise CorpusFormatError(f"Expected {char.decode()!r} at byte {pos}")
+    return pos + 1
+
+
+def _iter_members(buf, pos):
+    """Yield (key, value_start, value_end) for the object starting at pos."""
+    pos = _expect(buf, pos, b'{')
+    pos = _skip_space(buf, pos)
+    if buf[pos:pos + 1] == b'}':
+        return
+    while True:
+        key_end = _value_end(buf, pos)
+        key = json.loads(buf[pos:key_end])
+        start = _skip_space(buf, _expect(buf, key_end, b':'))
+        end = _value_end(buf, start)
+        yield key, start, end
+        pos = _skip_space(buf, end)
+        if buf[pos:pos + 1] == b'}':
+            return
+        pos = _skip_space(buf, _expect(buf, pos, b','))
+
+
+def _iter_elements(buf, pos):
+    """Yield (start, end) of each element of the array starting at pos."""
+    pos = _skip_space(buf, _expect(buf, pos, b'['))
+    if buf[pos:pos + 1] == b']':
+        return
+    while True:
+        end = _value_end(buf, pos)
+        yield pos, end
+        pos = _skip_space(buf, end)
+        if buf[pos:pos + 1] == b']':
+            return
+        pos = _skip_space(buf, _expect(buf, pos, b','))
+
+
+def _project(buf, start, fields, exclude):
+    """Decode only the wanted members of the object at start."""
+    item = {}
+    for key, value_start, value_end in _iter_members(buf, start):
+        if (fields is None or key in fields) and key not in exclude:
+            item[key] = json.loads(buf[value_start:value_end])
+    return item
+
+
+class _Mapped:
+    """Read-only memory map of a file (empty files map to b'')."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.buf = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def __enter__(self):
+        return self.buf
+
+    def __exit__(self, *exc):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self.file.close()
+
+
+def iter_array(path, key, fields=None, exclude=()):
+    """
+    Yield the elements of the top-level array `key` one at a time.
+
+    fields: only decode these members of each element (None = all).
+    exclude: never decode these members (e.g. ['transcript']).
+    Elements that are not objects are yielded as-is.
+    """
+    fields = set(fields) if fields is not None else None
+    exclude = set(exclude)
+    with _Mapped(path) as buf:
+        for member, start, _ in _iter_members(buf, _skip_space(buf, 0)):
+            if member != key:
+                continue
+            for element_start, element_end in _iter_elements(buf, start):
+                if buf[element_start:element_start + 1] == b'{':
+                    yield _project(buf, element_start, fields, exclude)
+                else:
+                    yield json.loads(buf[element_start:element_end])
+            return
+    raise CorpusFormatError(f"{path}: no top-level '{key}' array")
+
+
+def read_header(path):
+    """Top-level scalar members of a corpus file (everything except its arrays)."""
+    header = {}
+    with _Mapped(path) as buf:
+        for key, start, end in _iter_members(buf, _skip_space(buf, 0)):
+            if buf[start:start + 1] != b'[':
+                header[key] = json.loads(buf[start:end])
+    return header
+
+
+def normalize_comments(comments):
+    """
+    Comments as a list of dicts with at least a 'text' key.
+
+    Extractions store comments as a JSON list, but some older ones hold the
+    Python repr of that list as a string; plain strings become one comment.
+    """
+    if comments is None:
+        return []
+    if isinstance(comments, str):
+        text = comments.strip()
+        if not text:
+            return []
+        try:
+            comments = json.loads(text)
+        except ValueError:
+            try:
+                comments = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                return [{'text': comments}]
+    if isinstance(comments, dict):
+        comments = [comments]
+    return [c if isinstance(c, dict) else {'text': str(c)} for c in comments]
+
+
+def iter_videos(path=CORPUS_PATH, fields=None, exclude=()):
+    """Videos of a data or batch file, with comments normalized when loaded."""
+    for video in iter_array(path, 'videos', fields, exclude):
+        if 'comments' in video:
+            video['comments'] = normalize_comments(video['comments'])
+        yield video
+
+
+def iter_comments(path):
+    """Comments of a *_comments_only.json file."""
+    return iter_array(path, 'comments')
+
+
+def corpus_files(raw_dir=RAW_DIR):
+    """All corpus JSON files under raw/ except the manifest, sorted."""
+    paths = []
+    for root, _, names in os.walk(raw_dir):
+        paths.extend(os.path.join(root, name) for name in names
+                     if name.endswith('.json') and not name.endswith('_manifest.json'))
+    return sorted(paths)
+
+
+if __name__ == '__main__':
+    import time
+
+    for path in sys.argv[1:] or corpus_files():
+        started = time.perf_counter()
+        header = read_header(path)
+        array = 'comments' if 'total_comments' in header else 'videos'
+        count = 0
+        comment_count = 0
+        for item in iter_array(path, array, exclude=['transcript']):
+            count += 1
+            comment_count += len(normalize_comments(item.get('comments'))) if array == 'videos' else 0
+        elapsed = time.perf_counter() - started
+        print(f"{os.path.relpath(path, RAW_DIR)}: {count} {array}"
+              + (f", {comment_count} comments" if array == 'videos' else '')
+              + f" ({os.path.getsize(path):,} bytes, {elapsed * 1000:.1f} ms without transcripts)")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Merge the research corpus files into one de-duplicated store.
+
+The master data file, the three batch files and the comments-only files
+overlap heavily (batch_001_comments_only.json and batch_002_comments_only.json
+are identical). Videos are merged by video_id and comments by a hash of
+author and text (corpus_index.comment_key), so every video and comment is
+stored once; comments-only entries are attached to their video by title.
+
+The store keeps the corpus shape ({"channel_handle", "videos": [...]}), so
+corpus_loader.iter_videos() and corpus_index.py read it like any batch file.
+Each video gets a "sha256" of its merged content and each comment an "id".
+
+With --manifest, every batch entry gets its file path relative to the
+manifest, the file's sha256, its video count, how many of its videos were
+not in earlier batches, and which batch it duplicates when the bytes are
+identical. The store's path and hash are recorded at the top level.
+
+Usage:
+    python corpus_merge.py                              # all of raw/ -> corpus_store.json
+    python corpus_merge.py ../raw/Averagetojacked_data.json ../raw/batches/batch_00*_comments_only.json \
+        --manifest ../raw/batches/Averagetojacked_manifest.json
+    python corpus_merge.py FILE ... -o store.json --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+from corpus_index import MANIFEST_PATH, comment_key, file_hash, resolve_batch_path
+from corpus_loader import RAW_DIR, corpus_files, iter_array, normalize_comments, read_header
+
+STORE_VERSION = 1
+
+STORE_PATH = os.path.join(RAW_DIR, '..', 'corpus_store.json')
+
+
+def content_hash(value):
+    """sha256 of a JSON value's canonical (sorted, minified) encoding."""
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class CorpusMerger:
+    """Accumulates videos and comments from corpus files, keeping first-seen order."""
+
+    def __init__(self):
+        self.header = {}
+        self.videos = {}           # video_id -> video without comments
+        self.comments = {}         # video_id -> {comment id: comment}
+        self.orphans = {}          # comment id -> comment (title matched no video)
+        self.seen_comments = set()
+        self.file_hashes = {}      # sha256 -> (first path with those bytes, its summary)
+        self.stats = {'files': 0, 'duplicate_files': 0, 'videos_read': 0,
+                      'comments_read': 0, 'duplicate_comments': 0}
+
+    def add_comment(self, video_id, comment):
+        self.stats['comments_read'] += 1
+        comment_id = comment_key(comment)
+        if comment_id in self.seen_comments:
+            self.stats['duplicate_comments'] += 1
+            return False
+        self.seen_comments.add(comment_id)
+        record = {'id': comment_id, **{k: v for k, v in comment.items() if k != 'video_title'}}
+        if video_id in self.videos:
+            self.comments[video_id][comment_id] = record
+        else:
+            self.orphans[comment_id] = dict(record, video_title=comment.get('video_title'))
+        return True
+
+    def add_file(self, path):
+        """
+        Merge one corpus file. Returns a summary dict for the manifest:
+        sha256, duplicate_of, video_ids and new_videos.
+        """
+        digest = file_hash(path)
+        self.stats['files'] += 1
+        if digest in self.file_hashes:
+            self.stats['duplicate_files'] += 1
+            original, summary = self.file_hashes[digest]
+            return dict(summary, duplicate_of=original, new_videos=0)
+        summary = {'sha256': digest, 'duplicate_of': None, 'video_ids': [], 'new_videos': 0}
+        self.file_hashes[digest] = (path, summary)
+
+        header = read_header(path)
+        if 'total_comments' in header:
+            titles = {video.get('title'): video_id for video_id, video in self.videos.items()}
+            for comment in iter_array(path, 'comments'):
+                self.add_comment(titles.get(comment.get('video_title')), comment)
+            return summary
+
+        for key in ('channel_handle', 'extraction_date'):
+            if key in header:
+                self.header.setdefault(key, header[key])
+        for video in iter_array(path, 'videos'):
+            self.stats['videos_read'] += 1
+            video_id = video['video_id']
+            summary['video_ids'].append(video_id)
+            comments = normalize_comments(video.pop('comments', None))
+            if video_id not in self.videos:
+                summary['new_videos'] += 1
+                self.videos[video_id] = video
+                self.comments[video_id] = {}
+            else:
+                # Keep first-seen fields, fill in any the earlier copy lacked
+                for key, value in video.items():
+                    if not self.videos[video_id].get(key):
+                        self.videos[video_id][key] = value
+            for comment in comments:
+                self.add_comment(video_id, comment)
+        return summary
+
+    def attach_orphans(self):
+        """Retry orphan comments whose video arrived in a later file."""
+        titles = {video.get('title'): video_id for video_id, video in self.videos.items()}
+        for comment_id, comment in list(self.orphans.items()):
+            video_id = titles.get(comment.get('video_title'))
+            if video_id is not None:
+                del self.orphans[comment_id]
+                comment.pop('video_title', None)
+                self.comments[video_id][comment_id] = comment
+
+    def store(self):
+        videos = []
+        for video_id, video in self.videos.items():
+            record = dict(video)
+            record['comments'] = list(self.comments[video_id].values())
+            record['comments_raw_count'] = video.get('comments_raw_count', len(record['comments']))
+            record['sha256'] = content_hash(record)
+            videos.append(record)
+        return {
+            'version': STORE_VERSION,
+            **self.header,
+            'video_count': len(videos),
+            'comment_count': sum(len(c) for c in self.comments.values()) + len(self.orphans),
+            'videos': videos,
+            'orphan_comments': list(self.orphans.values()),
+        }
+
+
+def write_json(data, path, **dump_options):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, **dump_options)
+    os.replace(tmp_path, path)
+
+
+def update_manifest(manifest, manifest_path, summaries, store_path):
+    """Record hashes, relative paths and overlap for every batch; returns the manifest."""
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    names = {}
+    seen = set()
+    for entry in manifest.get('batches', []):
+        path = os.path.abspath(resolve_batch_path(entry, manifest_path))
+        summary = summaries[path]
+        names[path] = entry.get('name')
+        entry['file'] = os.path.relpath(path, manifest_dir)
+        entry['sha256'] = summary['sha256']
+        entry['video_count'] = len(summary['video_ids'])
+        entry['new_videos'] = len(set(summary['video_ids']) - seen)
+        seen.update(summary['video_ids'])
+        duplicate = names.get(summary['duplicate_of'])
+        if duplicate and duplicate != entry.get('name'):
+            entry['duplicate_of'] = duplicate
+        else:
+            entry.pop('duplicate_of', None)
+    manifest['store'] = {
+        'file': os.path.relpath(os.path.abspath(store_path), manifest_dir),
+        'sha256': file_hash(store_path) if os.path.exists(store_path) else None,
+    }
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Merge and de-duplicate the research corpus files.')
+    parser.add_argument('files', nargs='*',
+                        help='corpus files merged before any manifest batches '
+                             '(default without --manifest: everything in raw/)')
+    parser.add_argument('-o', '--output', default=STORE_PATH, help='consolidated store (minified JSON)')
+    parser.add_argument('--manifest', help=f'manifest to update (e.g. {os.path.relpath(MANIFEST_PATH)})')
+    parser.add_argument('--dry-run', action='store_true', help='report only, write nothing')
+    args = parser.parse_args(argv)
+
+    manifest = None
+    paths = list(args.files) or ([] if args.manifest else corpus_files())
+    if args.manifest:
+        with open(args.manifest, 'r') as f:
+            manifest = json.load(f)
+        paths += [resolve_batch_path(entry, args.manifest) for entry in manifest.get('batches', [])]
+    # Files in the order given (the master data file first: it is the most
+    # complete), then manifest batches in manifest order
+    paths = list(dict.fromkeys(os.path.abspath(p) for p in paths))
+
+    merger = CorpusMerger()
+    summaries = {}
+    for path in paths:
+        summary = summaries[path] = merger.add_file(path)
+        label = os.path.basename(path)
+        if summary['duplicate_of']:
+            print(f"  - {label}: identical to {os.path.basename(summary['duplicate_of'])}, skipped")
+        else:
+            print(f"  ✓ {label}: {len(summary['video_ids'])} videos ({summary['new_videos']} new)")
+    merger.attach_orphans()
+    store = merger.store()
+
+    stats = merger.stats
+    print(f"\nMerged {stats['files']} files ({stats['duplicate_files']} duplicate): "
+          f"{stats['videos_read']} videos -> {store['video_count']} unique, "
+          f"{stats['comments_read']} comments -> {store['comment_count']} unique "
+          f"({stats['duplicate_comments']} duplicates, {len(store['orphan_comments'])} unmatched)")
+
+    if args.dry_run:
+        return 0
+
+    write_json(store, args.output, separators=(',', ':'), ensure_ascii=False)
+    raw_bytes = sum(os.path.getsize(p) for p in paths)
+    print(f"✓ Wrote {args.output}: {os.path.getsize(args.output):,} bytes "
+          f"(inputs {raw_bytes:,} bytes)")
+
+    if manifest is not None:
+        update_manifest(manifest, args.manifest, summaries, args.output)
+        write_json(manifest, args.manifest, indent=2, ensure_ascii=False)
+        print(f"✓ Updated {args.manifest}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
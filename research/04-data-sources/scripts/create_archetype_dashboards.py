@@ -1,20 +1,54 @@
 #!/usr/bin/env python3
 """
 Create archetype-specific dashboard HTML files from data JSON files.
+
+Usage:
+    python create_archetype_dashboards.py
+    python create_archetype_dashboards.py --manifest users.csv --data-dir exports/ -o site/ -w 8
+    python create_archetype_dashboards.py --chunked [--chunk-by-year]
+
+A manifest is a JSON list (or {"dashboards": [...]}) or a CSV with the same
+fields as ARCHETYPES: data_file, output_file, version, subtitle, tagline, year.
+data_file is a process_archetype_data.py output, which is named after its
+export: archetype_01_overwhelmed_workout_export.csv -> archetype_01_overwhelmed_data.json
+(or _data.fbw with --format compact).
+
+--chunked inlines only an overview and writes each muscle group's exercises
+to compressed files in <page>.chunks/, loaded on drill-down; --chunk-by-year
+also splits them per calendar year (see dashboard_chunks.py). Chunked pages
+must be served over HTTP.
 """
 
+import argparse
+import csv
+import html
 import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import compact_format
+import dashboard_chunks
+import instrumentation
+from dashboard_template import V61_SLOTS, DashboardTemplate, script_json
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Base HTML template (v6.1)
+BASE_HTML_PATH = os.path.join(SCRIPT_DIR, '..', '..', '03-design-evolution', 'mockups',
+                              'fitbod-dashboard-mockup-v6.1.html')
 
-# Read the base HTML template (v6.1)
-base_html_path = '/Users/mirlca/Library/CloudStorage/OneDrive-Teradyne/Documents/Notes/02-areas/personal/youtube-app-generator/channels/averagetojacked/fitbod-dashboard-mockup-v6.1.html'
+# data_file paths are relative to this directory
+DATA_DIR = os.path.join(SCRIPT_DIR, '..', '..', '05-user-archetypes')
 
-with open(base_html_path, 'r') as f:
-    base_html = f.read()
+OUTPUT_DIR = os.path.join(DATA_DIR, 'dashboards')
 
 # Archetype configurations
-archetypes = [
+ARCHETYPES = [
     {
-        'data_file': 'data/archetype_01_data.json',
+        'data_file': 'data/archetype_01_overwhelmed_data.json',
         'output_file': 'fitbod-dashboard-archetype-01-overwhelmed.html',
         'version': 'Archetype 1: Overwhelmed',
         'subtitle': 'Pattern: Constant program switching and exercise experimentation',
@@ -22,7 +56,7 @@ archetypes = [
         'year': '2025-2026'
     },
     {
-        'data_file': 'data/archetype_02_data.json',
+        'data_file': 'data/archetype_02_selfdoubt_data.json',
         'output_file': 'fitbod-dashboard-archetype-02-selfdoubt.html',
         'version': 'Archetype 2: Self-Doubt',
         'subtitle': 'Pattern: Excessive volume with constant questioning',
@@ -30,7 +64,7 @@ archetypes = [
         'year': '2025'
     },
     {
-        'data_file': 'data/archetype_03_data.json',
+        'data_file': 'data/archetype_03_timeconstrained_data.json',
         'output_file': 'fitbod-dashboard-archetype-03-timeconstrained.html',
         'version': 'Archetype 3: Time-Constrained',
         'subtitle': 'Pattern: Efficient, minimal, consistent training',
@@ -39,67 +73,252 @@ archetypes = [
     }
 ]
 
-for archetype in archetypes:
-    print(f"\nCreating {archetype['version']}...")
-
-    # Load workout data
-    with open(archetype['data_file'], 'r') as f:
-        workout_data = json.load(f)
-
-    # Convert to JavaScript format
-    js_data = json.dumps(workout_data, indent=4)
-
-    # Prepare HTML replacements
-    html = base_html
-
-    # Replace title
-    html = html.replace(
-        '<title>Fitbod Intelligence Dashboard v6.1 - User Language</title>',
-        f'<title>Fitbod Intelligence Dashboard - {archetype["version"]}</title>'
-    )
-
-    # Replace header
-    html = html.replace(
-        '''      <h1>
-        Fitbod Intelligence Dashboard
-        <span class="version-badge">v6.1 - User Language</span>
-      </h1>''',
-        f'''      <h1>
-        Fitbod Intelligence Dashboard
-        <span class="version-badge">{archetype["version"]}</span>
-      </h1>'''
-    )
-
-    # Replace subtitle
-    html = html.replace(
-        '<div class="subtitle">See what Fitbod doesn\'t show you</div>',
-        f'<div class="subtitle">{archetype["subtitle"]}</div>'
-    )
-
-    # Replace tagline
-    html = html.replace(
-        '<div class="tagline">Now using language you actually say — "getting stronger" not "progressing"</div>',
-        f'<div class="tagline">{archetype["tagline"]}</div>'
-    )
-
-    # Replace workout data
-    html = html.replace(
-        'const WORKOUT_DATA = ' + base_html.split('const WORKOUT_DATA = ')[1].split(';\n')[0] + ';',
-        f'const WORKOUT_DATA = {js_data};'
-    )
-
-    # Replace footer
-    html = html.replace(
-        '2025 workout data (Jan 6 → Dec 29) • v6.1: Simplified status names using natural user language',
-        f'{archetype["year"]} archetype data • {archetype["version"]}: {archetype["subtitle"]}'
-    )
-
-    # Write output file
-    output_path = f'/Users/mirlca/Library/CloudStorage/OneDrive-Teradyne/Documents/Notes/02-areas/personal/youtube-app-generator/channels/averagetojacked/{archetype["output_file"]}'
-    with open(output_path, 'w') as f:
-        f.write(html)
-
-    print(f"  ✓ Created {archetype['output_file']}")
-    print(f"  - {len(workout_data)} exercises in dataset")
-
-print("\n✓ All archetype dashboards created successfully!")
+
+def load_workout_data(data_path):
+    """Load indented JSON or compact .fbw output of process_archetype_data.py."""
+    if data_path.endswith('.fbw'):
+        return compact_format.load(data_path)
+    with open(data_path, 'r') as f:
+        return json.load(f)
+
+
+def slot_values(archetype, workout_data):
+    """Template slot values for one dashboard, escaped for where they are inserted."""
+    # Manifests and exports may come from users; none of it may inject markup.
+    # The text slots are element content, so quotes can stay as they are
+    def escape(text):
+        return html.escape(text, quote=False)
+
+    version, subtitle = escape(archetype['version']), escape(archetype['subtitle'])
+    return {
+        'title': f'Fitbod Intelligence Dashboard - {version}',
+        'badge': version,
+        'subtitle': subtitle,
+        'tagline': escape(archetype['tagline']),
+        'footer': f'{escape(archetype["year"])} archetype data • {version}: {subtitle}',
+        # Convert to JavaScript format
+        'data': script_json(workout_data, indent=4),
+    }
+
+
+REQUIRED_FIELDS = ['data_file', 'output_file', 'version', 'subtitle', 'tagline', 'year']
+
+
+def load_manifest(path):
+    """Read dashboard configs from a JSON or CSV manifest."""
+    if path.endswith('.csv'):
+        with open(path, 'r', newline='') as f:
+            configs = list(csv.DictReader(f))
+    else:
+        with open(path, 'r') as f:
+            configs = json.load(f)
+        if isinstance(configs, dict):
+            configs = configs['dashboards']
+
+    for i, config in enumerate(configs):
+        missing = [field for field in REQUIRED_FIELDS if not config.get(field)]
+        if missing:
+            raise ValueError(f"{path}: entry {i + 1} is missing {', '.join(missing)}")
+    return configs
+
+
+def write_atomic(output_path, write):
+    """Call write(f) on a temp file next to output_path, then rename it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or '.',
+                                    prefix='.' + os.path.basename(output_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            write(f)
+        size = os.path.getsize(tmp_path)
+        # mkstemp creates 0600 files; dashboards are meant to be served
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return size
+
+
+def template_slots(chunk_mode=None):
+    return dashboard_chunks.CHUNKED_SLOTS if chunk_mode else V61_SLOTS
+
+
+def render_dashboard(template, archetype, data_dir, output_dir, chunk_mode=None):
+    """
+    Render one dashboard to disk. Returns (workout data, page bytes, chunk bytes).
+
+    chunk_mode None inlines all data; 'muscle' or 'year' needs a template
+    compiled with template_slots(chunk_mode) and writes data chunks next to
+    the page.
+    """
+    profiler = instrumentation.get_profiler()
+    with profiler.stage('data_load'):
+        workout_data = load_workout_data(os.path.join(data_dir, archetype['data_file']))
+    output_path = os.path.join(output_dir, archetype['output_file'])
+    chunk_bytes = 0
+    if chunk_mode:
+        chunk_dir = dashboard_chunks.chunk_dir_name(output_path)
+        with profiler.stage('chunk_compression'):
+            chunks = dashboard_chunks.build_chunks(workout_data, by_year=chunk_mode == 'year')
+        with profiler.stage('chunk_write'):
+            chunk_bytes = dashboard_chunks.write_chunks(
+                chunks, os.path.join(os.path.dirname(output_path), chunk_dir))
+        with profiler.stage('json_serialization'):
+            overview = dashboard_chunks.build_overview(workout_data, chunks, chunk_dir)
+            values = dashboard_chunks.chunked_slot_values(slot_values(archetype, {}), overview)
+    else:
+        with profiler.stage('json_serialization'):
+            values = slot_values(archetype, workout_data)
+
+    templating = 0.0
+
+    def write(f):
+        # The page is streamed into the temp file, so html_templating includes
+        # those writes; file_write is what write_atomic() does around them
+        nonlocal templating
+        started = time.perf_counter()
+        template.render_to(f, values)
+        templating = time.perf_counter() - started
+
+    started = time.perf_counter()
+    size = write_atomic(output_path, write)
+    if profiler.enabled:
+        profiler.add_time('html_templating', templating)
+        profiler.add_time('file_write', time.perf_counter() - started - templating)
+    profiler.count('dashboards')
+    profiler.count('exercises', len(workout_data))
+    return workout_data, size, chunk_bytes
+
+
+# Each pool worker compiles the template once
+_worker_template = None
+
+
+def _init_worker(template_path, chunk_mode=None):
+    global _worker_template
+    _worker_template = DashboardTemplate.from_file(template_path, template_slots(chunk_mode))
+
+
+def render_job(archetype, data_dir, output_dir, template=None, profile=False, chunk_mode=None,
+               trace_memory=False):
+    """Render one dashboard and report timing; errors are returned, not raised."""
+    if profile:
+        with instrumentation.profiling(trace_memory) as profiler:
+            result = render_job(archetype, data_dir, output_dir, template, chunk_mode=chunk_mode)
+        result['profile'] = profiler.snapshot()
+        return result
+
+    started = time.perf_counter()
+    result = {'output_file': archetype['output_file'], 'exercises': 0, 'bytes': 0,
+              'chunk_bytes': 0, 'seconds': 0.0, 'error': None}
+    try:
+        workout_data, size, chunk_bytes = render_dashboard(template or _worker_template, archetype,
+                                                           data_dir, output_dir, chunk_mode)
+        result['exercises'] = len(workout_data)
+        result['bytes'] = size
+        result['chunk_bytes'] = chunk_bytes
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def print_result(result):
+    if result['error']:
+        print(f"  ✗ {result['output_file']}: {result['error']}")
+    else:
+        chunks = f" + {result['chunk_bytes']:,} in chunks" if result.get('chunk_bytes') else ''
+        print(f"  ✓ Created {result['output_file']}: {result['exercises']} exercises, "
+              f"{result['bytes']:,} bytes{chunks} in {result['seconds'] * 1000:.1f} ms")
+
+
+def render_all(configs, template_path, data_dir, output_dir, workers, profile=False,
+               chunk_mode=None, trace_memory=False):
+    """Render every config, across a process pool when workers > 1."""
+    results = []
+    if workers <= 1:
+        template = DashboardTemplate.from_file(template_path, template_slots(chunk_mode))
+        for archetype in configs:
+            results.append(render_job(archetype, data_dir, output_dir, template, profile,
+                                      chunk_mode, trace_memory))
+            print_result(results[-1])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template_path, chunk_mode)) as pool:
+        futures = {pool.submit(render_job, archetype, data_dir, output_dir, None, profile,
+                               chunk_mode, trace_memory): archetype
+                   for archetype in configs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'output_file': futures[future]['output_file'], 'exercises': 0,
+                          'bytes': 0, 'chunk_bytes': 0, 'seconds': 0.0,
+                          'error': f'worker failed: {type(e).__name__}: {e}'}
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render archetype dashboards from data JSON files.')
+    parser.add_argument('--template', default=BASE_HTML_PATH, help='v6.1 mockup HTML')
+    parser.add_argument('--manifest', help='JSON or CSV list of dashboards (default: ARCHETYPES)')
+    parser.add_argument('--data-dir', default=DATA_DIR,
+                        help='directory data_file paths are relative to')
+    parser.add_argument('-o', '--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--profile', metavar='REPORT_JSON',
+                        help='write per-stage timings, counters and peak memory to this file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='with --profile, also list top allocation sites (tracemalloc; slow)')
+    parser.add_argument('--chunked', action='store_true',
+                        help='inline only an overview; load muscle-group data chunks on drill-down')
+    parser.add_argument('--chunk-by-year', action='store_true',
+                        help='with --chunked, also split the chunks per calendar year')
+    args = parser.parse_args(argv)
+    if args.chunk_by_year and not args.chunked:
+        parser.error('--chunk-by-year needs --chunked')
+    chunk_mode = ('year' if args.chunk_by_year else 'muscle') if args.chunked else None
+
+    configs = load_manifest(args.manifest) if args.manifest else ARCHETYPES
+    # Fail on a broken template before starting any workers
+    DashboardTemplate.from_file(args.template, template_slots(chunk_mode))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.profile:
+        profiler = instrumentation.enable(trace_memory=args.trace_memory)
+
+    workers = max(1, min(args.workers, len(configs)))
+    print(f"Rendering {len(configs)} dashboard(s) with {workers} worker(s)...")
+    started = time.perf_counter()
+    results = render_all(configs, args.template, args.data_dir, args.output_dir, workers,
+                         bool(args.profile), chunk_mode, args.trace_memory)
+    elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if r['error']]
+    total_bytes = sum(r['bytes'] for r in results)
+    print(f"\nRendered {len(results) - len(failed)}/{len(results)} dashboards, "
+          f"{total_bytes:,} bytes in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.1f} dashboards/s)")
+    if args.profile:
+        for r in results:
+            if 'profile' in r:
+                profiler.merge(r['profile'])
+        profiler.count('bytes', total_bytes)
+        profiler.count('failed_dashboards', len(failed))
+        profiler.write_report(args.profile, 'create_archetype_dashboards.py')
+        print(f"Profile report written to {args.profile}")
+
+    if failed:
+        print(f"✗ {len(failed)} failed")
+        return 1
+
+    print("\n✓ All archetype dashboards created successfully!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Chunked render mode for the v6.1 dashboards.
+
+The default render inlines every exercise of every week as one
+`const WORKOUT_DATA = {...}` literal, so a user with many years of data gets
+a page that has to download and parse all of it before anything is drawn.
+In chunked mode the page only inlines a small overview instead:
+
+    const DASHBOARD_OVERVIEW = {
+      "start": "2021-01-04", "end": "2025-12-29",
+      "groups": {
+        "Chest": {"exercises": 6, "totalSets": 41, "totalWorkouts": 38,
+                  "pctChange": 1.23,        # null when no exercise is active
+                  "chunks": ["<page>.chunks/chest.1f2e3d4c5b.json.gz"]},
+        ...
+      }
+    };
+
+That is enough for the progress summary and one placeholder card per muscle
+group. Each group's exercises are written to gzip-compressed JSON chunks next
+to the page (optionally one per calendar year) and fetched when the card
+scrolls into view; the card is then drawn by the mockup's own
+processWorkoutData()/renderDashboard(). A card only depends on its own
+primary exercises and the global week range, so it comes out the same as in
+the full render.
+
+Chunk files are named by a hash of their content, so chunks of finished years
+keep their URL across re-renders and stay in the browser cache. Chunks are
+fetched with fetch(), so the pages have to be served over HTTP (file:// URLs
+are blocked); the loader accepts the files with or without
+Content-Encoding: gzip.
+
+Used by create_archetype_dashboards.py --chunked [--chunk-by-year].
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+
+from dashboard_template import V61_SLOTS, script_json
+from muscle_rollups import (ALL_MUSCLE_GROUPS, INACTIVE_WEEKS, RECENT_WEEKS, last_week,
+                            pct_change_per_week)
+
+CHUNK_SUFFIX = '.json.gz'
+
+# The data slot also covers the week range computed from WORKOUT_DATA, and
+# the boot slot replaces the DOMContentLoaded handler with the chunk loader
+CHUNKED_SLOTS = dict(
+    V61_SLOTS,
+    data=('    // Your 2025 workout data (pre-processed with all exercises)\n',
+          '\n    // Calculate cutoff for "inactive" exercises'),
+    boot=('    // Load dashboard on page load\n', '\n\n    // Chart.js default config'),
+)
+
+OVERVIEW_JS = """\
+    // Overview only; each muscle group's exercises are fetched on drill-down
+    const DASHBOARD_OVERVIEW = {overview};
+    const WORKOUT_DATA = {{}};
+    const YEAR_START = DASHBOARD_OVERVIEW.start;
+    const YEAR_END = DASHBOARD_OVERVIEW.end;
+"""
+
+LOADER_JS = """\
+    async function fetchChunk(url) {
+      const response = await fetch(url);
+      if (!response.ok) throw new Error(`${url}: HTTP ${response.status}`);
+      const bytes = new Uint8Array(await response.arrayBuffer());
+      if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+        return JSON.parse(await new Response(stream).text());
+      }
+      // Served with Content-Encoding: gzip, already decoded by the browser
+      return JSON.parse(new TextDecoder().decode(bytes));
+    }
+
+    // Fetch a group's chunks, then add its exercises in their original order
+    // (the order of the exercise rows), however the fetches finish
+    async function loadGroup(muscle) {
+      const chunks = await Promise.all(DASHBOARD_OVERVIEW.groups[muscle].chunks.map(fetchChunk));
+      const exercises = {};
+      chunks.forEach(chunk => {
+        // Per-year chunks of one exercise merge into the same weeks
+        Object.entries(chunk).forEach(([exerciseName, exData]) => {
+          if (exercises[exerciseName]) {
+            Object.assign(exercises[exerciseName].weeks, exData.weeks);
+          } else {
+            exercises[exerciseName] = exData;
+          }
+        });
+      });
+      Object.entries(exercises)
+        .sort((a, b) => a[1].order - b[1].order)
+        .forEach(([exerciseName, exData]) => { WORKOUT_DATA[exerciseName] = exData; });
+    }
+
+    // Stand-in exercises, so calculateProgressMetrics() yields the overview figures
+    function overviewData() {
+      const muscleGroups = {};
+      ALL_MUSCLE_GROUPS.forEach(muscle => {
+        const group = DASHBOARD_OVERVIEW.groups[muscle];
+        const exercises = group.exercises > 0
+          ? [{ isInactive: group.pctChange === null, loadPctChange: group.pctChange || 0 }]
+          : [];
+        muscleGroups[muscle] = { exercises, totalSets: group.totalSets, totalWorkouts: group.totalWorkouts };
+      });
+      return { muscleGroups };
+    }
+
+    // Placeholder cards in renderDashboard()'s order
+    function renderPlaceholders() {
+      const groups = DASHBOARD_OVERVIEW.groups;
+      document.getElementById('muscle-groups-container').innerHTML = ALL_MUSCLE_GROUPS
+        .slice()
+        .sort((a, b) => groups[b].totalWorkouts - groups[a].totalWorkouts)
+        .map(muscle => `
+          <div class="muscle-group-card" id="muscle-${muscle.toLowerCase()}" data-muscle="${muscle}">
+            <div class="muscle-group-header">
+              <div class="muscle-group-name">${muscle}</div>
+              <div class="muscle-group-summary">${groups[muscle].exercises} exercise${groups[muscle].exercises !== 1 ? 's' : ''} • ${groups[muscle].totalWorkouts} workouts</div>
+            </div>
+            <div class="muscle-group-benchmark" style="color: ${COLOR_SYSTEM.INACTIVE};">Loading exercises…</div>
+          </div>
+        `)
+        .join('');
+    }
+
+    // renderDashboard() draws every group into #muscle-groups-container, so let it
+    // draw this group alone into a hidden container and move the card over
+    function renderGroup(muscle) {
+      const processed = processWorkoutData();
+      const data = { muscleGroups: {} };
+      ALL_MUSCLE_GROUPS.forEach(name => {
+        data.muscleGroups[name] = name === muscle
+          ? processed.muscleGroups[name]
+          : { exercises: [], totalSets: 0, totalWorkouts: 0 };
+      });
+
+      const container = document.getElementById('muscle-groups-container');
+      const scratch = document.createElement('div');
+      scratch.hidden = true;
+      container.id = '';
+      scratch.id = 'muscle-groups-container';
+      document.body.appendChild(scratch);
+      try {
+        renderDashboard(data);
+      } finally {
+        scratch.remove();
+        container.id = 'muscle-groups-container';
+      }
+
+      const cardId = `muscle-${muscle.toLowerCase()}`;
+      const card = scratch.querySelector(`#${cardId}`);
+      container.querySelector(`#${cardId}`).replaceWith(card);
+      const hideInactive = document.getElementById('hide-inactive').checked;
+      card.querySelectorAll('.exercise-row[data-inactive="true"]').forEach(row => {
+        row.style.display = hideInactive ? 'none' : 'grid';
+      });
+    }
+
+    function drillDown(muscle) {
+      return loadGroup(muscle)
+        .then(() => renderGroup(muscle))
+        .catch(error => {
+          const card = document.getElementById(`muscle-${muscle.toLowerCase()}`);
+          card.querySelector('.muscle-group-benchmark').textContent =
+            `Could not load exercises (${error.message})`;
+        });
+    }
+
+    // Load dashboard on page load: overview first, each muscle group's
+    // exercises once its card comes near the viewport
+    window.addEventListener('DOMContentLoaded', function() {
+      renderProgressSummary(overviewData());
+      renderPlaceholders();
+
+      const lazy = ALL_MUSCLE_GROUPS.filter(muscle => DASHBOARD_OVERVIEW.groups[muscle].chunks.length > 0);
+      ALL_MUSCLE_GROUPS.filter(muscle => !lazy.includes(muscle)).forEach(renderGroup);
+      if (!('IntersectionObserver' in window)) {
+        lazy.forEach(drillDown);
+        return;
+      }
+      const observer = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+          if (!entry.isIntersecting) return;
+          observer.unobserve(entry.target);
+          drillDown(entry.target.dataset.muscle);
+        });
+      }, { rootMargin: '400px 0px' });
+      lazy.forEach(muscle => observer.observe(document.getElementById(`muscle-${muscle.toLowerCase()}`)));
+    });"""
+
+
+def chunk_dir_name(output_file):
+    """'site/user.html' -> 'user.chunks', next to the page."""
+    return os.path.splitext(os.path.basename(output_file))[0] + '.chunks'
+
+
+def build_chunks(workout_data, by_year=False):
+    """
+    {muscle: [(file name, gzip bytes)]} for the exercises the dashboard shows.
+
+    Exercises with fewer than 2 weeks are left out, as processWorkoutData()
+    skips them anyway. Each exercise carries its position in the group as
+    "order", since per-year chunks alone lose the order of the rows.
+    """
+    groups = {muscle: {} for muscle in ALL_MUSCLE_GROUPS}
+    for exercise, ex_data in workout_data.items():
+        group = groups.get(ex_data['muscle'])
+        if group is not None and len(ex_data['weeks']) >= 2:
+            group[exercise] = {'muscle': ex_data['muscle'], 'secondary': ex_data['secondary'],
+                               'order': len(group), 'weeks': ex_data['weeks']}
+
+    chunks = {}
+    for muscle, exercises in groups.items():
+        parts = {None: exercises}
+        if by_year:
+            parts = {}
+            for exercise, ex_data in exercises.items():
+                for week, week_data in ex_data['weeks'].items():
+                    part = parts.setdefault(week[:4], {})
+                    entry = part.setdefault(exercise, dict(ex_data, weeks={}))
+                    entry['weeks'][week] = week_data
+
+        files = []
+        for year, part in sorted(parts.items(), key=lambda item: item[0] or ''):
+            if not part:
+                continue
+            encoded = json.dumps(part, separators=(',', ':')).encode('utf-8')
+            # mtime=0 keeps the bytes, and so the file name, stable across renders
+            compressed = gzip.compress(encoded, compresslevel=9, mtime=0)
+            stem = muscle.lower() if year is None else f'{muscle.lower()}-{year}'
+            digest = hashlib.sha256(compressed).hexdigest()[:10]
+            files.append((f'{stem}.{digest}{CHUNK_SUFFIX}', compressed))
+        chunks[muscle] = files
+    return chunks
+
+
+def build_overview(workout_data, chunks, chunk_url):
+    """The inline DASHBOARD_OVERVIEW for a page whose chunk files are under chunk_url."""
+    weeks = [week for ex in workout_data.values() for week in ex['weeks']]
+    end_week = last_week(workout_data)
+    cutoff = None
+    if end_week is not None:
+        cutoff = (date.fromisoformat(end_week) - timedelta(weeks=INACTIVE_WEEKS)).isoformat()
+
+    groups = {muscle: {'exercises': 0, 'totalSets': 0, 'totalWorkouts': 0, 'pct_changes': []}
+              for muscle in ALL_MUSCLE_GROUPS}
+    for ex_data in workout_data.values():
+        group = groups.get(ex_data['muscle'])
+        ex_weeks = sorted(ex_data['weeks'].items())
+        if group is None or len(ex_weeks) < 2:
+            continue
+        group['exercises'] += 1
+        group['totalSets'] += sum(week_data['sets'] for _, week_data in ex_weeks[-RECENT_WEEKS:])
+        group['totalWorkouts'] += len(ex_weeks)
+        if ex_weeks[-1][0] >= cutoff:
+            group['pct_changes'].append(pct_change_per_week([w['max'] for _, w in ex_weeks]))
+
+    overview = {'start': min(weeks, default=None), 'end': end_week, 'groups': {}}
+    for muscle, group in groups.items():
+        pct_changes = group.pop('pct_changes')
+        # Unrounded, so the summary crosses the 0.05%/week threshold where the full page does
+        group['pctChange'] = sum(pct_changes) / len(pct_changes) if pct_changes else None
+        group['chunks'] = [f'{chunk_url}/{name}' for name, _ in chunks[muscle]]
+        overview['groups'][muscle] = group
+    return overview
+
+
+def chunked_slot_values(values, overview):
+    """Replace the data slot of slot_values() output for a CHUNKED_SLOTS template."""
+    return dict(values,
+                data=OVERVIEW_JS.format(overview=script_json(overview, separators=(',', ':'))),
+                boot=LOADER_JS)
+
+
+def write_chunks(chunks, chunk_dir):
+    """
+    Write chunk files that are not there yet and remove ones no longer used.
+
+    Returns the bytes of all chunk files of the page.
+    """
+    os.makedirs(chunk_dir, exist_ok=True)
+    current = {name: compressed for files in chunks.values() for name, compressed in files}
+    for name in os.listdir(chunk_dir):
+        if name.endswith(CHUNK_SUFFIX) and name not in current:
+            os.unlink(os.path.join(chunk_dir, name))
+    for name, compressed in current.items():
+        path = os.path.join(chunk_dir, name)
+        # Names are content hashes: an existing file already has these bytes
+        if os.path.exists(path):
+            continue
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+    return sum(len(compressed) for compressed in current.values())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Compiled HTML template for the archetype / per-user dashboards.
+
+The v6.1 mockup is split once into static chunks and named slots. Each slot
+is defined by the text right before and right after it in the mockup, and
+the mockup content in between is dropped. Rendering is then a single pass
+that writes chunks and slot values in order, so thousands of dashboards can
+be produced without re-scanning the template.
+
+A slot whose delimiters are missing or ambiguous raises ValueError at compile
+time rather than silently leaving the v6.1 text in the output. Slot values are
+written as given: text slots go through html.escape() and data embedded in a
+<script> through script_json() before they reach the template.
+"""
+
+import json
+
+# slot name -> (text before the slot, text after the slot) in the v6.1 mockup
+V61_SLOTS = {
+    'title': ('<title>', '</title>'),
+    'badge': ('<span class="version-badge">', '</span>'),
+    'subtitle': ('<div class="subtitle">', '</div>'),
+    'tagline': ('<div class="tagline">', '</div>'),
+    'footer': ('<footer>\n      ', '\n    </footer>'),
+    'data': ('const WORKOUT_DATA = ', ';\n'),
+}
+
+
+def script_json(value, **kwargs):
+    """
+    json.dumps() for a <script> block: '</' (as in '</script>') and '<!--'
+    would end or alter the script, so they are escaped. The result is
+    still the same value in JavaScript.
+    """
+    return json.dumps(value, **kwargs).replace('</', '<\\/').replace('<!--', '\\u003c!--')
+
+
+class DashboardTemplate:
+    """HTML template parsed into static chunks and named slots."""
+
+    def __init__(self, html, slots=V61_SLOTS):
+        spans = []
+        for name, (before, after) in slots.items():
+            count = html.count(before)
+            if count != 1:
+                problem = 'not found' if count == 0 else f'found {count} times'
+                raise ValueError(f"Template slot '{name}': marker {before!r} {problem}")
+            start = html.index(before) + len(before)
+            end = html.find(after, start)
+            if end < 0:
+                raise ValueError(f"Template slot '{name}': closing marker {after!r} not found")
+            spans.append((start, end, name))
+
+        spans.sort()
+        self.parts = []       # static strings and slot names, alternating
+        self.slot_names = []
+        pos = 0
+        for start, end, name in spans:
+            if start < pos:
+                raise ValueError(f"Template slot '{name}' overlaps another slot")
+            self.parts.append(html[pos:start])
+            self.parts.append(name)
+            self.slot_names.append(name)
+            pos = end
+        self.parts.append(html[pos:])
+
+    @classmethod
+    def from_file(cls, path, slots=V61_SLOTS):
+        with open(path, 'r') as f:
+            return cls(f.read(), slots)
+
+    def _pieces(self, values):
+        missing = [name for name in self.slot_names if name not in values]
+        if missing:
+            raise ValueError(f"No value for template slot(s): {', '.join(missing)}")
+        for i, part in enumerate(self.parts):
+            # Even positions are static chunks, odd positions are slot names
+            yield values[part] if i % 2 else part
+
+    def render(self, values):
+        """Return the filled-in HTML as one string."""
+        return ''.join(self._pieces(values))
+
+    def render_to(self, f, values):
+        """Stream the filled-in HTML to an open text file."""
+        f.writelines(self._pieces(values))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Resolve exercise names from Fitbod exports to EXERCISE_MUSCLE_MAP keys.
+
+Exports spell the same movement several ways ("Dumbbell Incline Bench Press"
+vs "Incline Dumbbell Bench Press", "Pull-Up" vs "Pull Up", "Dips" vs "Dip").
+Names are normalized (case, punctuation, plural 's', token order) and looked
+up in an index built once from the map plus an alias table. Anything still
+unmatched gets one fuzzy pass for typos: an index entry matches only if it has
+the same tokens except for one, and that token is spelled almost the same
+("Barbel" for "Barbell"). Different words ("Decline" vs "Incline", "Adduction"
+vs "Adductor") stay unknown rather than folding one exercise's sets into
+another, and every fuzzy match is printed so it can be turned into an alias.
+Every result,
+including misses, is cached per raw name, so the fuzzy matcher runs once per
+distinct name rather than once per row. The cache keeps the CACHE_SIZE most
+recently used names, so a long-lived process (processing_service.py) fed
+arbitrary uploads does not grow without bound.
+"""
+
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+
+# Minimum difflib ratio between the one differing token of a fuzzy match
+FUZZY_CUTOFF = 0.9
+
+# Distinct raw names cached per resolver; real exports use a few hundred
+CACHE_SIZE = 4096
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize(name):
+    """Case-, punctuation-, plural- and order-insensitive key for an exercise name."""
+    tokens = []
+    for token in _TOKEN_RE.findall(name.lower()):
+        if len(token) > 2 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return ' '.join(sorted(tokens))
+
+
+class ExerciseResolver:
+    """Map raw export names to canonical muscle-map keys, with a per-name LRU cache."""
+
+    def __init__(self, muscle_map, aliases=None, fuzzy_cutoff=FUZZY_CUTOFF, cache_size=CACHE_SIZE):
+        self.muscle_map = muscle_map
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self.index = {}
+        for name in muscle_map:
+            self.index.setdefault(normalize(name), name)
+        for alias, name in (aliases or {}).items():
+            if name not in muscle_map:
+                raise ValueError(f"Alias '{alias}' points at unknown exercise '{name}'")
+            self.index.setdefault(normalize(alias), name)
+        self._token_counts = [(key, Counter(key.split())) for key in self.index]
+        # resolve() is called once per row; lru_cache keeps the hit path in C
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, name):
+        """Canonical EXERCISE_MUSCLE_MAP key for name, or None if unknown."""
+        if name in self.muscle_map:
+            return name
+        key = normalize(name)
+        canonical = self.index.get(key)
+        if canonical is None:
+            match = self._fuzzy_key(key)
+            if match is not None:
+                canonical = self.index[match]
+                print(f"Note: matched '{name}' to '{canonical}' (fuzzy; add an alias if right)")
+        return canonical
+
+    def _fuzzy_key(self, key):
+        """Index key that differs from key by a typo in one token, or None."""
+        tokens = Counter(key.split())
+        best, best_ratio = None, self.fuzzy_cutoff
+        for candidate, candidate_tokens in self._token_counts:
+            extra = tokens - candidate_tokens
+            missing = candidate_tokens - tokens
+            if sum(extra.values()) != 1 or sum(missing.values()) != 1:
+                continue
+            ratio = SequenceMatcher(None, next(iter(extra)), next(iter(missing))).ratio()
+            if ratio >= best_ratio and (best is None or ratio > best_ratio):
+                best, best_ratio = candidate, ratio
+        return best
+
+
+def format_unknown(unknown_counts, limit=20):
+    """One warning line for skipped sets, given {exercise name: set count}."""
+    ranked = sorted(unknown_counts.items(), key=lambda item: (-item[1], item[0]))
+    names = ', '.join(f"'{name}' ({count})" for name, count in ranked[:limit])
+    if len(ranked) > limit:
+        names += f', ... {len(ranked) - limit} more'
+    total = sum(unknown_counts.values())
+    return (f"Warning: skipped {total} sets of {len(ranked)} unknown "
+            f"exercise{'s' if len(ranked) != 1 else ''}: {names}")
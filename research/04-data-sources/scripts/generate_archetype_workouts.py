@@ -1,9 +1,37 @@
 #!/usr/bin/env python3
+"""
+Generate synthetic Fitbod workout CSV exports for the behavioral archetypes.
+
+With no arguments, writes the three archetype exports for 2025 to a scratch
+directory (scripts/generated/). The committed exports in
+05-user-archetypes/data are only replaced when that directory is given with -o,
+and regenerating them reproducibly needs --seed as well. With --users, streams
+a reproducible synthetic workload instead:
+
+    python generate_archetype_workouts.py --users 1000 --seed 42 -o synthetic/
+    python generate_archetype_workouts.py --users 5000 --seed 42 --shards 8 --gzip \
+        --start 2021-01-01 --end 2026-01-01 --mix overwhelmed=1,selfdoubt=2 -o shards/
+    python generate_archetype_workouts.py --benchmark --users 20
+"""
+import argparse
 import csv
-from datetime import datetime, timedelta
+import gzip
+import os
+from datetime import date, datetime, time, timedelta
 import random
 
-def generate_archetype_1_overwhelmed():
+import instrumentation
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scratch output, so a bare run never overwrites the committed exports in
+# 05-user-archetypes/data with unseeded data
+DEFAULT_OUTPUT_DIR = os.path.join(SCRIPT_DIR, 'generated')
+
+# Exports cover [start, END_DATE) unless told otherwise
+END_DATE = datetime(2026, 1, 1)
+
+def iter_archetype_1_overwhelmed(rng=random, start=None, end=END_DATE):
     """
     Archetype 1: Overwhelmed by conflicting information
     - Inconsistent schedule (2-3x/week average)
@@ -12,8 +40,7 @@ def generate_archetype_1_overwhelmed():
     - Notes expressing confusion
     - Gaps when paralyzed by too many options
     """
-    workouts = []
-    start_date = datetime(2025, 1, 1, 18, 30)
+    start_date = datetime.combine(start or date(2025, 1, 1), time(18, 30))
 
     # Different program phases with varying exercises
     programs = [
@@ -61,54 +88,56 @@ def generate_archetype_1_overwhelmed():
     current_date = start_date
     program_idx = 0
 
-    while current_date.year == 2025:
+    while current_date < end:
         program = programs[program_idx % len(programs)]
         weeks_in_program = program["weeks"]
 
         # Inconsistent frequency: 2-3 workouts per week, sometimes gaps
         for week in range(weeks_in_program):
-            workouts_this_week = random.choice([2, 2, 3, 3, 3, 1])  # Weighted toward 2-3
+            workouts_this_week = rng.choice([2, 2, 3, 3, 3, 1])  # Weighted toward 2-3
 
             for _ in range(workouts_this_week):
-                if current_date.year > 2025:
+                if current_date >= end:
                     break
 
                 # Add exercises for this workout
                 for exercise, reps, weight, note in program["exercises"]:
                     # Warmup set
-                    workouts.append({
+                    yield {
                         "Date": current_date.strftime("%Y-%m-%d %I:%M:%S %p +0000"),
                         "Exercise": exercise,
                         "Reps": 8,
                         "Weight(kg)": weight * 0.6,
                         "isWarmup": "true",
                         "Note": note if note else ""
-                    })
+                    }
                     # Working sets (variable 2-3)
-                    num_sets = random.choice([2, 3])
+                    num_sets = rng.choice([2, 3])
                     for s in range(num_sets):
-                        workouts.append({
+                        yield {
                             "Date": current_date.strftime("%Y-%m-%d %I:%M:%S %p +0000"),
                             "Exercise": exercise,
-                            "Reps": reps + random.choice([-1, 0, 1]),
+                            "Reps": reps + rng.choice([-1, 0, 1]),
                             "Weight(kg)": weight + (s * 2.5),
                             "isWarmup": "false",
-                            "Note": random.choice(["", "", "", "Should I do more sets?", "Is this enough?"])
-                        })
+                            "Note": rng.choice(["", "", "", "Should I do more sets?", "Is this enough?"])
+                        }
 
                 # Next workout: 2-4 days later
-                current_date += timedelta(days=random.choice([2, 3, 3, 4]))
+                current_date += timedelta(days=rng.choice([2, 3, 3, 4]))
 
             # Occasional gaps (analysis paralysis)
-            if random.random() < 0.15:  # 15% chance of gap week
+            if rng.random() < 0.15:  # 15% chance of gap week
                 current_date += timedelta(days=7)
 
         program_idx += 1
 
-    return workouts
 
+def generate_archetype_1_overwhelmed():
+    return list(iter_archetype_1_overwhelmed())
 
-def generate_archetype_2_selfdoubt():
+
+def iter_archetype_2_selfdoubt(rng=random, start=None, end=END_DATE):
     """
     Archetype 2: Self-doubt about training sufficiency
     - Very consistent 4x/week (upper/lower split)
@@ -116,8 +145,7 @@ def generate_archetype_2_selfdoubt():
     - Multiple warmup sets
     - Notes expressing uncertainty
     """
-    workouts = []
-    start_date = datetime(2025, 1, 2, 6, 0)  # 6 AM consistent
+    start_date = datetime.combine(start or date(2025, 1, 2), time(6, 0))  # 6 AM consistent
 
     # Upper/Lower split - very consistent
     upper_exercises = [
@@ -150,43 +178,43 @@ def generate_archetype_2_selfdoubt():
     current_date = start_date
     workout_cycle = 0
 
-    while current_date.year == 2025:
+    while current_date < end:
         # 4x per week: U L U L
         workout_types = [upper_exercises, lower_exercises, back_exercises, lower_exercises]
         exercises = workout_types[workout_cycle % 4]
 
         for exercise, base_reps, base_weight in exercises:
             # Multiple warmup sets
-            workouts.append({
+            yield {
                 "Date": current_date.strftime("%Y-%m-%d %I:%M:%S %p +0000"),
                 "Exercise": exercise,
                 "Reps": 12,
                 "Weight(kg)": base_weight * 0.5,
                 "isWarmup": "true",
                 "Note": ""
-            })
-            workouts.append({
+            }
+            yield {
                 "Date": current_date.strftime("%Y-%m-%d %I:%M:%S %p +0000"),
                 "Exercise": exercise,
                 "Reps": 10,
                 "Weight(kg)": base_weight * 0.7,
                 "isWarmup": "true",
                 "Note": ""
-            })
+            }
 
             # Excessive working sets: 5-6 sets
             doubt_notes = ["Should I do one more set?", "Is 5 sets enough?", "Better safe than sorry",
                           "Did I do enough volume?", "Extra set to be sure", ""]
-            num_sets = random.choice([5, 5, 6, 6])
+            num_sets = rng.choice([5, 5, 6, 6])
             for s in range(num_sets):
-                workouts.append({
+                yield {
                     "Date": current_date.strftime("%Y-%m-%d %I:%M:%S %p +0000"),
                     "Exercise": exercise,
                     "Reps": base_reps - s,
                     "Weight(kg)": base_weight + (s * 2.5),
                     "isWarmup": "false",
-                    "Note": random.choice(doubt_notes) if s >= 3 else ""
-                })
+                    "Note": rng.choice(doubt_notes) if s >= 3 else ""
+                }
 
         workout_cycle += 1
 
@@ -196,10 +224,12 @@ def generate_archetype_2_selfdoubt():
         else:
             current_date += timedelta(days=2)
 
-    return workouts
+
+def generate_archetype_2_selfdoubt():
+    return list(iter_archetype_2_selfdoubt())
 
 
-def generate_archetype_3_timeconstrained():
+def iter_archetype_3_timeconstrained(rng=random, start=None, end=END_DATE):
     """
     Archetype 3: Time-constrained efficiency seekers
     - Consistent 3x/week (M/W/F)
@@ -208,8 +238,9 @@ def generate_archetype_3_timeconstrained():
     - 2 sets per exercise
     - Progressive overload
     """
-    workouts = []
-    start_date = datetime(2025, 1, 6, 6, 30)  # Monday
+    start_day = start or date(2025, 1, 6)
+    start_day += timedelta(days=-start_day.weekday() % 7)  # Monday
+    start_date = datetime.combine(start_day, time(6, 30))
 
     # Upper/Lower split alternating
     upper_exercises = [
@@ -237,7 +268,7 @@ def generate_archetype_3_timeconstrained():
     workout_cycle = 0
     week_num = 0
 
-    while current_date.year == 2025:
+    while current_date < end:
         # 3x per week: U L U (week 1), L U L (week 2) alternating
         if week_num % 2 == 0:
             workout_types = [upper_exercises, lower_exercises, back_exercises]
@@ -245,32 +276,32 @@ def generate_archetype_3_timeconstrained():
             workout_types = [lower_exercises, back_exercises, upper_exercises]
 
         for day_in_week in range(3):  # Mon, Wed, Fri
-            if current_date.year > 2025:
+            if current_date >= end:
                 break
 
             exercises = workout_types[day_in_week]
 
             for exercise, base_reps, base_weight in exercises:
                 # Minimal warmup: just one set
-                workouts.append({
+                yield {
                     "Date": current_date.strftime("%Y-%m-%d %I:%M:%S %p +0000"),
                     "Exercise": exercise,
                     "Reps": 10,
                     "Weight(kg)": base_weight * 0.6,
                     "isWarmup": "true",
                     "Note": ""
-                })
+                }
 
                 # Efficient: 2 working sets
                 for s in range(2):
-                    workouts.append({
+                    yield {
                         "Date": current_date.strftime("%Y-%m-%d %I:%M:%S %p +0000"),
                         "Exercise": exercise,
                         "Reps": base_reps,
                         "Weight(kg)": base_weight + (week_num * 1.25),  # Progressive overload
                         "isWarmup": "false",
                         "Note": ""
-                    })
+                    }
 
             # Next workout: 2 days later (M->W->F)
             current_date += timedelta(days=2)
@@ -278,16 +309,46 @@ def generate_archetype_3_timeconstrained():
 
         week_num += 1
 
-    return workouts
 
+def generate_archetype_3_timeconstrained():
+    return list(iter_archetype_3_timeconstrained())
+
+
+FIELDNAMES = ['Date', 'Exercise', 'Reps', 'Weight(kg)', 'Duration(s)', 'Distance(m)',
+              'Incline', 'Resistance', 'isWarmup', 'Note', 'multiplier']
+
+# Rows buffered per writerows() call in write_csv_fast()
+BATCH_SIZE = 10000
+
+# zlib level for .csv.gz output; 9 costs ~2x the time for a few % smaller files
+GZIP_LEVEL = 6
+
+
+def write_csv(filename, workouts, fast=False, compress=False):
+    """
+    Write workouts to CSV file (any iterable, consumed lazily). Returns the row count.
+
+    fast=True (or compress=True) uses write_csv_fast(), which writes the same
+    bytes much faster. While profiling, the time is reported as the
+    generate_and_write stage, since workouts are generated lazily as rows
+    are written.
+    """
+    profiler = instrumentation.get_profiler()
+    with profiler.stage('generate_and_write'):
+        rows = _write_csv(filename, workouts, fast, compress)
+    profiler.count('rows', rows)
+    profiler.count('files')
+    return rows
+
+
+def _write_csv(filename, workouts, fast, compress):
+    if fast or compress:
+        return write_csv_fast(filename, workouts, compress)
 
-def write_csv(filename, workouts):
-    """Write workouts to CSV file"""
     with open(filename, 'w', newline='') as f:
-        fieldnames = ['Date', 'Exercise', 'Reps', 'Weight(kg)', 'Duration(s)', 'Distance(m)',
-                     'Incline', 'Resistance', 'isWarmup', 'Note', 'multiplier']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
         writer.writeheader()
+        rows = 0
 
         for workout in workouts:
             row = {
@@ -304,22 +365,225 @@ def write_csv(filename, workouts):
                 'multiplier': 2.0 if 'Dumbbell' in workout['Exercise'] else 1.0
             }
             writer.writerow(row)
+            rows += 1
 
+    return rows
 
-if __name__ == "__main__":
-    print("Generating Archetype 1 (Overwhelmed)...")
-    workouts_1 = generate_archetype_1_overwhelmed()
-    write_csv('/Users/mirlca/Library/CloudStorage/OneDrive-Teradyne/Documents/Notes/00-inbox/archetype_01_overwhelmed_workout_export.csv', workouts_1)
-    print(f"  Generated {len(workouts_1)} exercise records")
 
-    print("Generating Archetype 2 (Self-doubt)...")
-    workouts_2 = generate_archetype_2_selfdoubt()
-    write_csv('/Users/mirlca/Library/CloudStorage/OneDrive-Teradyne/Documents/Notes/00-inbox/archetype_02_selfdoubt_workout_export.csv', workouts_2)
-    print(f"  Generated {len(workouts_2)} exercise records")
+def write_csv_fast(filename, workouts, compress=False, batch_size=BATCH_SIZE):
+    """
+    High-throughput write_csv(): tuple rows, batched writerows(), optional gzip.
+
+    The constant Duration/Distance/Incline/Resistance columns are written as
+    pre-formatted '0.0' strings, and the Dumbbell multiplier is computed once
+    per exercise name. Output is
+    byte-for-byte what write_csv() writes (gzip-compressed when compress=True).
+    """
+    multipliers = {}
+    rows = 0
+    if compress:
+        f = gzip.open(filename, 'wt', newline='', compresslevel=GZIP_LEVEL)
+    else:
+        f = open(filename, 'w', newline='')
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+
+        batch = []
+        for workout in workouts:
+            exercise = workout['Exercise']
+            multiplier = multipliers.get(exercise)
+            if multiplier is None:
+                multiplier = multipliers[exercise] = '2.0' if 'Dumbbell' in exercise else '1.0'
+            batch.append((workout['Date'], exercise, workout['Reps'], workout['Weight(kg)'],
+                          '0.0', '0.0', '0.0', '0.0', workout['isWarmup'], workout['Note'],
+                          multiplier))
+            if len(batch) >= batch_size:
+                writer.writerows(batch)
+                rows += len(batch)
+                batch.clear()
+
+        writer.writerows(batch)
+        rows += len(batch)
+
+    return rows
+
+
+def benchmark_writers(workouts, runs=3):
+    """Time write_csv() against write_csv_fast() on the same rows; prints rows/s."""
+    import tempfile
+    import timeit
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: os.path.join(tmp, name) for name in ('dict.csv', 'fast.csv', 'fast.csv.gz')}
+        writers = [
+            ('write_csv (DictWriter)', lambda: write_csv(paths['dict.csv'], workouts)),
+            ('write_csv_fast', lambda: write_csv_fast(paths['fast.csv'], workouts)),
+            ('write_csv_fast gzip', lambda: write_csv_fast(paths['fast.csv.gz'], workouts, True)),
+        ]
+        timings = {label: min(timeit.repeat(write, number=1, repeat=runs))
+                   for label, write in writers}
+
+        with open(paths['dict.csv'], 'rb') as a, open(paths['fast.csv'], 'rb') as b:
+            assert a.read() == b.read(), "fast writer output differs from write_csv()"
+        sizes = {label: os.path.getsize(path) for (label, _), path in zip(writers, paths.values())}
+
+    baseline = timings['write_csv (DictWriter)']
+    print(f"{len(workouts):,} rows (best of {runs})")
+    for label, seconds in timings.items():
+        print(f"  {label:<24}{len(workouts) / seconds:>12,.0f} rows/s  "
+              f"{baseline / seconds:5.1f}x  {sizes[label]:>12,} bytes")
+
+
+ARCHETYPE_GENERATORS = {
+    'overwhelmed': iter_archetype_1_overwhelmed,
+    'selfdoubt': iter_archetype_2_selfdoubt,
+    'timeconstrained': iter_archetype_3_timeconstrained,
+}
+
+
+def parse_mix(text):
+    """'overwhelmed=2,selfdoubt=1' -> {'overwhelmed': 2.0, 'selfdoubt': 1.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ARCHETYPE_GENERATORS:
+            raise ValueError(f"Unknown archetype '{name}' (expected one of {', '.join(ARCHETYPE_GENERATORS)})")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+
+def assign_archetypes(seed, users, mix=None):
+    """Archetype name for each user id, drawn reproducibly from the mix weights."""
+    mix = mix or {name: 1.0 for name in ARCHETYPE_GENERATORS}
+    rng = random.Random(f'{seed}:archetypes')
+    names = list(mix)
+    return rng.choices(names, weights=[mix[name] for name in names], k=users)
+
+
+def iter_user_workouts(seed, user_id, archetype, start=None, end=END_DATE):
+    """
+    Lazily yield one synthetic user's workouts.
+
+    Each user has its own Random seeded from (seed, user_id), so a user's
+    rows do not depend on how many other users are generated or in which
+    order. Users start on a random day in their first week.
+    """
+    rng = random.Random(f'{seed}:user:{user_id}')
+    first_day = (start or date(2025, 1, 1)) + timedelta(days=rng.randrange(7))
+    return ARCHETYPE_GENERATORS[archetype](rng, first_day, end)
 
-    print("Generating Archetype 3 (Time-constrained)...")
-    workouts_3 = generate_archetype_3_timeconstrained()
-    write_csv('/Users/mirlca/Library/CloudStorage/OneDrive-Teradyne/Documents/Notes/00-inbox/archetype_03_timeconstrained_workout_export.csv', workouts_3)
-    print(f"  Generated {len(workouts_3)} exercise records")
+
+def iter_synthetic_workouts(seed, users, start=None, end=END_DATE, mix=None):
+    """Yield (user_id, archetype, workout) for N users, one user after another."""
+    for user_id, archetype in enumerate(assign_archetypes(seed, users, mix)):
+        for workout in iter_user_workouts(seed, user_id, archetype, start, end):
+            yield user_id, archetype, workout
+
+
+def write_synthetic_exports(output_dir, seed, users, start=None, end=END_DATE, mix=None,
+                            shards=None, fast=True, compress=False):
+    """
+    Stream a synthetic workload to CSV without holding it in memory.
+
+    By default every user gets their own Fitbod-format export
+    (user_00000_<archetype>.csv), which is what process_archetype_data.py
+    consumes. With shards=K, users are spread round-robin over K files
+    (synthetic_shard_000.csv, ...); each shard is several users' exports
+    concatenated, for raw-throughput testing. compress=True writes .csv.gz.
+
+    Returns the number of rows written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    archetypes = assign_archetypes(seed, users, mix)
+    extension = '.csv.gz' if compress else '.csv'
+    rows = 0
+
+    if not shards:
+        for user_id, archetype in enumerate(archetypes):
+            path = os.path.join(output_dir, f'user_{user_id:05d}_{archetype}{extension}')
+            rows += write_csv(path, iter_user_workouts(seed, user_id, archetype, start, end),
+                              fast, compress)
+        return rows
+
+    for shard in range(shards):
+        def shard_workouts():
+            for user_id in range(shard, users, shards):
+                yield from iter_user_workouts(seed, user_id, archetypes[user_id], start, end)
+
+        path = os.path.join(output_dir, f'synthetic_shard_{shard:03d}{extension}')
+        rows += write_csv(path, shard_workouts(), fast, compress)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic Fitbod workout exports.')
+    parser.add_argument('-o', '--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help='directory for the exports (default: scripts/generated/)')
+    parser.add_argument('--users', type=int,
+                        help='generate a synthetic workload of this many users')
+    parser.add_argument('--seed', help='seed for reproducible output (synthetic default: 0)')
+    parser.add_argument('--start', type=date.fromisoformat, help='first day (YYYY-MM-DD)')
+    parser.add_argument('--end', type=date.fromisoformat, default=END_DATE.date(),
+                        help='day after the last workout (YYYY-MM-DD, default 2026-01-01)')
+    parser.add_argument('--mix', type=parse_mix,
+                        help='archetype weights, e.g. overwhelmed=1,selfdoubt=2,timeconstrained=1')
+    parser.add_argument('--shards', type=int, help='write K shard files instead of one per user')
+    parser.add_argument('--gzip', action='store_true', help='write gzip-compressed .csv.gz files')
+    parser.add_argument('--slow-writer', action='store_true',
+                        help='use the DictWriter path for synthetic output')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='compare CSV writer throughput on the synthetic rows and exit')
+    parser.add_argument('--profile', metavar='REPORT_JSON',
+                        help='write timings, row counts and peak memory to this file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='with --profile, also list top allocation sites (tracemalloc; slow)')
+    args = parser.parse_args(argv)
+
+    end = datetime.combine(args.end, time())
+    if not args.benchmark:
+        os.makedirs(args.output_dir, exist_ok=True)
+    if args.profile:
+        instrumentation.enable(trace_memory=args.trace_memory)
+        generate(args, end)
+        instrumentation.get_profiler().write_report(args.profile, 'generate_archetype_workouts.py')
+        print(f"Profile report written to {args.profile}")
+    else:
+        generate(args, end)
+
+
+def generate(args, end):
+    """Run the generation mode selected by main()'s parsed arguments."""
+    if args.benchmark:
+        seed = args.seed if args.seed is not None else '0'
+        workouts = [w for _, _, w in iter_synthetic_workouts(seed, args.users or 10, args.start,
+                                                             end, args.mix)]
+        benchmark_writers(workouts)
+        return
+
+    if args.users:
+        seed = args.seed if args.seed is not None else '0'
+        print(f"Generating {args.users} synthetic users (seed {seed})...")
+        rows = write_synthetic_exports(args.output_dir, seed, args.users, args.start, end,
+                                       args.mix, args.shards, not args.slow_writer, args.gzip)
+        print(f"  Generated {rows} exercise records")
+        print("\nDone!")
+        return
+
+    for label, name, generator in [
+            ('Archetype 1 (Overwhelmed)', 'archetype_01_overwhelmed', iter_archetype_1_overwhelmed),
+            ('Archetype 2 (Self-doubt)', 'archetype_02_selfdoubt', iter_archetype_2_selfdoubt),
+            ('Archetype 3 (Time-constrained)', 'archetype_03_timeconstrained',
+             iter_archetype_3_timeconstrained)]:
+        print(f"Generating {label}...")
+        rng = random.Random(args.seed) if args.seed is not None else random
+        path = os.path.join(args.output_dir, f'{name}_workout_export.csv')
+        rows = write_csv(path, generator(rng, args.start, end))
+        print(f"  Generated {rows} exercise records")
 
     print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
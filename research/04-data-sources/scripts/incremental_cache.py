@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Incremental re-processing of Fitbod exports.
+
+Users re-upload the same export with a few new workouts appended. The cache
+keeps the unrounded week aggregates for every exercise together with the
+SHA-256 of the export bytes that produced them. When a new upload starts with
+exactly those bytes, only the rows after them are parsed and folded into the
+cached weeks; anything else (edited history, different week start, changed
+EXERCISE_MUSCLE_MAP or EXERCISE_ALIASES) falls back to a full run.
+
+Loads are kept unrounded and summed in file order, so the result is identical
+to process_csv() on the full file. The cached prefix always ends at the last
+'\n': an unterminated last line (an export caught mid-write) is never cached
+and is read again by the next run. It only counts towards the current result
+when it already has every column.
+"""
+
+import csv
+import hashlib
+import json
+import os
+
+from process_archetype_data import (
+    EXERCISE_ALIASES, EXERCISE_MUSCLE_MAP, add_set, finish_week, iter_row_sets, new_week,
+)
+from week_buckets import MONDAY, parse_week_start
+
+CACHE_VERSION = 2
+
+CHUNK_SIZE = 1 << 20
+
+
+def muscle_map_hash():
+    """Fingerprint of the exercise mapping; a changed map or alias table invalidates caches."""
+    encoded = json.dumps([EXERCISE_MUSCLE_MAP, EXERCISE_ALIASES], sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def load_cache(cache_path, week_start):
+    """Return the cache dict, or None if it is missing or was built differently."""
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (cache.get('version') != CACHE_VERSION
+            or cache.get('week_start') != week_start
+            or cache.get('map_hash') != muscle_map_hash()):
+        return None
+    return cache
+
+
+def save_cache(cache_path, cache):
+    """Write the cache atomically so an interrupted run never leaves half a file."""
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, cache_path)
+
+
+def to_output(exercises):
+    """Cached exercise aggregates -> process_csv() output shape."""
+    output = {}
+    for exercise, weeks in exercises.items():
+        muscle_info = EXERCISE_MUSCLE_MAP[exercise]
+        output[exercise] = {
+            'muscle': muscle_info['muscle'],
+            'secondary': muscle_info['secondary'],
+            'weeks': {
+                week: finish_week(week_data)
+                for week, week_data in sorted(weeks.items())
+            }
+        }
+    return output
+
+
+def process_csv_incremental(csv_path, cache_path, week_start=MONDAY):
+    """
+    process_csv() that resumes from a cached prefix of the same export.
+
+    The rows after the cached prefix (all of them on a cold run) are streamed
+    from the file into the week aggregates, so memory is bounded by the
+    aggregates rather than by the export.
+
+    Returns (output, stats). stats has 'cached_bytes' (bytes skipped thanks
+    to the cache, 0 on a full run), 'rows' (data rows in the whole export:
+    the cached prefix's count plus the rows parsed this run), 'new_sets'
+    (working sets parsed this run) and 'last_date' (latest YYYY-MM-DD seen
+    in the export).
+    """
+    if csv_path.endswith('.gz'):
+        raise ValueError("Incremental processing needs an uncompressed export (byte offsets)")
+    week_start = parse_week_start(week_start)
+    cache = load_cache(cache_path, week_start)
+    hasher = hashlib.sha256()
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        hasher.update(header)
+        fieldnames = next(csv.reader([header.decode()]), [])
+
+        resumed = False
+        if cache and os.fstat(f.fileno()).st_size >= cache['prefix_bytes']:
+            # Hash the cached prefix without parsing it
+            remaining = cache['prefix_bytes'] - len(header)
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+            resumed = remaining == 0 and hasher.hexdigest() == cache['prefix_sha256']
+
+        if resumed:
+            exercises = cache['exercises']
+            tail = {'rows': cache['prefix_rows'], 'last_date': cache['last_date']}
+            cached_bytes = cache['prefix_bytes']
+        else:
+            f.seek(len(header))
+            hasher = hashlib.sha256(header)
+            exercises = {}
+            tail = {'rows': 0, 'last_date': ''}
+            cached_bytes = 0
+
+        partial = []
+
+        def lines():
+            # '\n' never occurs inside a multi-byte UTF-8 sequence, so lines decode alone
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Unterminated (maybe still being written): parse it, but don't cache it
+                    partial.append(line)
+                    return
+                hasher.update(line)
+                yield line.decode()
+
+        def rows(source):
+            for row in csv.DictReader(source, fieldnames=fieldnames):
+                tail['rows'] += 1
+                if row['Date'][:10] > tail['last_date']:
+                    tail['last_date'] = row['Date'][:10]
+                yield row
+
+        def fold(exercises, source):
+            sets = 0
+            for exercise, week, weight, reps, multiplier in iter_row_sets(rows(source), week_start):
+                week_data = exercises.setdefault(exercise, {}).setdefault(week, new_week())
+                add_set(week_data, weight, reps, multiplier)
+                sets += 1
+            return sets
+
+        new_sets = fold(exercises, lines())
+        total_bytes = f.tell() - sum(map(len, partial))
+
+    save_cache(cache_path, {
+        'version': CACHE_VERSION,
+        'week_start': week_start,
+        'map_hash': muscle_map_hash(),
+        'prefix_bytes': total_bytes,
+        'prefix_rows': tail['rows'],
+        'prefix_sha256': hasher.hexdigest(),
+        'last_date': tail['last_date'],
+        'exercises': exercises,
+    })
+
+    # An unterminated last line counts now only if it already has every column
+    last = [line.decode(errors='replace') for line in partial]
+    if last and len(next(csv.reader(last), [])) == len(fieldnames):
+        exercises = json.loads(json.dumps(exercises))
+        new_sets += fold(exercises, last)
+
+    stats = {'cached_bytes': cached_bytes, 'rows': tail['rows'], 'new_sets': new_sets,
+             'last_date': tail['last_date']}
+    return to_output(exercises), stats
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Opt-in timing and memory instrumentation for the archetype scripts.
+
+Code asks for the active profiler with get_profiler() and wraps work in
+profiler.stage('name'). Until enable() is called the active profiler is a
+disabled one whose stage() and count() do nothing, so the scripts pay almost
+nothing when profiling is off. Hot per-row loops check profiler.enabled and
+only then take the timed path.
+
+Pool workers profile each job under profiling() and send snapshot() back with
+the job result; the parent merge()s them into its own report. With
+trace_memory, a worker job traces its own allocations and its snapshot
+carries its top allocation sites, which the parent adds to its own.
+
+Stage names used across the pipeline: csv_parse, warmup_filter,
+week_bucketing, aggregation, json_serialization, html_templating, file_write.
+
+A report is a plain dict (and JSON file) with per-stage seconds and call
+counts, counters such as rows, rows/s, peak RSS and, when tracemalloc is on,
+the top allocation sites:
+
+    {"script": ..., "started": ..., "wall_seconds": ..., "rows_per_second": ...,
+     "stages": {"csv_parse": {"seconds": ..., "calls": ...}, ...},
+     "counters": {"rows": ..., ...}, "peak_rss_kb": ..., "tracemalloc_top": [...]}
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Allocation sites listed in a report when tracemalloc is on
+TRACEMALLOC_TOP = 10
+
+# Process that started tracemalloc; a forked pool worker inherits the
+# parent's tracing and its traces, which are not the worker's own
+_tracing_pid = None
+
+
+def _start_tracing():
+    """(Re)start tracemalloc with no traces, owned by this process."""
+    global _tracing_pid
+    tracemalloc.stop()
+    tracemalloc.start()
+    _tracing_pid = os.getpid()
+
+
+def _stop_tracing():
+    global _tracing_pid
+    tracemalloc.stop()
+    _tracing_pid = None
+
+
+class Profiler:
+    """Accumulates per-stage timings and counters for one run."""
+
+    def __init__(self, enabled=True, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.stages = defaultdict(lambda: {'seconds': 0.0, 'calls': 0})
+        self.counters = defaultdict(int)
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        # Only the profiler that started tracemalloc reports its sites; a job
+        # profiled inside an already traced process is covered by that one
+        self.owns_tracing = False
+        self.memory = None
+        self.merged_sites = defaultdict(lambda: {'size_kb': 0.0, 'count': 0})
+        self.merged_peak_kb = 0
+        if self.trace_memory and (not tracemalloc.is_tracing() or _tracing_pid != os.getpid()):
+            _start_tracing()
+            self.owns_tracing = True
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds, calls=1):
+        """Record time measured by the caller (for per-row stages timed inline)."""
+        stage = self.stages[name]
+        stage['seconds'] += seconds
+        stage['calls'] += calls
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def _traced_memory(self):
+        """(peak KB, top sites) while this profiler owns tracemalloc, else None."""
+        if self.memory is not None:
+            return self.memory
+        if not (self.owns_tracing and tracemalloc.is_tracing()):
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        sites = [{'site': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1),
+                  'count': stat.count}
+                 for stat in tracemalloc.take_snapshot().statistics('lineno')[:TRACEMALLOC_TOP]]
+        return peak // 1024, sites
+
+    def stop(self):
+        """Keep the traced memory figures and stop tracemalloc if this profiler started it."""
+        if self.memory is None and self.owns_tracing:
+            self.memory = self._traced_memory()
+            _stop_tracing()
+
+    def snapshot(self):
+        """Stages, counters and traced memory, for shipping back from a pool worker."""
+        snapshot = {'stages': dict(self.stages), 'counters': dict(self.counters)}
+        memory = self._traced_memory()
+        if memory:
+            snapshot['tracemalloc_peak_kb'], snapshot['tracemalloc_top'] = memory
+        return snapshot
+
+    def merge(self, snapshot):
+        """Fold a worker's snapshot() into this profiler."""
+        for name, stage in snapshot['stages'].items():
+            self.add_time(name, stage['seconds'], stage['calls'])
+        for name, n in snapshot['counters'].items():
+            self.counters[name] += n
+        self.merged_peak_kb = max(self.merged_peak_kb, snapshot.get('tracemalloc_peak_kb', 0))
+        for site in snapshot.get('tracemalloc_top', []):
+            merged = self.merged_sites[site['site']]
+            merged['size_kb'] += site['size_kb']
+            merged['count'] += site['count']
+
+    def report(self, script=None):
+        wall = time.perf_counter() - self.started
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        # ru_maxrss is KB on Linux, bytes on macOS
+        scale = 1024 if sys.platform == 'darwin' else 1
+        report = {
+            'script': script or sys.argv[0],
+            'argv': sys.argv[1:],
+            'started': self.started_at,
+            'python': sys.version.split()[0],
+            'wall_seconds': round(wall, 6),
+            'rows_per_second': round(self.counters.get('rows', 0) / wall, 1) if wall else 0.0,
+            'stages': {name: {'seconds': round(stage['seconds'], 6), 'calls': stage['calls']}
+                       for name, stage in sorted(self.stages.items())},
+            'counters': dict(sorted(self.counters.items())),
+            'peak_rss_kb': own // scale,
+            'peak_rss_children_kb': children // scale,
+        }
+        memory = self._traced_memory()
+        if memory or self.merged_sites:
+            # Worker jobs' sites are summed per site; the peak is the largest
+            # of this process and any single job
+            peak_kb, sites = memory or (0, [])
+            combined = defaultdict(lambda: {'size_kb': 0.0, 'count': 0})
+            for name, site in [(site['site'], site) for site in sites] + list(self.merged_sites.items()):
+                combined[name]['size_kb'] += site['size_kb']
+                combined[name]['count'] += site['count']
+            report['tracemalloc_peak_kb'] = max(peak_kb, self.merged_peak_kb)
+            report['tracemalloc_top'] = [
+                {'site': name, 'size_kb': round(site['size_kb'], 1), 'count': site['count']}
+                for name, site in sorted(combined.items(), key=lambda item: -item[1]['size_kb'])
+            ][:TRACEMALLOC_TOP]
+        return report
+
+    def write_report(self, path, script=None):
+        report = self.report(script)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+_DISABLED = Profiler(enabled=False)
+_active = _DISABLED
+
+
+def get_profiler():
+    """The active profiler (a disabled no-op one unless enable() was called)."""
+    return _active
+
+
+def enable(trace_memory=False):
+    """Start a fresh profiler and make it the active one."""
+    global _active
+    _active = Profiler(trace_memory=trace_memory)
+    return _active
+
+
+def disable():
+    global _active
+    _active = _DISABLED
+
+
+@contextmanager
+def profiling(trace_memory=False):
+    """Run a block under a fresh active profiler, then restore the previous one."""
+    global _active
+    previous = _active
+    profiler = _active = Profiler(trace_memory=trace_memory)
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        _active = previous
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Muscle-group rollups of process_csv() output.
+
+The v6.1 dashboard folds every exercise into the 9 muscle groups in the
+browser on each page load. build_rollups() does that work once in Python
+and writes it next to the data file as *_muscle_rollups.json:
+
+    {
+      "version": 1,
+      "endWeek": "2025-12-29",
+      "muscleGroups": {
+        "Chest": {
+          "status": "progressing",     # progressing | plateau | declining | not trained
+          "pctChange": 1.23,           # max weight regression, % per week
+          "totalSets": 41,             # last 12 weeks of each exercise, as the dashboard counts
+          "totalWorkouts": 38,
+          "exercises": ["Barbell Bench Press", ...],
+          "weeks": {
+            "2025-01-06": {"sets": 8, "secondarySets": 4, "load": 560.0, "e1rm": 66.7},
+            ...
+          }
+        },
+        ...
+      }
+    }
+
+Status, pctChange, totalSets and totalWorkouts follow the dashboard's
+processWorkoutData()/calculateProgressMetrics(): exercises need 2+ weeks,
+exercises not done in the 10 weeks before the last week in the data are
+inactive, and a change under 0.05%/week counts as holding steady.
+
+Per-week "sets" and "load" come from exercises whose primary muscle is the
+group; "secondarySets" credits the sets of exercises that list the group as
+a secondary muscle. "e1rm" is the best Epley estimate, max * (1 + maxReps/30),
+over the group's primary exercises that week. The week aggregate does not
+keep which set had which reps, so this is an upper estimate.
+
+The WORKOUT_DATA file itself is unchanged.
+
+Usage:
+    python muscle_rollups.py archetype_01_x_data.json [...]   # writes *_muscle_rollups.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+ROLLUPS_VERSION = 1
+
+# Same order as the dashboard's ALL_MUSCLE_GROUPS
+ALL_MUSCLE_GROUPS = [
+    'Chest',
+    'Back',
+    'Shoulders',
+    'Biceps',
+    'Triceps',
+    'Quadriceps',
+    'Hamstrings',
+    'Glutes',
+    'Calves',
+]
+
+# Weeks counted in totalSets, and weeks without training before an exercise is inactive
+RECENT_WEEKS = 12
+INACTIVE_WEEKS = 10
+
+# |% per week| below this is "plateau" (the dashboard's "Holding steady")
+STEADY_PCT = 0.05
+
+
+def epley(weight, reps):
+    """Estimated one-rep max (Epley); 0 for bodyweight sets."""
+    if not weight or not reps:
+        return 0.0
+    return weight * (1 + reps / 30)
+
+
+def regression_slope(values):
+    """Least-squares slope of values against 0, 1, 2, ...; 0 for fewer than 2 points."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    sum_x = n * (n - 1) / 2
+    sum_x2 = (n - 1) * n * (2 * n - 1) / 6
+    sum_y = sum(values)
+    sum_xy = sum(x * y for x, y in enumerate(values))
+    return (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
+
+
+def pct_change_per_week(maxes):
+    """Max weight trend as % of the mean per week, as the dashboard computes it."""
+    mean = sum(maxes) / len(maxes) if maxes else 0
+    return regression_slope(maxes) / mean * 100 if mean > 0 else 0.0
+
+
+def trend_status(pct_change):
+    if pct_change is None:
+        return 'not trained'
+    if abs(pct_change) < STEADY_PCT:
+        return 'plateau'
+    return 'progressing' if pct_change > 0 else 'declining'
+
+
+def last_week(data):
+    """Latest week start across all exercises (the dashboard's YEAR_END), or None."""
+    return max((max(ex['weeks']) for ex in data.values() if ex['weeks']), default=None)
+
+
+def build_rollups(data):
+    """Muscle-group x week rollups for process_csv() output (see module docstring)."""
+    end_week = last_week(data)
+    cutoff = None
+    if end_week is not None:
+        cutoff = (date.fromisoformat(end_week) - timedelta(weeks=INACTIVE_WEEKS)).isoformat()
+
+    groups = {muscle: {'exercises': [], 'totalSets': 0, 'totalWorkouts': 0,
+                       'pct_changes': [], 'weeks': {}}
+              for muscle in ALL_MUSCLE_GROUPS}
+
+    def week_entry(muscle, week):
+        group = groups.setdefault(muscle, {'exercises': [], 'totalSets': 0, 'totalWorkouts': 0,
+                                           'pct_changes': [], 'weeks': {}})
+        entry = group['weeks'].get(week)
+        if entry is None:
+            entry = group['weeks'][week] = {'sets': 0, 'secondarySets': 0, 'load': 0.0, 'e1rm': 0.0}
+        return entry
+
+    for exercise, ex_data in data.items():
+        muscle = ex_data['muscle']
+        weeks = sorted(ex_data['weeks'].items())
+        for week, week_data in weeks:
+            entry = week_entry(muscle, week)
+            entry['sets'] += week_data['sets']
+            entry['load'] += week_data['load']
+            entry['e1rm'] = max(entry['e1rm'], epley(week_data['max'], week_data['maxReps']))
+            for secondary in ex_data['secondary']:
+                week_entry(secondary, week)['secondarySets'] += week_data['sets']
+
+        # Summary figures only count exercises the dashboard shows
+        if len(weeks) < 2:
+            continue
+        group = groups[muscle]
+        group['exercises'].append(exercise)
+        group['totalSets'] += sum(week_data['sets'] for _, week_data in weeks[-RECENT_WEEKS:])
+        group['totalWorkouts'] += len(weeks)
+        if weeks[-1][0] >= cutoff:
+            group['pct_changes'].append(pct_change_per_week([w['max'] for _, w in weeks]))
+
+    muscle_groups = {}
+    for muscle, group in groups.items():
+        pct_changes = group['pct_changes']
+        pct_change = sum(pct_changes) / len(pct_changes) if pct_changes else None
+        muscle_groups[muscle] = {
+            'status': trend_status(pct_change),
+            'pctChange': round(pct_change, 3) if pct_change is not None else None,
+            'totalSets': group['totalSets'],
+            'totalWorkouts': group['totalWorkouts'],
+            'exercises': group['exercises'],
+            'weeks': {
+                week: dict(entry, load=round(entry['load'], 1), e1rm=round(entry['e1rm'], 1))
+                for week, entry in sorted(group['weeks'].items())
+            },
+        }
+
+    return {'version': ROLLUPS_VERSION, 'endWeek': end_week, 'muscleGroups': muscle_groups}
+
+
+def rollups_path(json_path):
+    """archetype_01_x_data.json -> archetype_01_x_muscle_rollups.json"""
+    stem = os.path.splitext(json_path)[0]
+    if stem.endswith('_data'):
+        stem = stem[:-len('_data')]
+    return stem + '_muscle_rollups.json'
+
+
+def write_rollups(data, json_path):
+    """Write build_rollups(data) next to json_path; returns (path, rollups)."""
+    rollups = build_rollups(data)
+    path = rollups_path(json_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(rollups, f, indent=2)
+    os.replace(tmp_path, path)
+    return path, rollups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write muscle-group rollups next to dashboard JSON files.')
+    parser.add_argument('inputs', nargs='+', help='process_archetype_data.py JSON outputs')
+    args = parser.parse_args(argv)
+
+    for json_path in args.inputs:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        path, rollups = write_rollups(data, json_path)
+        summary = ', '.join(f"{muscle} {group['status']}"
+                            for muscle, group in rollups['muscleGroups'].items())
+        print(f"✓ {os.path.basename(path)}: {summary}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
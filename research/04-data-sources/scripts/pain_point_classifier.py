@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Tag comments and transcript segments of the research corpus with pain points.
+
+The pain-point queries of corpus_index.PAIN_POINTS are compiled once into an
+Aho-Corasick automaton over normalized text (tokenize() output joined by
+single spaces, with a space at each end). Whole terms and phrases become
+' term ' patterns, and prefix* terms become word-start patterns (' prefix'),
+so one pass over a text finds every tag it contains, however many patterns
+there are.
+
+Each corpus file is classified in its own worker process. Comments are one
+segment each; transcripts are cleaned (transcript_cleaner) and split into
+sentences of at most SEGMENT_WORDS words. Comments are de-duplicated across
+files by corpus_index.comment_key(), transcripts by video_id, and comments-only
+files are matched to their video by title.
+
+The output keeps each file's results under its SHA-256, so a re-run only
+classifies new or changed files (or everything, if PAIN_POINTS changed) and
+the per-video counts and percentages are recomputed from the stored results:
+
+    {
+      "videos": {video_id: {"title", "comments", "segments",
+                            "comment_tags": {tag: comments},
+                            "segment_tags": {tag: segments}}},
+      "summary": {tag: {"videos", "video_share", "comments", "comment_share",
+                        "transcript_videos"}},
+      "sources": {...}
+    }
+
+video_share is the share of videos with at least one tagged comment, the
+same measure as `corpus_index.py tags`.
+
+Usage:
+    python pain_point_classifier.py                    # all of raw/ -> pain_point_tags.json
+    python pain_point_classifier.py FILE ... [-o OUT] [-w WORKERS] [--manifest MANIFEST]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_index import PAIN_POINTS, comment_key, file_hash, manifest_files, tokenize
+from corpus_loader import RAW_DIR, corpus_files, iter_array, normalize_comments, read_header
+from transcript_cleaner import clean_transcript, sentences
+
+CLASSIFIER_VERSION = 1
+
+OUTPUT_PATH = os.path.join(RAW_DIR, '..', 'pain_point_tags.json')
+
+# Transcript sentences are cut into segments of at most this many words
+# (auto-captions often have no punctuation at all)
+SEGMENT_WORDS = 40
+
+
+def normalize(text):
+    """' term term ... ' for matching; every term is bounded by spaces."""
+    return ' ' + ' '.join(tokenize(text)) + ' '
+
+
+def query_pattern(query):
+    """'confus*' -> ' confus', '"too many"' -> ' too many ', 'busy' -> ' busy '"""
+    query = query.strip().strip('"')
+    prefix = query.endswith('*')
+    terms = tokenize(query)
+    return ' ' + ' '.join(terms) + ('' if prefix else ' ')
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton mapping patterns to labels; find() returns the labels present."""
+
+    def __init__(self, patterns):
+        """patterns: iterable of (pattern text, label)."""
+        patterns = list(patterns)
+        goto = [{}]
+        outputs = [set()]
+        for text, label in patterns:
+            state = 0
+            for ch in text:
+                if ch not in goto[state]:
+                    goto[state][ch] = len(goto)
+                    goto.append({})
+                    outputs.append(set())
+                state = goto[state][ch]
+            outputs[state].add(label)
+
+        # Breadth-first fail links; each state's transitions are completed
+        # from its fail state, so matching never follows fail links
+        fail = [0] * len(goto)
+        delta = [dict(goto[0])]
+        delta.extend({} for _ in range(len(goto) - 1))
+        queue = list(goto[0].values())
+        for state in queue:
+            outputs[state] |= outputs[fail[state]]
+            transitions = dict(delta[fail[state]])
+            for ch, child in goto[state].items():
+                fail[child] = transitions.get(ch, 0)
+                transitions[ch] = child
+                queue.append(child)
+            delta[state] = transitions
+        self.delta = delta
+        self.outputs = [frozenset(labels) for labels in outputs]
+
+    def find(self, text):
+        """Set of labels whose patterns occur in text (already normalized)."""
+        delta, outputs = self.delta, self.outputs
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+
+def build_matcher(tags=PAIN_POINTS):
+    return PatternMatcher([(query_pattern(query), tag)
+                           for tag, queries in tags.items() for query in queries])
+
+
+def tags_hash(tags=PAIN_POINTS):
+    """Fingerprint of the tag queries; changed queries invalidate stored results."""
+    encoded = json.dumps([CLASSIFIER_VERSION, tags], sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def segments(transcript):
+    """Cleaned transcript as sentence segments of at most SEGMENT_WORDS words."""
+    result = []
+    for sentence in sentences(clean_transcript(transcript)):
+        words = sentence.split()
+        for start in range(0, len(words), SEGMENT_WORDS):
+            result.append(' '.join(words[start:start + SEGMENT_WORDS]))
+    return result
+
+
+_matcher = None
+
+
+def classify_file(path):
+    """
+    Pool worker: tag every comment and transcript segment of one corpus file.
+
+    Returns {'titles': {video_id: title}, 'comments': [[key, video_id,
+    video_title, tags]], 'transcripts': {video_id: {'segments', 'tags'}}}.
+    """
+    global _matcher
+    if _matcher is None:
+        # Built once per worker process
+        _matcher = build_matcher()
+    find = _matcher.find
+
+    result = {'titles': {}, 'comments': [], 'transcripts': {}}
+    if 'total_comments' in read_header(path):
+        for comment in iter_array(path, 'comments'):
+            result['comments'].append([comment_key(comment), None, comment.get('video_title'),
+                                       sorted(find(normalize(comment.get('text', ''))))])
+        return result
+
+    for video in iter_array(path, 'videos', fields=['video_id', 'title', 'transcript', 'comments']):
+        video_id = video['video_id']
+        result['titles'][video_id] = video.get('title', '')
+        if video.get('transcript'):
+            counts = defaultdict(int)
+            parts = segments(video['transcript'])
+            for part in parts:
+                for tag in find(normalize(part)):
+                    counts[tag] += 1
+            result['transcripts'][video_id] = {'segments': len(parts), 'tags': dict(counts)}
+        for comment in normalize_comments(video.get('comments')):
+            result['comments'].append([comment_key(comment), video_id, None,
+                                       sorted(find(normalize(comment.get('text', ''))))])
+    return result
+
+
+def summarize(sources, tags=PAIN_POINTS):
+    """Per-video counts and per-tag percentages from the stored per-file results."""
+    titles = {}
+    for source in sources.values():
+        for video_id, title in source['result']['titles'].items():
+            titles.setdefault(video_id, title)
+    by_title = {title: video_id for video_id, title in titles.items()}
+
+    def new_video(video_id):
+        return {'title': titles.get(video_id, ''), 'comments': 0, 'segments': 0,
+                'comment_tags': {tag: 0 for tag in tags}, 'segment_tags': {tag: 0 for tag in tags}}
+
+    videos = {video_id: new_video(video_id) for video_id in titles}
+    seen_comments = set()
+    seen_transcripts = set()
+    unmatched = 0
+    for source in sources.values():
+        result = source['result']
+        for video_id, transcript in result['transcripts'].items():
+            if video_id in seen_transcripts:
+                continue
+            seen_transcripts.add(video_id)
+            video = videos[video_id]
+            video['segments'] = transcript['segments']
+            for tag, count in transcript['tags'].items():
+                video['segment_tags'][tag] = count
+        for key, video_id, video_title, comment_tags in result['comments']:
+            if key in seen_comments:
+                continue
+            seen_comments.add(key)
+            video_id = video_id or by_title.get(video_title)
+            if video_id is None:
+                unmatched += 1
+                continue
+            video = videos[video_id]
+            video['comments'] += 1
+            for tag in comment_tags:
+                video['comment_tags'][tag] += 1
+
+    total_videos = len(videos) or 1
+    total_comments = sum(video['comments'] for video in videos.values()) or 1
+    summary = {}
+    for tag in tags:
+        tagged = [video for video in videos.values() if video['comment_tags'][tag]]
+        comments = sum(video['comment_tags'][tag] for video in videos.values())
+        summary[tag] = {
+            'videos': len(tagged),
+            'video_share': round(len(tagged) / total_videos, 3),
+            'comments': comments,
+            'comment_share': round(comments / total_comments, 3),
+            'transcript_videos': sum(1 for video in videos.values() if video['segment_tags'][tag]),
+        }
+    return videos, summary, unmatched
+
+
+def load_output(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tag corpus comments and transcripts with pain points.')
+    parser.add_argument('files', nargs='*', help='corpus files (default: everything in raw/)')
+    parser.add_argument('-o', '--output', default=OUTPUT_PATH)
+    parser.add_argument('--manifest', help='also classify the batches of this manifest')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='re-classify unchanged files too')
+    args = parser.parse_args(argv)
+
+    paths = list(args.files) or ([] if args.manifest else corpus_files())
+    if args.manifest:
+        paths += manifest_files(args.manifest)
+    paths = list(dict.fromkeys(os.path.abspath(p) for p in paths))
+
+    base_dir = os.path.dirname(os.path.abspath(args.output))
+    previous = load_output(args.output)
+    fingerprint = tags_hash()
+    stored = previous.get('sources', {}) if previous.get('tags_hash') == fingerprint else {}
+
+    started = time.perf_counter()
+    sources = {}
+    pending = {}
+    for path in paths:
+        source = os.path.relpath(path, base_dir)
+        digest = file_hash(path)
+        if not args.force and stored.get(source, {}).get('sha256') == digest:
+            sources[source] = stored[source]
+        else:
+            sources[source] = {'sha256': digest, 'result': None}
+            pending[source] = path
+
+    workers = max(1, min(args.workers, len(pending)))
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for source, result in zip(pending, pool.map(classify_file, pending.values())):
+                sources[source]['result'] = result
+    for source in sources:
+        label = os.path.basename(source)
+        if source in pending:
+            result = sources[source]['result']
+            print(f"  ✓ {label}: {len(result['comments'])} comments, "
+                  f"{len(result['transcripts'])} transcripts classified")
+        else:
+            print(f"  - {label}: unchanged, reused")
+
+    videos, summary, unmatched = summarize(sources)
+    elapsed = time.perf_counter() - started
+
+    output = {
+        'version': CLASSIFIER_VERSION,
+        'tags_hash': fingerprint,
+        'videos': videos,
+        'summary': summary,
+        'sources': sources,
+    }
+    tmp_path = args.output + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(output, f, separators=(',', ':'))
+    os.replace(tmp_path, args.output)
+
+    total_comments = sum(video['comments'] for video in videos.values())
+    print(f"\nClassified {len(pending)} of {len(sources)} file(s) with {workers} worker(s) "
+          f"in {elapsed * 1000:.0f} ms: {len(videos)} videos, {total_comments} unique comments"
+          + (f" ({unmatched} unmatched)" if unmatched else ''))
+    for tag, counts in sorted(summary.items(), key=lambda item: -item[1]['video_share']):
+        print(f"  {tag:<22}{counts['videos']:>3}/{len(videos)} videos ({counts['video_share']:.0%}), "
+              f"{counts['comments']} comments ({counts['comment_share']:.1%}), "
+              f"in {counts['transcript_videos']} transcripts")
+    print(f"✓ Wrote {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,12 +2,38 @@
 """
 Process Fitbod workout CSV exports into dashboard JavaScript data format.
 Creates workout data for different behavioral archetypes.
+
+Usage:
+    python process_archetype_data.py ../../05-user-archetypes/data/
+    python process_archetype_data.py 'exports/*.csv' -o out/ --workers 8
+    python process_archetype_data.py export.csv --engine columnar
 """
 
+import argparse
 import csv
+import glob
+import gzip
 import json
-from datetime import datetime, timedelta
+import os
+import sys
+import tempfile
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import compact_format
+import instrumentation
+import muscle_rollups
+import session_index
+import trend_stats
+import weekly_store
+from exercise_resolver import ExerciseResolver, format_unknown
+from week_buckets import MONDAY, WEEK_STARTS, get_week_start, parse_week_start
+
+try:
+    import numpy as np
+except ImportError:  # numpy only needed for the columnar engine
+    np = None
 
 # Exercise to muscle group mapping
 EXERCISE_MUSCLE_MAP = {
@@ -70,115 +96,784 @@ EXERCISE_MUSCLE_MAP = {
     'Dip': {'muscle': 'Triceps', 'secondary': ['Chest']},
 }
 
-def get_week_start(date_str):
-    """Convert date string to Monday of that week in YYYY-MM-DD format."""
-    dt = datetime.strptime(date_str.split()[0], '%Y-%m-%d')
-    # Get Monday of the week
-    monday = dt - timedelta(days=dt.weekday())
-    return monday.strftime('%Y-%m-%d')
+# Other names Fitbod and users give mapped exercises. Case, punctuation,
+# plurals and word order are normalized by ExerciseResolver, so only genuinely
+# different wording needs an entry here.
+EXERCISE_ALIASES = {
+    'Back Squat': 'Barbell Back Squat',
+    'Front Squat': 'Barbell Front Squat',
+    'Deadlift': 'Barbell Deadlift',
+    'Conventional Deadlift': 'Barbell Deadlift',
+    'RDL': 'Romanian Deadlift',
+    'Bench Press': 'Barbell Bench Press',
+    'Incline Bench Press': 'Barbell Incline Bench Press',
+    'Barbell Row': 'Bent Over Barbell Row',
+    'Cable Row': 'Seated Cable Row',
+    'Pullup': 'Pull Up',
+    'Overhead Press': 'Barbell Shoulder Press',
+    'Military Press': 'Barbell Shoulder Press',
+    'Lateral Raise': 'Dumbbell Lateral Raise',
+    'Triceps Pushdown': 'Cable Triceps Pushdown',
+    'Rope Pushdown': 'Cable Triceps Pushdown',
+    'Lying Leg Curl': 'Leg Curl',
+    'Seated Leg Curl': 'Leg Curl',
+    'Calf Raise': 'Standing Calf Raise',
+}
 
-def process_csv(csv_path):
-    """Process CSV file into workout data structure."""
-    workout_data = defaultdict(lambda: {
-        'muscle': '',
-        'secondary': [],
-        'weeks': defaultdict(lambda: {
-            'max': 0,
-            'sets': 0,
-            'maxReps': 0,
-            'load': 0
-        })
-    })
+EXERCISE_RESOLVER = ExerciseResolver(EXERCISE_MUSCLE_MAP, EXERCISE_ALIASES)
+
+def open_export(csv_path, mode='r'):
+    """Open a CSV export, transparently decompressing .csv.gz files."""
+    if csv_path.endswith('.gz'):
+        return gzip.open(csv_path, mode if 'b' in mode else mode + 't')
+    return open(csv_path, mode)
+
+def iter_sets(csv_path, week_start=MONDAY):
+    """Yield (exercise, week_start, weight, reps, multiplier) for each working set."""
+    with open_export(csv_path) as f:
+        yield from iter_row_sets(csv.DictReader(f), week_start)
+
+def iter_row_sets(rows, week_start=MONDAY):
+    """
+    iter_sets() over already-parsed CSV rows (dicts keyed by column name).
+
+    Exercise names are resolved to EXERCISE_MUSCLE_MAP keys by
+    EXERCISE_RESOLVER. Sets of unresolved exercises are skipped and reported
+    in one warning line once the rows are exhausted.
+    """
+    week_start = parse_week_start(week_start)
+    profiler = instrumentation.get_profiler()
+    if profiler.enabled:
+        yield from _iter_row_sets_profiled(rows, week_start, profiler)
+        return
 
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Skip warmup sets
+    resolve = EXERCISE_RESOLVER.resolve
+    unknown = defaultdict(int)
+    for row in rows:
+        # Skip warmup sets
+        if row['isWarmup'].lower() == 'true':
+            continue
+
+        exercise = row['Exercise'].strip()
+        weight = float(row['Weight(kg)'])
+        reps = int(row['Reps'])
+        multiplier = float(row['multiplier'])
+
+        # Get week start date
+        week = get_week_start(row['Date'], week_start)
+
+        # Get muscle mapping
+        canonical = resolve(exercise)
+        if canonical is None:
+            unknown[exercise] += 1
+            continue
+
+        yield canonical, week, weight, reps, multiplier
+
+    if unknown:
+        print(format_unknown(unknown))
+
+def iter_session_sets(csv_path):
+    """
+    Yield (timestamp, exercise, muscle, weight, reps, multiplier) for each
+    working set, the input of session_index.build_index(). Unknown exercises
+    are skipped silently; the aggregation pass already reported them.
+    """
+    resolve = EXERCISE_RESOLVER.resolve
+    with open_export(csv_path) as f:
+        for row in csv.DictReader(f):
             if row['isWarmup'].lower() == 'true':
                 continue
+            canonical = resolve(row['Exercise'].strip())
+            if canonical is None:
+                continue
+            yield (row['Date'], canonical, EXERCISE_MUSCLE_MAP[canonical]['muscle'],
+                   float(row['Weight(kg)']), int(row['Reps']), float(row['multiplier']))
 
-            exercise = row['Exercise'].strip()
-            weight = float(row['Weight(kg)'])
-            reps = int(row['Reps'])
-            multiplier = float(row['multiplier'])
+def _iter_row_sets_profiled(rows, week_start, profiler):
+    """iter_row_sets() with per-row stage timings, used only while profiling."""
+    clock = time.perf_counter
+    resolve = EXERCISE_RESOLVER.resolve
+    unknown = defaultdict(int)
+    parse = warmup = bucketing = resolution = 0.0
+    row_count = warmup_count = 0
 
-            # Get week start date
-            week_start = get_week_start(row['Date'])
+    rows = iter(rows)
+    while True:
+        t0 = clock()
+        row = next(rows, None)
+        t1 = clock()
+        parse += t1 - t0
+        if row is None:
+            break
+        row_count += 1
 
-            # Get muscle mapping
-            if exercise not in EXERCISE_MUSCLE_MAP:
-                print(f"Warning: Unknown exercise '{exercise}' - skipping")
-                continue
+        is_warmup = row['isWarmup'].lower() == 'true'
+        t2 = clock()
+        warmup += t2 - t1
+        if is_warmup:
+            warmup_count += 1
+            continue
 
-            muscle_info = EXERCISE_MUSCLE_MAP[exercise]
+        exercise = row['Exercise'].strip()
+        weight = float(row['Weight(kg)'])
+        reps = int(row['Reps'])
+        multiplier = float(row['multiplier'])
+        week = get_week_start(row['Date'], week_start)
+        t3 = clock()
+        bucketing += t3 - t2
+
+        canonical = resolve(exercise)
+        resolution += clock() - t3
+        if canonical is None:
+            unknown[exercise] += 1
+            continue
+
+        yield canonical, week, weight, reps, multiplier
+
+    profiler.add_time('csv_parse', parse, row_count)
+    profiler.add_time('warmup_filter', warmup, row_count)
+    profiler.add_time('week_bucketing', bucketing, row_count - warmup_count)
+    profiler.add_time('exercise_resolution', resolution, row_count - warmup_count)
+    profiler.count('rows', row_count)
+    profiler.count('warmup_sets', warmup_count)
+    profiler.count('unknown_sets', sum(unknown.values()))
+    if unknown:
+        print(format_unknown(unknown))
 
-            # Initialize exercise if first time
-            if not workout_data[exercise]['muscle']:
-                workout_data[exercise]['muscle'] = muscle_info['muscle']
-                workout_data[exercise]['secondary'] = muscle_info['secondary']
+def new_week():
+    """Empty aggregate for one exercise/week bucket."""
+    return {
+        'max': 0,
+        'sets': 0,
+        'maxReps': 0,
+        'load': 0
+    }
 
-            # Calculate load for this set
-            set_load = weight * reps * multiplier
+def add_set(week_data, weight, reps, multiplier):
+    """Fold one working set into a week aggregate."""
+    week_data['max'] = max(week_data['max'], weight)
+    week_data['sets'] += 1
+    week_data['maxReps'] = max(week_data['maxReps'], reps)
+    week_data['load'] += weight * reps * multiplier
 
-            # Update week data
-            week_data = workout_data[exercise]['weeks'][week_start]
-            week_data['max'] = max(week_data['max'], weight)
-            week_data['sets'] += 1
-            week_data['maxReps'] = max(week_data['maxReps'], reps)
-            week_data['load'] += set_load
+def finish_week(week_data):
+    """Week aggregate in output form (load rounded to 1 decimal)."""
+    return {
+        'max': week_data['max'],
+        'sets': week_data['sets'],
+        'maxReps': week_data['maxReps'],
+        'load': round(week_data['load'], 1)
+    }
+
+def process_csv(csv_path, engine='python', week_start=MONDAY):
+    """
+    Process CSV file into workout data structure.
+
+    engine='columnar' uses the NumPy engine (process_csv_columnar), which
+    produces the same output about 4-5x faster (benchmark.py --sizes 100k:
+    0.54s -> 0.12s); np.loadtxt's CSV parsing is most of what remains.
+    week_start picks Monday (default) or Sunday week buckets.
+    """
+    if engine == 'columnar':
+        return process_csv_columnar(csv_path, week_start)
+    if engine != 'python':
+        raise ValueError(f"Unknown engine '{engine}' (expected 'python' or 'columnar')")
+
+    workout_data = defaultdict(lambda: {
+        'muscle': '',
+        'secondary': [],
+        'weeks': defaultdict(new_week)
+    })
+
+    profiler = instrumentation.get_profiler()
+    timed = profiler.enabled
+    clock = time.perf_counter
+    aggregation = 0.0
+    set_count = 0
+
+    for exercise, week, weight, reps, multiplier in iter_sets(csv_path, week_start):
+        if timed:
+            t0 = clock()
+        muscle_info = EXERCISE_MUSCLE_MAP[exercise]
+
+        # Initialize exercise if first time
+        if not workout_data[exercise]['muscle']:
+            workout_data[exercise]['muscle'] = muscle_info['muscle']
+            workout_data[exercise]['secondary'] = muscle_info['secondary']
+
+        # Update week data
+        add_set(workout_data[exercise]['weeks'][week], weight, reps, multiplier)
+        if timed:
+            aggregation += clock() - t0
+            set_count += 1
+
+    if timed:
+        profiler.add_time('aggregation', aggregation, set_count)
+        profiler.count('working_sets', set_count)
 
     # Convert defaultdicts to regular dicts for JSON serialization
-    output = {}
-    for exercise, data in workout_data.items():
-        output[exercise] = {
-            'muscle': data['muscle'],
-            'secondary': data['secondary'],
-            'weeks': {
-                week: {
-                    'max': week_data['max'],
-                    'sets': week_data['sets'],
-                    'maxReps': week_data['maxReps'],
-                    'load': round(week_data['load'], 1)
+    with profiler.stage('aggregation'):
+        output = {}
+        for exercise, data in workout_data.items():
+            output[exercise] = {
+                'muscle': data['muscle'],
+                'secondary': data['secondary'],
+                'weeks': {
+                    week: finish_week(week_data)
+                    for week, week_data in sorted(data['weeks'].items())
                 }
-                for week, week_data in sorted(data['weeks'].items())
             }
-        }
 
     return output
 
-if __name__ == '__main__':
-    import sys
-
-    archetypes = [
-        ('archetype_01_overwhelmed_workout_export.csv',
-         'archetype_01_data.json',
-         'Overwhelmed - Program Hopper'),
-        ('archetype_02_selfdoubt_workout_export.csv',
-         'archetype_02_data.json',
-         'Self-Doubt - Volume Addict'),
-        ('archetype_03_timeconstrained_workout_export.csv',
-         'archetype_03_data.json',
-         'Time-Constrained - Efficient Trainer'),
-    ]
-
-    base_path = '/Users/mirlca/Library/CloudStorage/OneDrive-Teradyne/Documents/Notes/00-inbox/'
-    output_path = '/Users/mirlca/Library/CloudStorage/OneDrive-Teradyne/Documents/Notes/02-areas/personal/youtube-app-generator/channels/averagetojacked/data/'
-
-    for csv_file, json_file, archetype_name in archetypes:
-        print(f"\nProcessing {archetype_name}...")
-        csv_path = base_path + csv_file
-        json_path = output_path + json_file
-
-        try:
-            data = process_csv(csv_path)
+def _byte_codes(strings):
+    """(rows, width) uint8 view of a fixed-width bytes array, NUL-padded."""
+    return np.ascontiguousarray(strings).view(np.uint8).reshape(len(strings), -1)
+
+def _is_true(flags):
+    """Vectorized flag.lower() == b'true' over a fixed-width bytes array."""
+    codes = _byte_codes(flags)
+    if codes.shape[1] < 4:
+        return np.zeros(len(flags), dtype=bool)
+    # ORing 0x20 lower-cases ASCII letters; only 'T'/'t' etc. reach these codes
+    result = ((codes[:, :4] | 0x20) == np.frombuffer(b'true', dtype=np.uint8)).all(axis=1)
+    if codes.shape[1] > 4:
+        result &= codes[:, 4] == 0
+    return result
+
+def _day_numbers(dates):
+    """Days since 1970-01-01 of a bytes array of b'YYYY-MM-DD' dates."""
+    codes = _byte_codes(dates)
+    digits = codes.astype(np.int64) - ord('0')
+    digit_columns = [0, 1, 2, 3, 5, 6, 8, 9]
+    if (codes.shape[1] != 10 or (codes[:, [4, 7]] != ord('-')).any()
+            or ((digits[:, digit_columns] < 0) | (digits[:, digit_columns] > 9)).any()):
+        # Unusual shapes: let NumPy's date parser handle (or reject) them
+        return dates.astype('datetime64[D]').astype(np.int64)
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = (np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(month, 0, 12)]
+                  + (leap & (month == 2)))
+    if ((month < 1) | (month > 12) | (day < 1) | (day > month_days)).any():
+        # Raises for impossible dates, as the row engine does
+        return dates.astype('datetime64[D]').astype(np.int64)
+    # Proleptic Gregorian day count (days_from_civil, eras of 400 years)
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+def process_csv_columnar(csv_path, week_start=MONDAY):
+    """
+    Columnar version of process_csv() built on NumPy grouped reductions.
+
+    The Date, Exercise, Reps, Weight(kg), multiplier and isWarmup columns are
+    loaded into typed arrays with np.loadtxt (quoted notes may not span lines).
+    After that nothing loops over rows in Python: warmup flags and dates are
+    decoded from their bytes with array arithmetic, exercise names are
+    interned per run of equal names, and max/sets/maxReps/load are reduced
+    per (exercise, week) group. The result
+    serializes to exactly the same JSON as the row-by-row engine: load is
+    summed in file order and rounded with Python's round(), and a week whose
+    max weight never exceeds 0 keeps the integer 0 the row path produces.
+    """
+    if np is None:
+        raise ImportError("The columnar engine requires numpy (pip install numpy)")
+    week_start = parse_week_start(week_start)
+    profiler = instrumentation.get_profiler()
+
+    with open_export(csv_path) as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        return {}
+
+    def load(columns, dtype, ndmin=1):
+        # latin-1 maps every byte to itself, so text columns hold the raw UTF-8
+        # bytes: a quarter of the size of unicode arrays, and cheaper to compare
+        return np.loadtxt(csv_path, delimiter=',', quotechar='"', skiprows=1,
+                          usecols=[header.index(name) for name in columns],
+                          dtype=dtype, ndmin=ndmin, encoding='latin-1')
+
+    # Dates are truncated to their YYYY-MM-DD prefix by the S10 field. Text
+    # fields that fill their fixed width may have been cut and are reloaded.
+    with profiler.stage('csv_parse'):
+        columns = load(['Date', 'Exercise', 'Reps', 'Weight(kg)', 'multiplier', 'isWarmup'],
+                       [('date', 'S10'), ('exercise', 'S64'), ('reps', 'i8'),
+                        ('weight', 'f8'), ('multiplier', 'f8'), ('warmup', 'S8')])
+        if len(columns) == 0:
+            return {}
+        exercise_names = columns['exercise']
+        warmup_flags = columns['warmup']
+        if np.char.str_len(exercise_names).max() == 64 or np.char.str_len(warmup_flags).max() == 8:
+            text = load(['Exercise', 'isWarmup'], bytes, ndmin=2)
+            exercise_names, warmup_flags = text[:, 0], text[:, 1]
+    profiler.count('rows', len(columns))
+
+    with profiler.stage('warmup_filter'):
+        working = ~_is_true(warmup_flags)
+        weights = columns['weight'][working]
+        reps = columns['reps'][working]
+        multipliers = columns['multiplier'][working]
+    profiler.count('warmup_sets', len(columns) - len(weights))
+
+    with profiler.stage('week_bucketing'):
+        # First day of each week: day 0 (1970-01-01) was a Thursday (weekday 3)
+        day_numbers = _day_numbers(columns['date'][working])
+        week_days = day_numbers - (day_numbers + 3 - week_start) % 7
+
+    with profiler.stage('exercise_resolution'):
+        # Sets of one exercise sit together in an export, so intern runs of
+        # equal names rather than rows; names then in first-seen order
+        row_names = exercise_names[working]
+        run_starts = np.flatnonzero(np.r_[True, row_names[1:] != row_names[:-1]])
+        run_values, first_runs, run_ids = np.unique(row_names[run_starts], return_index=True,
+                                                   return_inverse=True)
+        order = np.argsort(first_runs, kind='stable')
+        raw_names = {}
+        unique_ids = np.empty(len(run_values), dtype=np.int64)
+        for position in order.tolist():
+            # Names differing only in surrounding whitespace are the same export name
+            name = run_values[position].decode('utf-8').strip()
+            unique_ids[position] = raw_names.setdefault(name, len(raw_names))
+        run_lengths = np.diff(np.r_[run_starts, len(row_names)])
+        raw_ids = np.repeat(unique_ids[run_ids.ravel()], run_lengths)
+
+        # Resolve each distinct name once; canonical ids also in first-seen order
+        names = {}
+        canonical_ids = []
+        for raw_name in raw_names:
+            canonical = EXERCISE_RESOLVER.resolve(raw_name)
+            canonical_ids.append(-1 if canonical is None else names.setdefault(canonical, len(names)))
+        names = list(names)
+        exercise_ids = np.array(canonical_ids, dtype=np.int64)[raw_ids]
+
+        known = exercise_ids >= 0
+        if not known.all():
+            raw_list = list(raw_names)
+            counts = np.bincount(raw_ids[~known], minlength=len(raw_list)).tolist()
+            print(format_unknown({raw_list[i]: n for i, n in enumerate(counts) if n}))
+            profiler.count('unknown_sets', sum(counts))
+            exercise_ids, weights, reps = exercise_ids[known], weights[known], reps[known]
+            multipliers, week_days = multipliers[known], week_days[known]
+
+    if len(exercise_ids) == 0:
+        return {}
+    profiler.count('working_sets', len(exercise_ids))
+
+    with profiler.stage('aggregation'):
+        # Group ids: (exercise, week) pairs
+        week_values, week_ids = np.unique(week_days, return_inverse=True)
+        group_ids = exercise_ids * len(week_values) + week_ids
+        group_count = len(names) * len(week_values)
+
+        sets = np.bincount(group_ids, minlength=group_count)
+        loads = np.bincount(group_ids, weights=weights * reps * multipliers, minlength=group_count)
+        maxes = np.zeros(group_count, dtype=np.float64)
+        np.maximum.at(maxes, group_ids, weights)
+        max_reps = np.zeros(group_count, dtype=np.int64)
+        np.maximum.at(max_reps, group_ids, reps)
+
+        week_labels = week_values.astype('datetime64[D]').astype(str).tolist()
+        sets, loads = sets.tolist(), loads.tolist()
+        maxes, max_reps = maxes.tolist(), max_reps.tolist()
+
+        output = {}
+        for exercise_id, exercise in enumerate(names):
+            muscle_info = EXERCISE_MUSCLE_MAP[exercise]
+            weeks = {}
+            base = exercise_id * len(week_values)
+            for week_id, week in enumerate(week_labels):
+                group = base + week_id
+                if sets[group]:
+                    weeks[week] = {
+                        'max': maxes[group] if maxes[group] > 0 else 0,
+                        'sets': sets[group],
+                        'maxReps': max_reps[group],
+                        'load': round(loads[group], 1)
+                    }
+            output[exercise] = {
+                'muscle': muscle_info['muscle'],
+                'secondary': muscle_info['secondary'],
+                'weeks': weeks
+            }
+
+    return output
+
+def _indent(text, prefix):
+    """Indent continuation lines of a json.dumps() block."""
+    return text.replace('\n', '\n' + prefix)
+
+def process_csv_streaming(csv_path, json_path, week_start=MONDAY, trends=None):
+    """
+    Process a date-ordered CSV export straight to JSON with bounded memory.
+
+    Rows are read through iter_sets() and only the buckets of the current week
+    are kept in memory. When the export moves on to a later week, finished
+    buckets are spooled to one temp file per exercise, and the final JSON is
+    written from those spools. The file matches json.dump(process_csv(...),
+    indent=2) byte for byte. With trends (a window in weeks), each exercise's
+    trend_stats entry is accumulated while its spool is written out.
+
+    Returns (exercise_count, week_entry_count).
+    """
+    exercises = {}       # exercise -> spool index, in first-seen order
+    open_weeks = {}      # (exercise, week) -> week aggregate
+    current_week = None
+    week_entries = 0
+    profiler = instrumentation.get_profiler()
+
+    with tempfile.TemporaryDirectory() as spool_dir:
+        def spool_path(exercise):
+            return os.path.join(spool_dir, f'{exercises[exercise]}.jsonl')
+
+        def flush():
+            nonlocal week_entries
+            for (exercise, week), week_data in open_weeks.items():
+                with open(spool_path(exercise), 'a') as spool:
+                    spool.write(json.dumps([week, finish_week(week_data)]) + '\n')
+                week_entries += 1
+            open_weeks.clear()
+
+        for exercise, week, weight, reps, multiplier in iter_sets(csv_path, week_start):
+            if current_week is None or week > current_week:
+                flush()
+                current_week = week
+            elif week < current_week:
+                raise ValueError(
+                    f"{csv_path} is not date-ordered: week {week} "
+                    f"appears after week {current_week}"
+                )
+
+            exercises.setdefault(exercise, len(exercises))
+            week_data = open_weeks.setdefault((exercise, week), new_week())
+            add_set(week_data, weight, reps, multiplier)
+
+        flush()
+
+        # Serialization and writing are interleaved here; reported as file_write
+        with profiler.stage('file_write'), open(json_path, 'w') as out:
+            if not exercises:
+                out.write('{}')
+                return 0, 0
+
+            out.write('{')
+            for i, exercise in enumerate(exercises):
+                muscle_info = EXERCISE_MUSCLE_MAP[exercise]
+                out.write(',\n  ' if i else '\n  ')
+                out.write(json.dumps(exercise) + ': {\n')
+                out.write('    "muscle": ' + json.dumps(muscle_info['muscle']) + ',\n')
+                out.write('    "secondary": '
+                          + _indent(json.dumps(muscle_info['secondary'], indent=2), '    ')
+                          + ',\n')
+                out.write('    "weeks": {')
+                trend = trend_stats.RollingTrend(trends) if trends else None
+                with open(spool_path(exercise)) as spool:
+                    for j, line in enumerate(spool):
+                        week, week_data = json.loads(line)
+                        out.write(',\n      ' if j else '\n      ')
+                        out.write(json.dumps(week) + ': '
+                                  + _indent(json.dumps(week_data, indent=2), '      '))
+                        if trend is not None:
+                            trend.add(week, week_data)
+                out.write('\n    }')
+                if trend is not None:
+                    out.write(',\n    "trends": '
+                              + _indent(json.dumps(trend.result(), indent=2), '    '))
+                out.write('\n  }')
+            out.write('\n}')
+
+    return len(exercises), week_entries
+
+def export_stem(csv_path):
+    """archetype_01_x_workout_export.csv[.gz] -> archetype_01_x (also the --store user name)"""
+    stem = os.path.basename(csv_path)
+    stem = stem[:-len('.gz')] if stem.endswith('.gz') else stem
+    stem = os.path.splitext(stem)[0]
+    if stem.endswith('_workout_export'):
+        stem = stem[:-len('_workout_export')]
+    return stem
+
+def output_name(csv_path, output_format='json'):
+    """archetype_01_x_workout_export.csv[.gz] -> archetype_01_x_data.json (or .fbw)"""
+    return export_stem(csv_path) + ('_data.fbw' if output_format == 'compact' else '_data.json')
+
+def find_exports(inputs):
+    """Expand directories and glob patterns into a sorted list of CSV paths."""
+    paths = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = (glob.glob(os.path.join(pattern, '*.csv'))
+                       + glob.glob(os.path.join(pattern, '*.csv.gz')))
+        else:
+            matches = glob.glob(pattern)
+        if not matches and os.path.isfile(pattern):
+            matches = [pattern]
+        paths.update(matches)
+    return sorted(paths)
+
+def count_rows(csv_path):
+    """Number of data rows in a CSV (newline count minus the header)."""
+    with open_export(csv_path, 'rb') as f:
+        lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+    return max(lines - 1, 0)
+
+def write_output(data, json_path, output_format='json'):
+    """Write process_csv() output as indented JSON or the compact .fbw format."""
+    profiler = instrumentation.get_profiler()
+    with profiler.stage('json_serialization'):
+        if output_format == 'compact':
+            payload = compact_format.encode(data)
+        else:
+            payload = json.dumps(data, indent=2)
+    with profiler.stage('file_write'), open(json_path, 'wb' if output_format == 'compact' else 'w') as f:
+        f.write(payload)
+
+def process_file(csv_path, json_path, engine='python', stream=False, week_start=MONDAY,
+                 cache_dir=None, output_format='json', profile=False, rollups=False, trends=None,
+                 store=None, sessions=False, trace_memory=False):
+    """
+    Process one export into one JSON (or compact) file. Runs inside a pool worker.
+
+    With cache_dir, the export is processed incrementally against its cache
+    (see incremental_cache.py) and engine/stream are ignored. With trends (a
+    window in weeks), every exercise gets rolling trend statistics next to
+    its weeks (see trend_stats.py). With rollups,
+    muscle-group rollups are written next to the output (see muscle_rollups.py).
+    With store (a SQLite path), the weeks are also stored under the export's
+    name as the user (see weekly_store.py). With sessions, a session index of
+    the export is written next to the output (see session_index.py).
+    With profile,
+    the job runs under its own profiler and its stage timings (and with
+    trace_memory, its top allocation sites) are returned in
+    result['profile'] (see instrumentation.py).
+
+    Errors are caught and returned in the result, so one bad export is
+    reported without taking down the batch.
+    """
+    if profile:
+        with instrumentation.profiling(trace_memory) as profiler:
+            result = process_file(csv_path, json_path, engine, stream, week_start,
+                                  cache_dir, output_format, rollups=rollups, trends=trends,
+                                  store=store, sessions=sessions)
+        result['profile'] = profiler.snapshot()
+        return result
+
+    started = time.perf_counter()
+    result = {'csv': csv_path, 'json': json_path, 'rows': 0, 'exercises': 0,
+              'week_entries': 0, 'seconds': 0.0, 'error': None}
+    try:
+        if cache_dir:
+            from incremental_cache import process_csv_incremental
+
+            cache_path = os.path.join(cache_dir, output_name(csv_path) + '.cache')
+            data, stats = process_csv_incremental(csv_path, cache_path, week_start)
+            if trends:
+                with instrumentation.get_profiler().stage('trend_stats'):
+                    trend_stats.add_trends(data, trends)
+            write_output(data, json_path, output_format)
+
+            exercise_count = len(data)
+            week_entries = sum(len(ex['weeks']) for ex in data.values())
+            # Counted while parsing; a cached run never rereads its prefix
+            result['rows'] = stats['rows']
+            result['cached_bytes'] = stats['cached_bytes']
+        elif stream:
+            # Constant-memory path for large, date-ordered exports
+            result['rows'] = count_rows(csv_path)
+            exercise_count, week_entries = process_csv_streaming(csv_path, json_path, week_start,
+                                                                 trends)
+            if rollups or store:
+                # The aggregated output is small even when the export is not
+                with open(json_path, 'r') as f:
+                    data = json.load(f)
+        else:
+            result['rows'] = count_rows(csv_path)
+            data = process_csv(csv_path, engine=engine, week_start=week_start)
+            if trends:
+                with instrumentation.get_profiler().stage('trend_stats'):
+                    trend_stats.add_trends(data, trends)
 
             # Write JSON file
-            with open(json_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            write_output(data, json_path, output_format)
+
+            exercise_count = len(data)
+            week_entries = sum(len(ex['weeks']) for ex in data.values())
+
+        if rollups:
+            with instrumentation.get_profiler().stage('muscle_rollups'):
+                result['rollups'], _ = muscle_rollups.write_rollups(data, json_path)
+        if store:
+            with instrumentation.get_profiler().stage('store_write'):
+                result['store_rows'] = weekly_store.put_user(store, export_stem(csv_path), data)
+        if sessions:
+            # A second pass over the export; the weekly aggregation keeps no timestamps
+            with instrumentation.get_profiler().stage('session_index'):
+                index = session_index.build_index(iter_session_sets(csv_path))
+                result['sessions'] = len(index)
+                session_index.write_index(index, session_index.sessions_path(json_path))
+
+        result['exercises'] = exercise_count
+        result['week_entries'] = week_entries
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+    result['seconds'] = time.perf_counter() - started
+    return result
 
-            print(f"  ✓ Created {json_file}")
-            print(f"  - {len(data)} exercises")
-            print(f"  - {sum(len(ex['weeks']) for ex in data.values())} total week entries")
+def print_result(result):
+    name = os.path.basename(result['csv'])
+    if result['error']:
+        print(f"  ✗ {name}: {result['error']} ({result['seconds']:.2f}s)")
+    else:
+        print(f"  ✓ {name} -> {os.path.basename(result['json'])}: "
+              f"{result['exercises']} exercises, {result['week_entries']} week entries, "
+              f"{result['rows']} rows in {result['seconds']:.2f}s"
+              + (f" ({result['cached_bytes']:,} bytes from cache)" if result.get('cached_bytes') else ''))
 
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
+def check_unique_outputs(jobs, cache_dir=None, store=None):
+    """
+    Raise ValueError if two jobs would write the same file. Exports with the
+    same stem (a/x.csv and b/x.csv, or x.csv and x.csv.gz) also share a cache
+    file and a --store user, so with cache_dir or store their stems must differ.
+    """
+    by_stem = bool(cache_dir or store)
+    seen = defaultdict(list)
+    for csv_path, json_path in jobs:
+        seen[export_stem(csv_path) if by_stem else os.path.abspath(json_path)].append(csv_path)
+    clashes = [(name, paths) for name, paths in seen.items() if len(paths) > 1]
+    if clashes:
+        details = '; '.join(f"{', '.join(paths)} -> {os.path.basename(name)}"
+                            for name, paths in clashes)
+        raise ValueError(f"Exports would overwrite each other's "
+                         f"{'outputs' if not by_stem else 'outputs, cache or store user'}: "
+                         f"{details} (rename them or process them separately)")
+
+def run_batch(jobs, workers, **options):
+    """Process (csv_path, json_path) jobs across a process pool, printing as they finish."""
+    check_unique_outputs(jobs, options.get('cache_dir'), options.get('store'))
+    results = []
+    if workers <= 1:
+        for csv_path, json_path in jobs:
+            results.append(process_file(csv_path, json_path, **options))
+            print_result(results[-1])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_file, csv_path, json_path, **options): (csv_path, json_path)
+                   for csv_path, json_path in jobs}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed for memory); report and move on
+                csv_path, json_path = futures[future]
+                result = {'csv': csv_path, 'json': json_path, 'rows': 0, 'exercises': 0,
+                          'week_entries': 0, 'seconds': 0.0,
+                          'error': f'worker failed: {type(e).__name__}: {e}'}
+            results.append(result)
+            print_result(result)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Aggregate Fitbod CSV exports into dashboard JSON.')
+    parser.add_argument('inputs', nargs='+',
+                        help='CSV files, directories of CSVs, or glob patterns')
+    parser.add_argument('-o', '--output-dir',
+                        help='where to write JSON files (default: next to each CSV)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--engine', choices=['python', 'columnar'], default='python',
+                        help='aggregation engine (columnar needs numpy)')
+    parser.add_argument('--stream', action='store_true',
+                        help='constant-memory mode for large date-ordered exports')
+    parser.add_argument('--week-start', choices=sorted(WEEK_STARTS), default='monday')
+    parser.add_argument('--format', choices=['json', 'compact'], default='json',
+                        help='indented JSON (default) or the compact .fbw encoding')
+    parser.add_argument('--cache-dir',
+                        help='reuse week aggregates from earlier runs of the same exports')
+    parser.add_argument('--trends', type=int, nargs='?', const=trend_stats.DEFAULT_WINDOW,
+                        metavar='WEEKS',
+                        help='add rolling trend statistics next to each exercise\'s weeks '
+                             f'(window in weeks, default {trend_stats.DEFAULT_WINDOW})')
+    parser.add_argument('--rollups', action='store_true',
+                        help='also write muscle-group x week rollups (*_muscle_rollups.json)')
+    parser.add_argument('--store', metavar='DB',
+                        help='also store every export\'s weeks in this multi-user SQLite file '
+                             '(see weekly_store.py)')
+    parser.add_argument('--sessions', action='store_true',
+                        help='also write a session index (*_sessions.fbs, see session_index.py)')
+    parser.add_argument('--profile', metavar='REPORT_JSON',
+                        help='write per-stage timings, counters and peak memory to this file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='with --profile, also list top allocation sites (tracemalloc; slow)')
+    args = parser.parse_args(argv)
+    if args.stream and args.format != 'json':
+        parser.error('--stream writes JSON only')
+    if args.trends is not None and args.format != 'json':
+        parser.error('--trends is written to JSON output only')
+    if args.trends is not None and args.trends < 1:
+        parser.error('--trends window must be at least 1 week')
+
+    csv_paths = find_exports(args.inputs)
+    if not csv_paths:
+        print("No CSV exports found")
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    if args.cache_dir:
+        os.makedirs(args.cache_dir, exist_ok=True)
+    if args.store:
+        # Create the schema once, before the workers race to it
+        weekly_store.WeeklyStore(args.store).close()
+    jobs = [(path, os.path.join(args.output_dir or os.path.dirname(path),
+                                output_name(path, args.format)))
+            for path in csv_paths]
+
+    if args.profile:
+        profiler = instrumentation.enable(trace_memory=args.trace_memory)
+
+    workers = max(1, min(args.workers, len(jobs)))
+    print(f"Processing {len(jobs)} export(s) with {workers} worker(s)...")
+    started = time.perf_counter()
+    try:
+        results = run_batch(jobs, workers, engine=args.engine, stream=args.stream,
+                            week_start=args.week_start, cache_dir=args.cache_dir,
+                            output_format=args.format, profile=bool(args.profile),
+                            trace_memory=args.trace_memory,
+                            rollups=args.rollups, trends=args.trends,
+                            store=args.store, sessions=args.sessions)
+    except ValueError as e:
+        print(f"✗ {e}")
+        return 1
+    elapsed = time.perf_counter() - started
+
+    failed = [r for r in results if r['error']]
+    rows = sum(r['rows'] for r in results if not r['error'])
+    print(f"\nSummary: {len(results) - len(failed)} succeeded, {len(failed)} failed "
+          f"in {elapsed:.2f}s")
+    print(f"  - {len(results) / elapsed:.1f} files/s, {rows / elapsed:,.0f} rows/s")
+    if results:
+        slowest = max(results, key=lambda r: r['seconds'])
+        print(f"  - per file: mean {sum(r['seconds'] for r in results) / len(results):.2f}s, "
+              f"slowest {os.path.basename(slowest['csv'])} ({slowest['seconds']:.2f}s)")
+    for r in failed:
+        print(f"  ✗ {r['csv']}: {r['error']}")
+
+    if args.profile:
+        for r in results:
+            if 'profile' in r:
+                profiler.merge(r['profile'])
+        profiler.count('files', len(results))
+        profiler.count('failed_files', len(failed))
+        profiler.write_report(args.profile, 'process_archetype_data.py')
+        print(f"\nProfile report written to {args.profile}")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Local HTTP service in front of process_csv().
+
+An asyncio front end streams each uploaded export to a temp file while
+hashing it, then hands the file to a process pool, so large exports never
+block the event loop or each other beyond the pool size. Results are kept
+in an LRU cache keyed by the SHA-256 of the upload (and the week start), so
+re-uploading the same export is answered without processing; identical
+uploads that arrive while one is being processed share that job.
+
+    POST /process?week_start=monday&engine=python
+        body: the CSV export (raw, or gzip-compressed), sent with
+        Content-Length or chunked transfer encoding
+        200: process_csv() output as JSON, with X-Content-SHA256 and
+             X-Cache: hit | miss | shared
+        400/413/422/500/503: {"error": "..."}
+    GET /metrics    queue depth, in-flight jobs, cache hit rate and latency
+                    percentiles (overall, and queue wait / processing)
+    GET /health
+
+If a worker dies (killed, out of memory), the uploads it was running get 503
+and the pool is replaced, so later uploads are served as usual.
+
+Only one request per connection (responses close the connection), which is
+all the web tier needs from a local sidecar.
+
+Usage:
+    python processing_service.py [--host 127.0.0.1] [--port 8765] [-w WORKERS]
+    curl --data-binary @export.csv http://127.0.0.1:8765/process
+"""
+
+import argparse
+import asyncio
+import csv
+import functools
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+from process_archetype_data import open_export, process_csv
+from week_buckets import parse_week_start
+
+CHUNK_SIZE = 1 << 16
+
+# Uploads larger than this are refused with 413
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+# Jobs allowed to wait for a worker before new uploads get 503
+MAX_QUEUE = 64
+
+# Cached results (serialized JSON) are evicted beyond either limit
+CACHE_ENTRIES = 256
+CACHE_BYTES = 256 * 1024 * 1024
+
+# Latency percentiles are over this many recent requests
+LATENCY_WINDOW = 1000
+
+HEADER_TIMEOUT = 30
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               411: 'Length Required', 413: 'Payload Too Large',
+               422: 'Unprocessable Entity', 500: 'Internal Server Error',
+               503: 'Service Unavailable'}
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Columns process_csv() reads; uploads without them are refused with 422
+REQUIRED_COLUMNS = ['Date', 'Exercise', 'Reps', 'Weight(kg)', 'isWarmup', 'multiplier']
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def process_upload(csv_path, engine, week_start):
+    """Pool worker: process one uploaded export, return (JSON bytes, seconds)."""
+    started = time.perf_counter()
+    with open_export(csv_path) as f:
+        header = next(csv.reader(f), [])
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"not a Fitbod export (missing columns: {', '.join(missing)})")
+    data = process_csv(csv_path, engine=engine, week_start=week_start)
+    payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return payload, time.perf_counter() - started
+
+
+class ResultCache:
+    """LRU of serialized results, bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_bytes=CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        payload = self.entries.get(key)
+        if payload is not None:
+            self.entries.move_to_end(key)
+        return payload
+
+    def put(self, key, payload):
+        if len(payload) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self.entries[key] = payload
+        self.size += len(payload)
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+def remove_spool(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def percentiles(samples):
+    """p50/p95/p99/max in milliseconds of a sequence of seconds."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 2)
+
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99),
+            'max': round(ordered[-1] * 1000, 2), 'count': len(ordered)}
+
+
+class ProcessingService:
+    """Request handling, the worker pool, the result cache and metrics."""
+
+    def __init__(self, workers, max_queue=MAX_QUEUE, cache=None, spool_dir=None,
+                 max_upload=MAX_UPLOAD_BYTES):
+        self.workers = workers
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.slots = asyncio.Semaphore(workers)
+        self.max_queue = max_queue
+        self.max_upload = max_upload
+        self.cache = cache if cache is not None else ResultCache()
+        self.spool_dir = spool_dir
+        self.in_progress = {}      # cache key -> future of the job computing it
+        self.queued = 0
+        self.running = 0
+        self.started = time.time()
+        self.counters = {'requests': 0, 'uploads': 0, 'cache_hits': 0, 'cache_misses': 0,
+                         'shared_jobs': 0, 'errors': 0, 'rejected': 0, 'bytes_received': 0,
+                         'pool_restarts': 0}
+        self.latency = {name: deque(maxlen=LATENCY_WINDOW)
+                        for name in ('request', 'queue_wait', 'processing')}
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def _restart_pool(self, broken):
+        """Replace the pool after a worker died, unless another handler already did."""
+        # No await between the check and the swap, so concurrent handlers can't race here
+        if self.pool is not broken:
+            return
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.counters['pool_restarts'] += 1
+        print("Warning: a worker process died; started a new pool", file=sys.stderr)
+
+    def metrics(self):
+        lookups = self.counters['cache_hits'] + self.counters['cache_misses']
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'workers': self.workers,
+            'queue_depth': self.queued,
+            'in_flight': self.running,
+            'max_queue': self.max_queue,
+            **self.counters,
+            'cache_hit_rate': round(self.counters['cache_hits'] / lookups, 3) if lookups else None,
+            'cache_entries': len(self.cache.entries),
+            'cache_bytes': self.cache.size,
+            'latency_ms': {name: percentiles(samples) for name, samples in self.latency.items()},
+        }
+
+    async def _run_job(self, csv_path, engine, week_start):
+        """Wait for a free worker, then process csv_path in the pool."""
+        if self.queued >= self.max_queue:
+            self.counters['rejected'] += 1
+            raise HTTPError(503, f'Processing queue is full ({self.max_queue} waiting)')
+        self.queued += 1
+        enqueued = time.perf_counter()
+        try:
+            await self.slots.acquire()
+        finally:
+            self.queued -= 1
+        self.latency['queue_wait'].append(time.perf_counter() - enqueued)
+        self.running += 1
+        pool = self.pool
+        try:
+            loop = asyncio.get_running_loop()
+            payload, seconds = await loop.run_in_executor(
+                pool, process_upload, csv_path, engine, week_start)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory); the pool is unusable from now on
+            self._restart_pool(pool)
+            raise HTTPError(503, 'A worker process died while processing; retry the upload')
+        except Exception as e:
+            # Anything process_upload() raised comes from the upload's content
+            raise HTTPError(422, f'Could not process export: {type(e).__name__}: {e}')
+        finally:
+            self.running -= 1
+            self.slots.release()
+        self.latency['processing'].append(seconds)
+        return payload
+
+    async def process(self, body, query):
+        """Spool the upload, then answer from the cache, a shared job, or a new job."""
+        params = parse_qs(query)
+        try:
+            week_start = parse_week_start(params.get('week_start', ['monday'])[0])
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        engine = params.get('engine', ['python'])[0]
+        if engine not in ('python', 'columnar'):
+            raise HTTPError(400, f"Unknown engine '{engine}' (expected 'python' or 'columnar')")
+
+        self.counters['uploads'] += 1
+        digest = hashlib.sha256()
+        fd, csv_path = tempfile.mkstemp(suffix='.csv', dir=self.spool_dir)
+        try:
+            size = 0
+            head = b''
+            with os.fdopen(fd, 'wb') as spool:
+                async for chunk in body:
+                    size += len(chunk)
+                    if size > self.max_upload:
+                        raise HTTPError(413, f'Upload exceeds {self.max_upload:,} bytes')
+                    if len(head) < 2:
+                        head += chunk[:2]
+                    digest.update(chunk)
+                    spool.write(chunk)
+            self.counters['bytes_received'] += size
+            if size == 0:
+                raise HTTPError(400, 'Empty upload')
+            if head.startswith(GZIP_MAGIC):
+                # open_export() picks gzip by extension
+                os.replace(csv_path, csv_path + '.gz')
+                csv_path += '.gz'
+
+            key = (digest.hexdigest(), week_start)
+            payload = self.cache.get(key)
+            if payload is not None:
+                self.counters['cache_hits'] += 1
+                return payload, key[0], 'hit'
+            self.counters['cache_misses'] += 1
+
+            job = self.in_progress.get(key)
+            if job is not None:
+                self.counters['shared_jobs'] += 1
+                return await asyncio.shield(job), key[0], 'shared'
+
+            job = asyncio.ensure_future(self._run_job(csv_path, engine, week_start))
+            self.in_progress[key] = job
+            # The job outlives this handler if it is cancelled (client gone) while
+            # other requests wait on it, so the job owns the spool file from here
+            job.add_done_callback(functools.partial(self._job_done, key, csv_path))
+            csv_path = None
+            return await asyncio.shield(job), key[0], 'miss'
+        finally:
+            if csv_path is not None:
+                remove_spool(csv_path)
+
+    def _job_done(self, key, csv_path, job):
+        """Done-callback of a job: cache its result, forget it and remove its spool file."""
+        del self.in_progress[key]
+        if not job.cancelled() and job.exception() is None:
+            self.cache.put(key, job.result())
+        remove_spool(csv_path)
+
+    async def handle(self, reader, writer):
+        started = time.perf_counter()
+        status, payload, headers = 200, b'', {}
+        try:
+            method, target, request_headers = await asyncio.wait_for(
+                read_request_head(reader), HEADER_TIMEOUT)
+            self.counters['requests'] += 1
+            url = urlsplit(target)
+            if url.path == '/process':
+                if method != 'POST':
+                    raise HTTPError(405, 'Use POST')
+                payload, digest, cache_state = await self.process(
+                    iter_body(reader, request_headers), url.query)
+                headers = {'X-Content-SHA256': digest, 'X-Cache': cache_state}
+            elif url.path == '/metrics':
+                payload = json.dumps(self.metrics(), indent=2).encode('utf-8')
+            elif url.path == '/health':
+                payload = b'{"status":"ok"}'
+            else:
+                raise HTTPError(404, f'No route {url.path}')
+        except HTTPError as e:
+            self.counters['errors'] += 1
+            status, payload = e.status, json.dumps({'error': str(e)}).encode('utf-8')
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError):
+            writer.close()
+            return
+        except Exception:
+            # A worker crashed or a bug; log it and answer instead of dropping the connection
+            traceback.print_exc()
+            self.counters['errors'] += 1
+            status = 500
+            payload = b'{"error":"Internal server error"}'
+
+        try:
+            writer.write(response_head(status, len(payload), headers) + payload)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+        self.latency['request'].append(time.perf_counter() - started)
+
+
+async def read_request_head(reader):
+    """(method, target, {lower-case header: value}) of the next request."""
+    line = await reader.readuntil(b'\r\n')
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, 'Malformed request line')
+    headers = {}
+    while True:
+        line = await reader.readuntil(b'\r\n')
+        if line == b'\r\n':
+            return method, target, headers
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+async def iter_body(reader, headers):
+    """Yield the request body in chunks (Content-Length or chunked encoding)."""
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size_line = await reader.readuntil(b'\r\n')
+            try:
+                size = int(size_line.split(b';')[0], 16)
+            except ValueError:
+                raise HTTPError(400, 'Malformed chunk size')
+            if size == 0:
+                # Trailers, then the final blank line
+                while await reader.readuntil(b'\r\n') != b'\r\n':
+                    pass
+                return
+            while size:
+                chunk = await reader.read(min(size, CHUNK_SIZE))
+                if not chunk:
+                    raise HTTPError(400, 'Upload ended early')
+                size -= len(chunk)
+                yield chunk
+            await reader.readexactly(2)
+        return
+
+    if 'content-length' not in headers:
+        raise HTTPError(411, 'Send Content-Length or chunked transfer encoding')
+    try:
+        remaining = int(headers['content-length'])
+    except ValueError:
+        raise HTTPError(400, 'Malformed Content-Length')
+    while remaining > 0:
+        chunk = await reader.read(min(remaining, CHUNK_SIZE))
+        if not chunk:
+            raise HTTPError(400, 'Upload ended early')
+        remaining -= len(chunk)
+        yield chunk
+
+
+def response_head(status, length, headers):
+    lines = [f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}',
+             'Content-Type: application/json',
+             f'Content-Length: {length}',
+             'Connection: close']
+    lines.extend(f'{name}: {value}' for name, value in headers.items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+async def serve(host, port, workers, max_queue, cache):
+    service = ProcessingService(workers, max_queue, cache)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"✓ Listening on http://{host}:{port} with {workers} worker(s) "
+          f"(POST /process, GET /metrics)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve process_csv() over local HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: CPU count)')
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE,
+                        help=f'uploads allowed to wait for a worker (default {MAX_QUEUE})')
+    parser.add_argument('--cache-entries', type=int, default=CACHE_ENTRIES)
+    parser.add_argument('--cache-mb', type=int, default=CACHE_BYTES // (1024 * 1024))
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.cache_entries, args.cache_mb * 1024 * 1024)
+    try:
+        asyncio.run(serve(args.host, args.port, max(1, args.workers), args.max_queue, cache))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Session-level index of a Fitbod export, kept next to the weekly aggregates.
+
+process_csv() folds every set into exercise -> week buckets, so questions
+about single workouts ("days between chest sessions", "sets per session",
+"which session set the PR") used to mean re-parsing the CSV. A session is
+all working sets sharing one export timestamp (Fitbod stamps every set of a
+workout with its start time). The index keeps them in flat arrays:
+
+    exercises           names, interned once; sets refer to them by id
+    session_start       i64 local wall-clock seconds since 1970, ascending
+    session_utc_offset  i16 UTC offset in minutes (the export's '+HHMM')
+    session_first_set   u32 offsets into the set table, one per session + 1
+    set columns         u16 exercise id, f64 weight, u32 reps, f64 multiplier
+    exercise_sessions   u32 session numbers per exercise, ascending, with
+                        u32 offsets per exercise + 1 (a posting list)
+
+Sessions are sorted by the timestamp as written, so calendar dates are
+ascending as well, and a date range is two bisects over session_start. With
+an exercise (or muscle) the same range is bisected in that exercise's
+posting list, so counting sessions in a range is O(log n) and listing them
+is O(log n + matches). Like the aggregates, the set table only holds
+working sets of known exercises.
+
+process_archetype_data.py --sessions writes the index as *_sessions.fbs
+next to each output:
+
+    magic 'FBS1'
+    exercises           u16 count, then per exercise u16 length + UTF-8
+                        name and u16 length + UTF-8 primary muscle
+    arrays              in the order above, each u32 length + little-endian items
+
+    index = load_index('archetype_01_x_sessions.fbs')
+    index.find(start='2025-03-01', end='2025-03-31', muscle='Chest')   # session numbers
+    index.day_gaps(muscle='Chest')
+    index.pr_sessions('Barbell Bench Press')[-1]                        # latest PR session
+
+Usage:
+    python session_index.py FILE.fbs sessions [--exercise NAME ...] [--muscle M] [--start D] [--end D]
+    python session_index.py FILE.fbs gaps [--exercise NAME ...] [--muscle M] [--start D] [--end D]
+    python session_index.py FILE.fbs prs --exercise NAME
+"""
+
+import argparse
+import heapq
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+
+from week_buckets import parse_timestamp
+
+MAGIC = b'FBS1'
+
+EPOCH = datetime(1970, 1, 1)
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def _local_seconds(day):
+    """'YYYY-MM-DD' -> local wall-clock seconds at midnight starting that day."""
+    return (date.fromisoformat(day) - EPOCH.date()).days * DAY_SECONDS
+
+
+class SessionIndex:
+    """Sessions and their sets in flat arrays; see the module docstring for the layout."""
+
+    def __init__(self, exercises, muscles, session_start, session_utc_offset, session_first_set,
+                 set_exercise, set_weight, set_reps, set_multiplier,
+                 exercise_offsets, exercise_sessions):
+        self.exercises = exercises
+        self.muscles = muscles
+        self.exercise_ids = {name: i for i, name in enumerate(exercises)}
+        self.session_start = session_start
+        self.session_utc_offset = session_utc_offset
+        self.session_first_set = session_first_set
+        self.set_exercise = set_exercise
+        self.set_weight = set_weight
+        self.set_reps = set_reps
+        self.set_multiplier = set_multiplier
+        self.exercise_offsets = exercise_offsets
+        self.exercise_sessions = exercise_sessions
+
+    def __len__(self):
+        return len(self.session_start)
+
+    def _columns(self):
+        return [self.session_start, self.session_utc_offset, self.session_first_set,
+                self.set_exercise, self.set_weight, self.set_reps, self.set_multiplier,
+                self.exercise_offsets, self.exercise_sessions]
+
+    def exercise_names(self, exercises=(), muscle=None):
+        """Known exercise names among exercises, plus every exercise of muscle."""
+        names = [name for name in exercises if name in self.exercise_ids]
+        if muscle:
+            names += [name for name, m in zip(self.exercises, self.muscles)
+                      if m == muscle and name not in names]
+        return names
+
+    def session_range(self, start=None, end=None):
+        """(first, stop) session numbers within start..end (YYYY-MM-DD, both inclusive)."""
+        first = 0 if start is None else bisect_left(self.session_start, _local_seconds(start))
+        stop = len(self) if end is None else bisect_left(self.session_start,
+                                                         _local_seconds(end) + DAY_SECONDS)
+        return first, max(first, stop)
+
+    def _postings(self, name, first, stop):
+        """(from, to) positions in exercise_sessions of name's sessions in [first, stop)."""
+        exercise_id = self.exercise_ids[name]
+        lo = self.exercise_offsets[exercise_id]
+        hi = self.exercise_offsets[exercise_id + 1]
+        return (bisect_left(self.exercise_sessions, first, lo, hi),
+                bisect_left(self.exercise_sessions, stop, lo, hi))
+
+    def find(self, start=None, end=None, exercises=(), muscle=None):
+        """
+        Session numbers in date order within start..end.
+
+        With exercises and/or muscle, only sessions containing at least one
+        of those exercises.
+        """
+        first, stop = self.session_range(start, end)
+        if not exercises and not muscle:
+            return list(range(first, stop))
+        runs = []
+        for name in self.exercise_names(exercises, muscle):
+            lo, hi = self._postings(name, first, stop)
+            runs.append(self.exercise_sessions[lo:hi])
+        if len(runs) == 1:
+            return list(runs[0])
+        found = []
+        for session in heapq.merge(*runs):
+            if not found or found[-1] != session:
+                found.append(session)
+        return found
+
+    def count(self, start=None, end=None, exercise=None):
+        """Number of sessions within start..end (with exercise: containing it), O(log n)."""
+        first, stop = self.session_range(start, end)
+        if exercise is None:
+            return stop - first
+        if exercise not in self.exercise_ids:
+            return 0
+        lo, hi = self._postings(exercise, first, stop)
+        return hi - lo
+
+    def session_time(self, session):
+        """The session's timestamp as an aware datetime, as written in the export."""
+        offset = timedelta(minutes=self.session_utc_offset[session])
+        local = EPOCH + timedelta(seconds=self.session_start[session])
+        return local.replace(tzinfo=timezone(offset))
+
+    def session_day(self, session):
+        """The session's calendar date (YYYY-MM-DD) as written in the export."""
+        return (EPOCH.date() + timedelta(days=self.session_start[session] // DAY_SECONDS)).isoformat()
+
+    def session_sets(self, session, exercises=()):
+        """[(exercise, weight, reps, multiplier)] in export order, optionally for some exercises only."""
+        ids = {self.exercise_ids[name] for name in exercises if name in self.exercise_ids}
+        sets = []
+        for i in range(self.session_first_set[session], self.session_first_set[session + 1]):
+            exercise_id = self.set_exercise[i]
+            if not exercises or exercise_id in ids:
+                sets.append((self.exercises[exercise_id], self.set_weight[i], self.set_reps[i],
+                             self.set_multiplier[i]))
+        return sets
+
+    def day_gaps(self, start=None, end=None, exercises=(), muscle=None):
+        """Days between consecutive matching sessions on different days."""
+        days = [self.session_start[s] // DAY_SECONDS
+                for s in self.find(start, end, exercises, muscle)]
+        return [b - a for a, b in zip(days, days[1:]) if b != a]
+
+    def pr_sessions(self, exercise, start=None, end=None):
+        """Sessions where exercise's max weight beat every earlier session (the trend_stats PR)."""
+        if exercise not in self.exercise_ids:
+            return []
+        exercise_id = self.exercise_ids[exercise]
+        lo, hi = self._postings(exercise, 0, len(self))
+        first, stop = self.session_range(start, end)
+        best = None
+        prs = []
+        for session in self.exercise_sessions[lo:hi]:
+            top = max(self.set_weight[i]
+                      for i in range(self.session_first_set[session],
+                                     self.session_first_set[session + 1])
+                      if self.set_exercise[i] == exercise_id)
+            if best is None or top > best:
+                best = top
+                if first <= session < stop:
+                    prs.append(session)
+        return prs
+
+
+def build_index(sets):
+    """
+    SessionIndex from (timestamp, exercise, muscle, weight, reps, multiplier)
+    working sets, in any order; sets of one session keep their order.
+    """
+    sessions = {}
+    muscles = {}
+    for timestamp, exercise, muscle, weight, reps, multiplier in sets:
+        session = sessions.get(timestamp)
+        if session is None:
+            session = sessions[timestamp] = []
+        session.append((exercise, weight, reps, multiplier))
+        muscles.setdefault(exercise, muscle)
+
+    keyed = []
+    for timestamp, session in sessions.items():
+        moment = parse_timestamp(timestamp)
+        local = moment.replace(tzinfo=None)
+        offset = moment.utcoffset() // timedelta(minutes=1)
+        # Same wall clock in two time zones: the earlier instant first
+        keyed.append(((local - EPOCH) // timedelta(seconds=1), -offset, session))
+    keyed.sort(key=lambda item: item[:2])
+
+    exercise_ids = {}
+    session_start, session_utc_offset = array('q'), array('h')
+    session_first_set = array('I', [0])
+    set_exercise, set_weight, set_reps, set_multiplier = array('H'), array('d'), array('I'), array('d')
+    postings = []
+    for number, (start, negative_offset, session) in enumerate(keyed):
+        session_start.append(start)
+        session_utc_offset.append(-negative_offset)
+        for exercise, weight, reps, multiplier in session:
+            exercise_id = exercise_ids.setdefault(exercise, len(exercise_ids))
+            if exercise_id == len(postings):
+                postings.append(array('I'))
+            if not postings[exercise_id] or postings[exercise_id][-1] != number:
+                postings[exercise_id].append(number)
+            set_exercise.append(exercise_id)
+            set_weight.append(weight)
+            set_reps.append(reps)
+            set_multiplier.append(multiplier)
+        session_first_set.append(len(set_exercise))
+
+    exercise_offsets = array('I', [0])
+    exercise_sessions = array('I')
+    for posting in postings:
+        exercise_sessions.extend(posting)
+        exercise_offsets.append(len(exercise_sessions))
+
+    exercises = list(exercise_ids)
+    return SessionIndex(exercises, [muscles[name] for name in exercises],
+                        session_start, session_utc_offset, session_first_set,
+                        set_exercise, set_weight, set_reps, set_multiplier,
+                        exercise_offsets, exercise_sessions)
+
+
+def _pack_string(s):
+    encoded = s.encode('utf-8')
+    return struct.pack('<H', len(encoded)) + encoded
+
+
+def _pack_array(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return struct.pack('<I', len(values)) + values.tobytes()
+
+
+def encode(index):
+    """SessionIndex -> bytes."""
+    parts = [MAGIC, struct.pack('<H', len(index.exercises))]
+    for name, muscle in zip(index.exercises, index.muscles):
+        parts.append(_pack_string(name))
+        parts.append(_pack_string(muscle))
+    parts.extend(_pack_array(column) for column in index._columns())
+    return b''.join(parts)
+
+
+# Typecodes of SessionIndex._columns(), in file order
+COLUMN_TYPES = 'qhIHdIdII'
+
+
+def decode(blob):
+    """Bytes -> SessionIndex."""
+    if blob[:4] != MAGIC:
+        raise ValueError("Not a session index file (bad magic)")
+    pos = 4
+
+    def take(fmt):
+        nonlocal pos
+        values = struct.unpack_from(fmt, blob, pos)
+        pos += struct.calcsize(fmt)
+        return values
+
+    def take_string():
+        nonlocal pos
+        length = take('<H')[0]
+        pos += length
+        return blob[pos - length:pos].decode('utf-8')
+
+    exercises, muscles = [], []
+    for _ in range(take('<H')[0]):
+        exercises.append(take_string())
+        muscles.append(take_string())
+
+    columns = []
+    for typecode in COLUMN_TYPES:
+        values = array(typecode)
+        count = take('<I')[0]
+        values.frombytes(blob[pos:pos + count * values.itemsize])
+        pos += count * values.itemsize
+        if sys.byteorder == 'big':
+            values.byteswap()
+        columns.append(values)
+    return SessionIndex(exercises, muscles, *columns)
+
+
+def sessions_path(output_path):
+    """archetype_01_x_data.json (or .fbw) -> archetype_01_x_sessions.fbs"""
+    stem = os.path.splitext(output_path)[0]
+    if stem.endswith('_data'):
+        stem = stem[:-len('_data')]
+    return stem + '_sessions.fbs'
+
+
+def write_index(index, path):
+    """Write index to path atomically; returns the bytes written."""
+    blob = encode(index)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(blob)
+
+
+def load_index(path):
+    with open(path, 'rb') as f:
+        return decode(f.read())
+
+
+def parse_day(text):
+    """argparse type for --start/--end: a real YYYY-MM-DD day, normalized."""
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid day {text!r} (expected YYYY-MM-DD)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query a session index written by '
+                                                 'process_archetype_data.py --sessions.')
+    parser.add_argument('index', help='*_sessions.fbs file')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('sessions', 'list sessions with their set counts'),
+                            ('gaps', 'days between sessions'),
+                            ('prs', 'sessions that set a max weight PR')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--exercise', action='append', default=[],
+                             required=name == 'prs', help='repeatable')
+        if name != 'prs':
+            command.add_argument('--muscle', help='every exercise with this primary muscle')
+        command.add_argument('--start', type=parse_day, help='first day (YYYY-MM-DD, inclusive)')
+        command.add_argument('--end', type=parse_day, help='last day (YYYY-MM-DD, inclusive)')
+    args = parser.parse_args(argv)
+
+    index = load_index(args.index)
+    muscle = getattr(args, 'muscle', None)
+    unknown = [name for name in args.exercise if name not in index.exercise_ids]
+    if unknown:
+        print(f"✗ Not in the index: {', '.join(unknown)}")
+        return 1
+
+    if args.command == 'sessions':
+        # Without a filter, session_sets() returns every set
+        names = index.exercise_names(args.exercise, muscle)
+        found = index.find(args.start, args.end, args.exercise, muscle)
+        total = 0
+        for session in found:
+            sets = index.session_sets(session, names)
+            total += len(sets)
+            exercises = len({s[0] for s in sets})
+            print(f"  {index.session_time(session):%Y-%m-%d %H:%M %z}  "
+                  f"{len(sets):>3} sets, {exercises} exercise{'s' if exercises != 1 else ''}")
+        if found:
+            print(f"{len(found)} session(s), {total / len(found):.1f} sets/session")
+        else:
+            print("No matching sessions")
+    elif args.command == 'gaps':
+        gaps = index.day_gaps(args.start, args.end, args.exercise, muscle)
+        if not gaps:
+            print("Fewer than 2 matching training days")
+            return 0
+        gaps.sort()
+        print(f"{len(gaps) + 1} training days: {sum(gaps) / len(gaps):.1f} days apart on average, "
+              f"median {gaps[len(gaps) // 2]}, longest {gaps[-1]}")
+    else:
+        for exercise in args.exercise:
+            print(f"{exercise}:")
+            for session in index.pr_sessions(exercise, args.start, args.end):
+                top = max(s[1] for s in index.session_sets(session, [exercise]))
+                print(f"  {index.session_day(session)}  {top:g} kg")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
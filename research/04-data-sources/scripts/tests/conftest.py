@@ -0,0 +1,45 @@
+"""
+Shared test setup. The scripts are flat modules, so their directory goes on
+sys.path. Run from the scripts directory:
+
+    python -m pytest -q tests
+"""
+
+import csv
+import io
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+FIELDNAMES = ['Date', 'Exercise', 'Reps', 'Weight(kg)', 'Duration(s)', 'Distance(m)',
+              'Incline', 'Resistance', 'isWarmup', 'Note', 'multiplier']
+
+
+def export_row(date, exercise, reps, weight, warmup=False, multiplier=1.0):
+    return {'Date': date, 'Exercise': exercise, 'Reps': reps, 'Weight(kg)': weight,
+            'Duration(s)': 0.0, 'Distance(m)': 0.0, 'Incline': 0.0, 'Resistance': 0.0,
+            'isWarmup': 'true' if warmup else 'false', 'Note': '', 'multiplier': multiplier}
+
+
+@pytest.fixture
+def export_bytes():
+    """A small Fitbod export, as bytes: three weeks, two exercises, a warmup set."""
+    rows = [
+        export_row('2025-01-06 06:30:00 PM +0000', 'Barbell Bench Press', 10, 20.0, warmup=True),
+        export_row('2025-01-06 06:30:00 PM +0000', 'Barbell Bench Press', 8, 60.0),
+        export_row('2025-01-06 06:30:00 PM +0000', 'Barbell Back Squat', 5, 100.0),
+        export_row('2025-01-08 07:00:00 AM +0100', 'Barbell Bench Press', 6, 62.5),
+        export_row('2025-01-13 06:30:00 PM +0000', 'Barbell Back Squat', 5, 102.5),
+        export_row('2025-01-19 09:15:00 AM -0500', 'Barbell Bench Press', 8, 61.0),
+        export_row('2025-01-20 06:30:00 PM +0000', 'Barbell Back Squat', 3, 110.0, multiplier=2.0),
+    ]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDNAMES, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from corpus_index import CorpusIndex
+
+
+def write_batch(path, transcript, comments):
+    video = {'video_id': 'v1', 'title': 'How many sets?', 'transcript': transcript,
+             'comments': [{'author': author, 'text': text} for author, text in comments]}
+    path.write_text(json.dumps({'channel': 'test', 'videos': [video]}))
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = CorpusIndex()
+    write_batch(tmp_path / 'batch.json', 'Language: en how many sets to failure',
+                [('a', 'I always overthink my sets'), ('b', 'my elbow pain is back'),
+                 ('c', 'beginner here, shoulder pain')])
+    index.add_file(str(tmp_path / 'batch.json'), str(tmp_path))
+    return index
+
+
+def texts(index, query, kind=None):
+    return [index.docs[doc_id]['text'] for doc_id in index.search(query, kind)]
+
+
+def test_queries(index):
+    assert texts(index, 'overthink*') == ['I always overthink my sets']
+    assert texts(index, '"many sets"', kind='transcript') == ['how many sets to failure']
+    assert texts(index, 'pain -beginner') == ['my elbow pain is back']
+    assert texts(index, '(elbow OR shoulder) AND NOT beginner') == ['my elbow pain is back']
+    assert len(texts(index, 'NOT pain')) == 2
+
+
+@pytest.mark.parametrize('query', ['pain -', 'NOT', 'pain AND', '(elbow OR', 'pain OR'])
+def test_query_ending_early_is_an_error(index, query):
+    with pytest.raises(ValueError, match='unexpected end of query'):
+        index.search(query)
+
+
+def test_unbalanced_query_is_an_error(index):
+    with pytest.raises(ValueError):
+        index.search('pain)')
+
+
+def test_changed_file_is_reindexed(tmp_path, index):
+    write_batch(tmp_path / 'batch.json', 'Language: en how many reps to failure',
+                [('a', 'I always overthink my sets'), ('c', 'beginner here, shoulder pain')])
+    # Only batch.json held them, so all of its documents are read again
+    assert index.add_file(str(tmp_path / 'batch.json'), str(tmp_path)) == 3
+    assert texts(index, 'elbow') == []
+    assert texts(index, '"many sets"') == []
+    assert texts(index, 'reps', kind='transcript') == ['how many reps to failure']
+    assert len(index.search('NOT nothingmatchesthis')) == 3
+
+
+def test_unchanged_file_is_skipped(tmp_path, index):
+    assert index.add_file(str(tmp_path / 'batch.json'), str(tmp_path)) is None
+
+
+def test_save_load_round_trip(tmp_path, index):
+    write_batch(tmp_path / 'batch.json', 'Language: en how many reps to failure', [])
+    index.add_file(str(tmp_path / 'batch.json'), str(tmp_path))
+    index.save(str(tmp_path / 'index.json'))
+    loaded = CorpusIndex.load(str(tmp_path / 'index.json'))
+    assert texts(loaded, 'reps OR pain OR sets') == ['how many reps to failure']
+    assert loaded.docs[0]['sources'] == {'batch.json'}
+    assert loaded.add_file(str(tmp_path / 'batch.json'), str(tmp_path)) is None
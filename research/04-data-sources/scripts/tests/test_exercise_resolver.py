@@ -0,0 +1,36 @@
+import pytest
+
+from exercise_resolver import ExerciseResolver, normalize
+from process_archetype_data import EXERCISE_ALIASES, EXERCISE_MUSCLE_MAP
+
+
+def resolver():
+    return ExerciseResolver(EXERCISE_MUSCLE_MAP, EXERCISE_ALIASES)
+
+
+def test_exact_and_normalized_names():
+    r = resolver()
+    assert r.resolve('Barbell Bench Press') == 'Barbell Bench Press'
+    assert r.resolve('  bench press, BARBELL ') == 'Barbell Bench Press'
+    assert normalize('Dumbbell Curls') == normalize('curl dumbbell')
+
+
+def test_typo_in_one_token_is_matched_and_reported(capsys):
+    assert resolver().resolve('Barbel Bench Press') == 'Barbell Bench Press'
+    assert "matched 'Barbel Bench Press' to 'Barbell Bench Press'" in capsys.readouterr().out
+
+
+def test_extra_token_is_a_different_exercise(capsys):
+    assert resolver().resolve('Decline Barbell Bench Press') is None
+    assert capsys.readouterr().out == ''
+
+
+def test_near_identical_names_of_other_exercises_are_not_merged():
+    # One letter apart, opposite movements
+    muscle_map = {'Machine Hip Abductor': EXERCISE_MUSCLE_MAP['Machine Hip Abductor']}
+    assert ExerciseResolver(muscle_map).resolve('Machine Hip Adductor') is None
+
+
+def test_alias_to_unknown_exercise_is_refused():
+    with pytest.raises(ValueError, match='No Such Exercise'):
+        ExerciseResolver(EXERCISE_MUSCLE_MAP, {'Bench': 'No Such Exercise'})
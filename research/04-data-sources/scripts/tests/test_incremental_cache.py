@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from incremental_cache import process_csv_incremental
+from process_archetype_data import process_csv
+
+
+def as_json(data):
+    return json.dumps(data, sort_keys=True)
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return str(tmp_path / 'export.csv'), str(tmp_path / 'export.cache')
+
+
+def run(paths, blob):
+    csv_path, cache_path = paths
+    with open(csv_path, 'wb') as f:
+        f.write(blob)
+    return process_csv_incremental(csv_path, cache_path)
+
+
+def test_cold_run_matches_process_csv(paths, export_bytes):
+    output, stats = run(paths, export_bytes)
+    assert as_json(output) == as_json(process_csv(paths[0]))
+    assert stats['cached_bytes'] == 0
+    assert stats['rows'] == 7
+    assert stats['last_date'] == '2025-01-20'
+
+
+def test_append_resumes_from_the_cache(paths, export_bytes):
+    lines = export_bytes.splitlines(keepends=True)
+    run(paths, b''.join(lines[:4]))
+    output, stats = run(paths, export_bytes)
+    assert stats['cached_bytes'] == len(b''.join(lines[:4]))
+    assert stats['rows'] == 7
+    assert stats['new_sets'] == 4
+    assert as_json(output) == as_json(process_csv(paths[0]))
+
+
+def test_edited_history_falls_back_to_a_full_run(paths, export_bytes):
+    run(paths, export_bytes)
+    output, stats = run(paths, export_bytes.replace(b',60.0,', b',65.0,'))
+    assert stats['cached_bytes'] == 0
+    assert as_json(output) == as_json(process_csv(paths[0]))
+
+
+def test_unterminated_last_line_is_not_cached(paths, export_bytes):
+    cut = len(export_bytes) - 20
+    output, stats = run(paths, export_bytes[:cut])
+    # The half-written row is left out, and so is everything after the last newline
+    complete = export_bytes[:export_bytes.rindex(b'\n', 0, cut) + 1]
+    assert stats['rows'] == 6
+    with open(paths[1]) as f:
+        assert json.load(f)['prefix_bytes'] == len(complete)
+
+    output, stats = run(paths, export_bytes)
+    assert stats['cached_bytes'] == len(complete)
+    assert stats['rows'] == 7
+    assert as_json(output) == as_json(process_csv(paths[0]))
+
+
+def test_complete_row_without_newline_counts_but_is_read_again(paths, export_bytes):
+    output, stats = run(paths, export_bytes.rstrip(b'\n'))
+    assert stats['rows'] == 7
+    assert as_json(output) == as_json(process_csv(paths[0]))
+
+    output, stats = run(paths, export_bytes)
+    assert stats['cached_bytes'] == export_bytes.rstrip(b'\n').rindex(b'\n') + 1
+    assert stats['new_sets'] == 1
+    assert as_json(output) == as_json(process_csv(paths[0]))
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import os
+import signal
+import time
+
+import pytest
+
+import processing_service
+from processing_service import HTTPError, ProcessingService, process_upload
+
+
+def kill_worker(csv_path, engine, week_start):
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def slow_process_upload(csv_path, engine, week_start):
+    time.sleep(0.5)
+    return process_upload(csv_path, engine, week_start)
+
+
+async def body(blob):
+    yield blob
+
+
+def serve(tmp_path, coroutine):
+    """Run coroutine(service) on a fresh one-worker service."""
+    async def main():
+        service = ProcessingService(1, spool_dir=str(tmp_path))
+        try:
+            return await coroutine(service)
+        finally:
+            service.close()
+    return asyncio.run(main())
+
+
+def test_upload_is_processed_then_cached(tmp_path, export_bytes):
+    async def uploads(service):
+        first = await service.process(body(export_bytes), '')
+        second = await service.process(body(export_bytes), 'week_start=monday')
+        return first, second
+
+    (payload, digest, cache), second = serve(tmp_path, uploads)
+    assert cache == 'miss' and second[2] == 'hit'
+    assert set(json.loads(payload)) == {'Barbell Bench Press', 'Barbell Back Squat'}
+    assert os.listdir(tmp_path) == []
+
+
+def test_bad_uploads(tmp_path, export_bytes):
+    async def upload(service, blob, query=''):
+        with pytest.raises(HTTPError) as error:
+            await service.process(body(blob), query)
+        return error.value.status
+
+    async def uploads(service):
+        return [await upload(service, b''),
+                await upload(service, b'a,b\n1,2\n'),
+                await upload(service, export_bytes, 'week_start=tuesday')]
+
+    assert serve(tmp_path, uploads) == [400, 422, 400]
+    assert os.listdir(tmp_path) == []
+
+
+def test_killed_worker_gets_503_and_the_pool_is_replaced(tmp_path, export_bytes, monkeypatch):
+    async def uploads(service):
+        monkeypatch.setattr(processing_service, 'process_upload', kill_worker)
+        with pytest.raises(HTTPError) as error:
+            await service.process(body(export_bytes), '')
+        assert error.value.status == 503
+        monkeypatch.undo()
+        payload, _, cache = await service.process(body(export_bytes), '')
+        return cache, service.counters['pool_restarts']
+
+    assert serve(tmp_path, uploads) == ('miss', 1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_shared_job_outlives_a_cancelled_requester(tmp_path, export_bytes, monkeypatch):
+    monkeypatch.setattr(processing_service, 'process_upload', slow_process_upload)
+
+    async def uploads(service):
+        first = asyncio.ensure_future(service.process(body(export_bytes), ''))
+        await asyncio.sleep(0.1)
+        second = asyncio.ensure_future(service.process(body(export_bytes), ''))
+        await asyncio.sleep(0.1)
+        first.cancel()
+        payload, _, cache = await second
+        return cache, len(json.loads(payload))
+
+    assert serve(tmp_path, uploads) == ('shared', 2)
+    assert os.listdir(tmp_path) == []
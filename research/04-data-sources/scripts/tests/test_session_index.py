@@ -0,0 +1,42 @@
+import argparse
+
+import pytest
+
+from session_index import build_index, decode, encode, parse_day
+
+SETS = [
+    ('2025-01-08 07:00:00 AM +0100', 'Barbell Bench Press', 'Chest', 62.5, 6, 1.0),
+    ('2025-01-06 06:30:00 PM +0000', 'Barbell Bench Press', 'Chest', 60.0, 8, 1.0),
+    ('2025-01-06 06:30:00 PM +0000', 'Barbell Back Squat', 'Quads', 100.0, 5, 1.0),
+    ('2025-01-13 06:30:00 PM +0000', 'Barbell Back Squat', 'Quads', 102.5, 5, 1.0),
+    ('2025-01-20 06:30:00 PM +0000', 'Barbell Bench Press', 'Chest', 61.0, 8, 2.0),
+]
+
+
+def test_encode_decode_round_trip():
+    index = build_index(SETS)
+    copy = decode(encode(index))
+    assert encode(copy) == encode(index)
+    assert copy.exercises == index.exercises
+    assert [copy.session_day(s) for s in range(len(copy))] == [
+        '2025-01-06', '2025-01-08', '2025-01-13', '2025-01-20']
+
+
+def test_queries():
+    index = build_index(SETS)
+    assert index.find(muscle='Chest') == [0, 1, 3]
+    assert index.find(start='2025-01-07', end='2025-01-13') == [1, 2]
+    assert index.count(exercise='Barbell Back Squat') == 2
+    assert index.pr_sessions('Barbell Bench Press') == [0, 1]
+
+
+def test_bad_magic():
+    with pytest.raises(ValueError):
+        decode(b'XXXX')
+
+
+def test_parse_day():
+    assert parse_day('2025-01-06') == '2025-01-06'
+    for text in ('2025-02-30', '06/01/2025', ''):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_day(text)
@@ -0,0 +1,34 @@
+import pytest
+
+from week_buckets import MONDAY, SUNDAY, get_week_start, parse_timestamp, parse_week_start
+
+
+@pytest.mark.parametrize('date_str, week_start, expected', [
+    ('2025-01-06 06:30:00 PM +0000', MONDAY, '2025-01-06'),   # a Monday
+    ('2025-01-05 06:30:00 PM +0000', MONDAY, '2024-12-30'),   # Sunday, across the new year
+    ('2025-01-05 06:30:00 PM +0000', SUNDAY, '2025-01-05'),
+    ('2025-01-11 11:59:59 PM +0000', SUNDAY, '2025-01-05'),
+    ('2024-02-29 12:00:00 AM +0000', MONDAY, '2024-02-26'),   # leap day
+])
+def test_week_start(date_str, week_start, expected):
+    assert get_week_start(date_str, week_start) == expected
+
+
+def test_timezone_rebucketing():
+    # Monday 1am in UTC+2 is still Sunday in UTC
+    assert get_week_start('2025-01-06 01:00:00 AM +0200') == '2025-01-06'
+    assert get_week_start('2025-01-06 01:00:00 AM +0200', tz='+0000') == '2024-12-30'
+
+
+def test_parse_timestamp_twelve_hour_clock():
+    assert parse_timestamp('2025-01-06 12:15:00 AM -0530').hour == 0
+    assert parse_timestamp('2025-01-06 12:15:00 PM -0530').hour == 12
+    assert parse_timestamp('2025-01-06 12:15:00 PM -0530').utcoffset().total_seconds() == -19800
+
+
+def test_parse_week_start():
+    assert parse_week_start('Sunday') == SUNDAY
+    with pytest.raises(ValueError):
+        parse_week_start('tuesday')
+    with pytest.raises(ValueError):
+        parse_week_start(3)
@@ -0,0 +1,26 @@
+import json
+
+from process_archetype_data import process_csv
+from weekly_store import WeeklyStore
+
+
+def test_user_data_round_trip(tmp_path, export_bytes):
+    csv_path = tmp_path / 'export.csv'
+    csv_path.write_bytes(export_bytes)
+    data = process_csv(str(csv_path))
+    with WeeklyStore(str(tmp_path / 'weekly.db')) as store:
+        store.put_user('u1', data)
+        # Same exercise order and value types, so the JSON is byte-identical
+        assert json.dumps(store.user_data('u1')) == json.dumps(data)
+        assert store.user_data('missing') is None
+
+
+def test_storing_again_replaces_the_user(tmp_path, export_bytes):
+    csv_path = tmp_path / 'export.csv'
+    csv_path.write_bytes(export_bytes)
+    data = process_csv(str(csv_path))
+    with WeeklyStore(str(tmp_path / 'weekly.db')) as store:
+        store.put_users([('u1', data), ('u2', data)])
+        store.put_user('u1', {name: ex for name, ex in data.items() if name == 'Barbell Back Squat'})
+        assert list(store.user_data('u1')) == ['Barbell Back Squat']
+        assert [row[:3] for row in store.users()] == [('u1', 1, 3), ('u2', 2, 5)]
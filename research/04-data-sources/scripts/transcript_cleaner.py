@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Clean YouTube auto-caption transcripts from the research corpus.
+
+Raw transcripts look like
+
+    Language: en What<00:00:00.320><c> do</c><00:00:00.480><c> you</c> ...
+    <c> underrated</c> What do you think is the most underrated What do you
+    think is the most underrated muscle<00:00:02.159><c> group</c> ...
+
+Each caption cue is a first word glued to a timing tag followed by
+<c> word</c> pieces, and between cues the rolling captions repeat the cue
+that just finished as plain text, once or twice. clean_transcript() walks the
+string once with str.find: it keeps the cue words with their timestamps,
+drops plain-text runs that repeat the words just before them, and keeps any
+other plain words (untimed cues) at the last known time. '>>' speaker
+marks are dropped and HTML entities decoded.
+
+Repeat removal only runs on transcripts with <c> cues; without them there is
+no rolling echo, and repeats are the speaker's own. A plain transcript is just
+split into words (at 0.0s) and keeps them all:
+
+    Language: en that last set was really really hard
+    -> that last set was really really hard
+
+Cleaned results are cached per video_id in --cache-dir, keyed on a hash of
+the raw transcript, so re-runs only touch new or changed videos.
+
+Usage:
+    python transcript_cleaner.py                          # summary for the main corpus file
+    python transcript_cleaner.py FILE --timestamps -o cleaned.json --cache-dir .transcripts
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+import time
+
+from corpus_loader import CORPUS_PATH, iter_videos
+
+CLEANER_VERSION = 2
+
+# Longest caption cue (in words) considered when removing rolling repeats
+MAX_CUE_WORDS = 40
+
+_SENTENCE_END = ('.', '?', '!')
+
+# Speaker-change marks that only appear in the plain-text echo
+_SPEAKER_MARKS = {'&gt;&gt;', '>>'}
+
+
+def parse_timestamp(tag):
+    """'00:01:02.500' -> 62.5"""
+    return int(tag[0:2]) * 3600 + int(tag[3:5]) * 60 + float(tag[6:])
+
+
+def _append_unrepeated(plain_words, tokens, words, seconds):
+    """
+    Append untimed words to the output, skipping every run of them that
+    repeats the words right before it (the rolling caption echo).
+    tokens mirrors the words already in `words`.
+    """
+    i = 0
+    n = len(plain_words)
+    while i < n:
+        word = plain_words[i]
+        for k in range(min(MAX_CUE_WORDS, len(tokens), n - i), 0, -1):
+            if tokens[-k] == word and plain_words[i:i + k] == tokens[-k:]:
+                i += k
+                break
+        else:
+            tokens.append(word)
+            words.append((word, seconds))
+            i += 1
+
+
+def clean_transcript(transcript):
+    """
+    Return [(word, seconds), ...] for a raw transcript, caption repeats removed.
+
+    A cue's first word carries no timing tag of its own, so it gets the time
+    of the word before it (0.0 at the start); untimed words are treated alike.
+    Only transcripts made of <c> cues have their repeats removed.
+    """
+    if transcript.startswith('Language: '):
+        # 'Language: en ' header
+        space = transcript.find(' ', len('Language: '))
+        transcript = transcript[space + 1:] if space >= 0 else ''
+
+    # Rolling echoes only exist between caption cues
+    cued = '<c>' in transcript
+    words = []
+    tokens = []       # the words alone, for echo matching
+    seconds = 0.0
+    pos = 0
+    find = transcript.find
+    while True:
+        lt = find('<', pos)
+        plain = transcript[pos:] if lt < 0 else transcript[pos:lt]
+
+        if plain and not plain.isspace():
+            plain_words = plain.split()
+            glued = None
+            if lt >= 0 and not plain[-1].isspace():
+                # The next cue's first word sits right against its timing tag
+                glued = plain_words.pop()
+            plain_words = [w for w in plain_words if w not in _SPEAKER_MARKS]
+            if cued:
+                # The previous cue's echo, plus any untimed words
+                _append_unrepeated(plain_words, tokens, words, seconds)
+            else:
+                tokens.extend(plain_words)
+                words.extend((word, seconds) for word in plain_words)
+            if glued is not None and glued not in _SPEAKER_MARKS:
+                tokens.append(glued)
+                words.append((glued, seconds))
+
+        if lt < 0:
+            break
+        gt = find('>', lt)
+        if gt < 0:
+            break
+        tag = transcript[lt + 1:gt]
+        if tag == 'c':
+            end = find('</c>', gt)
+            if end < 0:
+                end = len(transcript)
+            word = transcript[gt + 1:end].strip()
+            if word:
+                tokens.append(word)
+                words.append((word, seconds))
+            pos = end + len('</c>')
+        else:
+            if tag[:1].isdigit():
+                seconds = parse_timestamp(tag)
+            pos = gt + 1
+
+    return [(html.unescape(word), t) if '&' in word else (word, t) for word, t in words]
+
+
+def sentences(words):
+    """Group cleaned words into sentences on terminal punctuation."""
+    result = []
+    current = []
+    for word, _ in words:
+        current.append(word)
+        if word.endswith(_SENTENCE_END):
+            result.append(' '.join(current))
+            current = []
+    if current:
+        result.append(' '.join(current))
+    return result
+
+
+def transcript_hash(transcript):
+    return hashlib.sha256(transcript.encode('utf-8')).hexdigest()
+
+
+def clean_video(video, timestamps=False):
+    """Cleaned record for one video: video_id, text, sentences, optionally words."""
+    words = clean_transcript(video.get('transcript') or '')
+    record = {
+        'video_id': video['video_id'],
+        'text': ' '.join(word for word, _ in words),
+        'sentences': sentences(words),
+    }
+    if timestamps:
+        record['words'] = [[word, round(t, 3)] for word, t in words]
+    return record
+
+
+def load_cached(cache_dir, video_id, digest, timestamps):
+    path = os.path.join(cache_dir, f'{video_id}.json')
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (cached.get('version') != CLEANER_VERSION or cached.get('transcript_sha256') != digest
+            or (timestamps and 'words' not in cached['record'])):
+        return None
+    record = cached['record']
+    if not timestamps:
+        record.pop('words', None)
+    return record
+
+
+def save_cached(cache_dir, record, digest):
+    path = os.path.join(cache_dir, f"{record['video_id']}.json")
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': CLEANER_VERSION, 'transcript_sha256': digest, 'record': record}, f)
+    os.replace(tmp_path, path)
+
+
+def iter_cleaned(path=CORPUS_PATH, timestamps=False, cache_dir=None, stats=None):
+    """Yield clean_video() records for every video in a corpus file, using the cache."""
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    for video in iter_videos(path, fields=['video_id', 'transcript']):
+        transcript = video.get('transcript') or ''
+        if stats is not None:
+            stats['raw_chars'] = stats.get('raw_chars', 0) + len(transcript)
+        record = None
+        if cache_dir:
+            digest = transcript_hash(transcript)
+            record = load_cached(cache_dir, video['video_id'], digest, timestamps)
+            if stats is not None and record is not None:
+                stats['cached'] = stats.get('cached', 0) + 1
+        if record is None:
+            record = clean_video(video, timestamps)
+            if cache_dir:
+                save_cached(cache_dir, record, digest)
+        if stats is not None:
+            stats['clean_chars'] = stats.get('clean_chars', 0) + len(record['text'])
+        yield record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Strip timing tags and caption repeats from transcripts.')
+    parser.add_argument('inputs', nargs='*', default=[CORPUS_PATH], help='corpus JSON files')
+    parser.add_argument('-o', '--output', help='write cleaned records here as a JSON list')
+    parser.add_argument('--timestamps', action='store_true', help='include [word, seconds] pairs')
+    parser.add_argument('--cache-dir', help='per-video_id cache of cleaned transcripts')
+    args = parser.parse_args(argv)
+
+    records = []
+    stats = {}
+    started = time.perf_counter()
+    for path in args.inputs:
+        records.extend(iter_cleaned(path, args.timestamps, args.cache_dir, stats))
+    elapsed = time.perf_counter() - started
+
+    raw, clean = stats.get('raw_chars', 0), stats.get('clean_chars', 0)
+    print(f"Cleaned {len(records)} transcripts in {elapsed * 1000:.1f} ms "
+          f"({stats.get('cached', 0)} from cache)")
+    print(f"  - {raw:,} raw chars -> {clean:,} clean chars"
+          + (f" ({raw / clean:.1f}x smaller)" if clean else ''))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(records, f, indent=2)
+        print(f"✓ Wrote {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
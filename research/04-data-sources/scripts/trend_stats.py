@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Rolling-window trend statistics for process_csv() output.
+
+Progress status needs more than the last two weeks: moving averages, the
+slope of load and estimated 1RM, and how long ago the last PR was. Computed
+naively, every week rescans the weeks before it. RollingTrend keeps running
+sums over a window of the last N calendar weeks instead, so each week is one
+O(1) update (plus evicting the weeks that fell out of the window, each once):
+
+    trend = RollingTrend(window=4)
+    for week, week_data in sorted(weeks.items()):
+        trend.add(week, week_data)
+    trend.result()
+
+add_trends() puts the result next to each exercise's weeks:
+
+    "Barbell Bench Press": {
+      "muscle": ..., "secondary": [...], "weeks": {...},
+      "trends": {
+        "window": 4,
+        "loadAvg": [...],        # one value per week, in week order
+        "e1rmAvg": [...],
+        "loadSlope": [...],      # least-squares slope per calendar week
+        "e1rmSlope": [...],
+        "weeksSincePR": [...]
+      }
+    }
+
+Averages and slopes cover the trained weeks among the last `window` calendar
+weeks, the current one included; a single week has slope 0. e1RM is
+Epley's estimate from the week's max and maxReps (muscle_rollups.epley()).
+A PR is a week whose max weight beats every earlier week, and weeksSincePR
+counts calendar weeks since the latest one (0 in a PR week).
+
+Usage:
+    python trend_stats.py archetype_01_x_data.json [...] [--window 4]   # adds "trends" in place
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from datetime import date
+
+from muscle_rollups import epley
+
+DEFAULT_WINDOW = 4
+
+
+class RollingTrend:
+    """Windowed averages, slopes and PR distance for one exercise, fed in week order."""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        if window < 1:
+            raise ValueError(f"window must be at least 1 week, got {window}")
+        self.window = window
+        self.first_day = None
+        self.entries = deque()      # (x, load, e1rm) inside the window
+        # Running sums over the window; x is weeks since the first week
+        self.n = 0
+        self.sum_x = 0
+        self.sum_xx = 0
+        self.sum_load = 0.0
+        self.sum_x_load = 0.0
+        self.sum_e1rm = 0.0
+        self.sum_x_e1rm = 0.0
+        self.best_max = None
+        self.pr_x = 0
+        self.series = {'loadAvg': [], 'e1rmAvg': [], 'loadSlope': [], 'e1rmSlope': [],
+                       'weeksSincePR': []}
+
+    def _update(self, x, load, e1rm, sign):
+        self.n += sign
+        self.sum_x += sign * x
+        self.sum_xx += sign * x * x
+        self.sum_load += sign * load
+        self.sum_x_load += sign * x * load
+        self.sum_e1rm += sign * e1rm
+        self.sum_x_e1rm += sign * x * e1rm
+
+    def _slope(self, sum_y, sum_xy):
+        denominator = self.n * self.sum_xx - self.sum_x * self.sum_x
+        if self.n < 2 or denominator == 0:
+            return 0.0
+        return (self.n * sum_xy - self.sum_x * sum_y) / denominator
+
+    def add(self, week, week_data):
+        """Fold in the next week ('YYYY-MM-DD', later than any before it)."""
+        day = date.fromisoformat(week).toordinal()
+        if self.first_day is None:
+            self.first_day = day
+        x = (day - self.first_day) // 7
+        if self.entries and x <= self.entries[-1][0]:
+            raise ValueError(f"week {week} is not after the previous week")
+
+        while self.entries and self.entries[0][0] <= x - self.window:
+            self._update(*self.entries.popleft(), -1)
+        load = week_data['load']
+        e1rm = epley(week_data['max'], week_data['maxReps'])
+        self.entries.append((x, load, e1rm))
+        self._update(x, load, e1rm, 1)
+
+        if self.best_max is None or week_data['max'] > self.best_max:
+            self.best_max = week_data['max']
+            self.pr_x = x
+
+        series = self.series
+        series['loadAvg'].append(round(self.sum_load / self.n, 1))
+        series['e1rmAvg'].append(round(self.sum_e1rm / self.n, 1))
+        series['loadSlope'].append(round(self._slope(self.sum_load, self.sum_x_load), 2))
+        series['e1rmSlope'].append(round(self._slope(self.sum_e1rm, self.sum_x_e1rm), 2))
+        series['weeksSincePR'].append(x - self.pr_x)
+
+    def result(self):
+        return {'window': self.window, **self.series}
+
+
+def exercise_trends(weeks, window=DEFAULT_WINDOW):
+    """Trends for one exercise's {week: week_data} (any order)."""
+    trend = RollingTrend(window)
+    for week, week_data in sorted(weeks.items()):
+        trend.add(week, week_data)
+    return trend.result()
+
+
+def add_trends(data, window=DEFAULT_WINDOW):
+    """Add a "trends" entry after "weeks" for every exercise; returns data."""
+    for ex in data.values():
+        ex['trends'] = exercise_trends(ex['weeks'], window)
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Add rolling trend statistics to dashboard JSON files.')
+    parser.add_argument('inputs', nargs='+', help='process_archetype_data.py JSON outputs')
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help=f'moving window in calendar weeks (default {DEFAULT_WINDOW})')
+    args = parser.parse_args(argv)
+
+    for json_path in args.inputs:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        add_trends(data, args.window)
+        tmp_path = json_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, json_path)
+        print(f"✓ {os.path.basename(json_path)}: trends for {len(data)} exercises "
+              f"({args.window}-week window)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
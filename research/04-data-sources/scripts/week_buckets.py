@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Week bucketing for Fitbod export timestamps.
+
+Fitbod dates look like '2025-01-01 06:30:00 PM +0000'. Every set in an export
+has to be mapped to the first day of its week, but a year of exports only has
+a few hundred distinct days, so the date-prefix -> week lookup is cached and
+the YYYY-MM-DD prefix is parsed by slicing instead of datetime.strptime.
+
+Used by process_archetype_data.py and the modules built on it
+(incremental_cache.py, session_index.py, processing_service.py).
+benchmark.py times it against the original strptime/strftime implementation.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+MONDAY = 0
+SUNDAY = 6
+
+WEEK_STARTS = {'monday': MONDAY, 'sunday': SUNDAY}
+
+# Distinct days held in the bucket cache (~27 years of daily training)
+CACHE_SIZE = 10000
+
+
+def parse_week_start(value):
+    """Accept MONDAY/SUNDAY or 'monday'/'sunday' and return the weekday number."""
+    if isinstance(value, str):
+        if value.lower() not in WEEK_STARTS:
+            raise ValueError(f"Unknown week start '{value}' (expected 'monday' or 'sunday')")
+        return WEEK_STARTS[value.lower()]
+    if value not in (MONDAY, SUNDAY):
+        raise ValueError(f"Unknown week start {value!r} (expected MONDAY or SUNDAY)")
+    return value
+
+
+def parse_offset(value):
+    """Convert a '+0000'/'-0530' suffix into a timezone."""
+    sign = -1 if value[0] == '-' else 1
+    hours, minutes = int(value[1:3]), int(value[3:5])
+    return timezone(sign * timedelta(hours=hours, minutes=minutes))
+
+
+def parse_date(date_prefix):
+    """Parse 'YYYY-MM-DD' without strptime, falling back to it for odd shapes."""
+    if len(date_prefix) == 10 and date_prefix[4] == '-' and date_prefix[7] == '-':
+        return date(int(date_prefix[:4]), int(date_prefix[5:7]), int(date_prefix[8:]))
+    return datetime.strptime(date_prefix, '%Y-%m-%d').date()
+
+
+def parse_timestamp(date_str):
+    """Parse a full Fitbod timestamp into an aware datetime."""
+    if len(date_str) == 28 and date_str[19] == ' ' and date_str[22] == ' ':
+        day = parse_date(date_str[:10])
+        hour = int(date_str[11:13]) % 12
+        if date_str[20:22].upper() == 'PM':
+            hour += 12
+        return datetime(day.year, day.month, day.day, hour,
+                        int(date_str[14:16]), int(date_str[17:19]),
+                        tzinfo=parse_offset(date_str[23:]))
+    return datetime.strptime(date_str, '%Y-%m-%d %I:%M:%S %p %z')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def week_start_for_day(date_prefix, week_start=MONDAY):
+    """First day of the week containing date_prefix, as YYYY-MM-DD (cached)."""
+    day = parse_date(date_prefix)
+    # weekday() is 0 for Monday; shift so week_start maps to 0
+    first = day - timedelta(days=(day.weekday() - week_start) % 7)
+    return first.isoformat()
+
+
+def get_week_start(date_str, week_start=MONDAY, tz=None):
+    """
+    Convert a Fitbod date string to the first day of its week (YYYY-MM-DD).
+
+    By default the calendar date written in the export is used as-is, which
+    is the user's local date for the '+HHMM' suffix on the timestamp. Pass
+    tz (a timezone or a '+HHMM' string) to re-bucket the timestamp in another
+    timezone first; that path parses the full timestamp and is not cached.
+    """
+    if tz is None:
+        return week_start_for_day(date_str.split()[0], week_start)
+
+    if isinstance(tz, str):
+        tz = parse_offset(tz)
+    local = parse_timestamp(date_str).astimezone(tz)
+    return week_start_for_day(local.date().isoformat(), week_start)
+
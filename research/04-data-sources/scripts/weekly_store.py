@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Multi-user SQLite store of aggregated weekly workout data.
+
+process_archetype_data.py --store DB appends each export's process_csv()
+output here, keyed by (user, exercise, week), so cohort questions ("average
+weekly chest sets across all users") are one indexed query instead of
+loading every JSON file:
+
+    users       id, name
+    exercises   id, name, muscle, secondary (JSON list)
+    muscles     exercise_id, muscle, is_primary      one row per muscle worked
+    weeks       user_id, exercise_id, week, max, sets, max_reps, load, position
+                (primary key user_id, exercise_id, week; indexed by
+                exercise_id, week and by week; position is the exercise's
+                place in the user's process_csv() output)
+
+Storing a user again replaces all of that user's weeks in one transaction.
+Pool workers write through their own connections; WAL mode and a busy
+timeout let them take turns.
+
+    with WeeklyStore('weekly.db') as store:
+        store.put_user('archetype_01_overwhelmed', data)
+        store.put_users((name, data) for name, data in ...)   # bulk load, one transaction
+        store.weekly_totals(muscle='Chest', start='2025-01-01')
+        store.user_averages(muscle='Chest')
+        store.user_data('archetype_01_overwhelmed')      # the stored process_csv() output
+
+Usage:
+    python weekly_store.py DB users
+    python weekly_store.py DB weekly --muscle Chest [--secondary] [--start 2025-01-01] [--end ...]
+    python weekly_store.py DB averages --muscle Chest
+    python weekly_store.py DB export USER -o user_data.json
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+
+STORE_VERSION = 2
+
+# Seconds a writer waits for another process's transaction to finish
+BUSY_TIMEOUT = 60
+
+# Page cache per connection; cohort queries over thousands of users scan a lot of index
+CACHE_KB = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS exercises (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    muscle TEXT NOT NULL,
+    secondary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS muscles (
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id),
+    muscle TEXT NOT NULL,
+    is_primary INTEGER NOT NULL,
+    PRIMARY KEY (muscle, exercise_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS weeks (
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    exercise_id INTEGER NOT NULL REFERENCES exercises(id),
+    week TEXT NOT NULL,
+    max REAL NOT NULL,
+    sets INTEGER NOT NULL,
+    max_reps INTEGER NOT NULL,
+    load REAL NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (user_id, exercise_id, week)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS weeks_by_exercise ON weeks (exercise_id, week);
+CREATE INDEX IF NOT EXISTS weeks_by_week ON weeks (week);
+"""
+
+
+class WeeklyStore:
+    """Connection to a weekly store; creates the schema on first use."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(f'PRAGMA cache_size=-{CACHE_KB}')
+        version = self.db.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, STORE_VERSION):
+            self.db.close()
+            raise ValueError(f"{path}: unsupported store version {version} "
+                             f"(rebuild it with process_archetype_data.py --store)")
+        with self.db:
+            self.db.executescript(SCHEMA)
+            self.db.execute(f'PRAGMA user_version={STORE_VERSION}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _exercise_id(self, name, muscle, secondary):
+        secondary_json = json.dumps(secondary)
+        row = self.db.execute('SELECT id, muscle, secondary FROM exercises WHERE name = ?',
+                              (name,)).fetchone()
+        if row is not None and (row[1], row[2]) == (muscle, secondary_json):
+            return row[0]
+        if row is None:
+            exercise_id = self.db.execute(
+                'INSERT INTO exercises (name, muscle, secondary) VALUES (?, ?, ?)',
+                (name, muscle, secondary_json)).lastrowid
+        else:
+            # The muscle map changed since this exercise was stored
+            exercise_id = row[0]
+            self.db.execute('UPDATE exercises SET muscle = ?, secondary = ? WHERE id = ?',
+                            (muscle, secondary_json, exercise_id))
+            self.db.execute('DELETE FROM muscles WHERE exercise_id = ?', (exercise_id,))
+        self.db.executemany(
+            'INSERT OR IGNORE INTO muscles (exercise_id, muscle, is_primary) VALUES (?, ?, ?)',
+            [(exercise_id, muscle, 1)] + [(exercise_id, m, 0) for m in secondary])
+        return exercise_id
+
+    def put_users(self, users):
+        """
+        Replace everything stored for each (user, process_csv() output) pair,
+        all in one transaction. Returns the number of week rows written.
+
+        Bulk loads should pass many users at once: each commit rewrites the
+        index pages it touched, so one commit per user is several times slower.
+        """
+        count = 0
+        with self.db:
+            self.db.execute('BEGIN IMMEDIATE')
+            for user, data in users:
+                self.db.execute('INSERT OR IGNORE INTO users (name) VALUES (?)', (user,))
+                user_id = self.db.execute('SELECT id FROM users WHERE name = ?',
+                                          (user,)).fetchone()[0]
+                self.db.execute('DELETE FROM weeks WHERE user_id = ?', (user_id,))
+                rows = []
+                for position, (exercise, ex) in enumerate(data.items()):
+                    exercise_id = self._exercise_id(exercise, ex['muscle'], ex['secondary'])
+                    rows.extend((user_id, exercise_id, week,
+                                 w['max'], w['sets'], w['maxReps'], w['load'], position)
+                                for week, w in ex['weeks'].items())
+                self.db.executemany('INSERT INTO weeks VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                count += len(rows)
+        return count
+
+    def put_user(self, user, data):
+        """Replace everything stored for user with process_csv() output. Returns week rows."""
+        return self.put_users([(user, data)])
+
+    def delete_user(self, user):
+        with self.db:
+            self.db.execute('DELETE FROM weeks WHERE user_id = (SELECT id FROM users WHERE name = ?)',
+                            (user,))
+            self.db.execute('DELETE FROM users WHERE name = ?', (user,))
+
+    def users(self):
+        """[(user, exercises, week rows, first week, last week)], by name."""
+        return self.db.execute(
+            'SELECT u.name, COUNT(DISTINCT w.exercise_id), COUNT(w.week), MIN(w.week), MAX(w.week) '
+            'FROM users u LEFT JOIN weeks w ON w.user_id = u.id '
+            'GROUP BY u.id ORDER BY u.name').fetchall()
+
+    def user_data(self, user):
+        """
+        One user's stored process_csv() output, or None. Exercises come back
+        in the order they were stored and values with their original types,
+        so json.dumps() matches the export's JSON.
+        """
+        row = self.db.execute('SELECT id FROM users WHERE name = ?', (user,)).fetchone()
+        if row is None:
+            return None
+        data = {}
+        cursor = self.db.execute(
+            'SELECT e.name, e.muscle, e.secondary, w.week, w.max, w.sets, w.max_reps, w.load '
+            'FROM weeks w JOIN exercises e ON e.id = w.exercise_id '
+            'WHERE w.user_id = ? ORDER BY w.position, w.week', (row[0],))
+        for name, muscle, secondary, week, max_weight, sets, max_reps, load in cursor:
+            ex = data.get(name)
+            if ex is None:
+                ex = data[name] = {'muscle': muscle, 'secondary': json.loads(secondary), 'weeks': {}}
+            # max is a REAL column; process_csv() leaves the integer 0 when no set beat it
+            ex['weeks'][week] = {'max': max_weight or 0, 'sets': sets, 'maxReps': max_reps,
+                                 'load': load}
+        return data
+
+    def _filter(self, muscle, exercise, secondary, start, end):
+        """WHERE clause and parameters shared by the cohort queries."""
+        clauses, params = [], []
+        if exercise is not None:
+            clauses.append('w.exercise_id = (SELECT id FROM exercises WHERE name = ?)')
+            params.append(exercise)
+        if muscle is not None:
+            clauses.append('w.exercise_id IN (SELECT exercise_id FROM muscles WHERE muscle = ?'
+                           + ('' if secondary else ' AND is_primary = 1') + ')')
+            params.append(muscle)
+        if start is not None:
+            clauses.append('w.week >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('w.week <= ?')
+            params.append(end)
+        return ('WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def weekly_totals(self, muscle=None, exercise=None, secondary=False, start=None, end=None):
+        """
+        Per week across all users: [(week, users training, sets, sets per
+        training user, load)]. muscle counts exercises with that primary
+        muscle (secondary=True: any listed muscle); weeks are inclusive.
+        """
+        where, params = self._filter(muscle, exercise, secondary, start, end)
+        return self.db.execute(
+            'SELECT w.week, COUNT(DISTINCT w.user_id), SUM(w.sets), '
+            'ROUND(1.0 * SUM(w.sets) / COUNT(DISTINCT w.user_id), 2), ROUND(SUM(w.load), 1) '
+            f'FROM weeks w {where} GROUP BY w.week ORDER BY w.week', params).fetchall()
+
+    def user_averages(self, muscle=None, exercise=None, secondary=False, start=None, end=None):
+        """
+        Per user: [(user, weeks trained, sets per trained week, load per
+        trained week)], with the same filters as weekly_totals().
+        """
+        where, params = self._filter(muscle, exercise, secondary, start, end)
+        return self.db.execute(
+            'SELECT u.name, COUNT(DISTINCT w.week), '
+            'ROUND(1.0 * SUM(w.sets) / COUNT(DISTINCT w.week), 2), '
+            'ROUND(SUM(w.load) / COUNT(DISTINCT w.week), 1) '
+            f'FROM weeks w JOIN users u ON u.id = w.user_id {where} '
+            'GROUP BY w.user_id ORDER BY u.name', params).fetchall()
+
+
+def put_user(store_path, user, data):
+    """Open the store, replace user's data and close it (one call per pool job)."""
+    with WeeklyStore(store_path) as store:
+        return store.put_user(user, data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the multi-user weekly store.')
+    parser.add_argument('store', help='SQLite file written by process_archetype_data.py --store')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('users', help='list stored users')
+    for name, help_text in (('weekly', 'per-week totals across users'),
+                            ('averages', 'per-user weekly averages and the cohort mean')):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('--muscle')
+        command.add_argument('--exercise')
+        command.add_argument('--secondary', action='store_true',
+                             help='with --muscle, include exercises that work it secondarily')
+        command.add_argument('--start', help='first week (YYYY-MM-DD, inclusive)')
+        command.add_argument('--end', help='last week (YYYY-MM-DD, inclusive)')
+    export = commands.add_parser('export', help="write one user's data as process_csv() JSON")
+    export.add_argument('user')
+    export.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+
+    with WeeklyStore(args.store) as store:
+        if args.command == 'users':
+            rows = store.users()
+            for name, exercises, weeks, first, last in rows:
+                print(f"  {name}: {exercises} exercises, {weeks} week entries ({first} → {last})")
+            print(f"{len(rows)} user(s)")
+        elif args.command == 'weekly':
+            rows = store.weekly_totals(args.muscle, args.exercise, args.secondary, args.start, args.end)
+            print(f"{'week':<12}{'users':>7}{'sets':>8}{'sets/user':>11}{'load':>12}")
+            for week, users, sets, per_user, load in rows:
+                print(f"{week:<12}{users:>7}{sets:>8}{per_user:>11.2f}{load:>12,.1f}")
+        elif args.command == 'averages':
+            rows = store.user_averages(args.muscle, args.exercise, args.secondary, args.start, args.end)
+            for name, weeks, sets, load in rows:
+                print(f"  {name}: {sets:.2f} sets/week, {load:,.1f} load/week over {weeks} weeks")
+            if rows:
+                print(f"Cohort mean: {sum(r[2] for r in rows) / len(rows):.2f} sets/week "
+                      f"({len(rows)} users)")
+            else:
+                print("No matching weeks")
+        else:
+            data = store.user_data(args.user)
+            if data is None:
+                print(f"✗ No user '{args.user}' in {args.store}")
+                return 1
+            with open(args.output, 'w') as f:
+                json.dump(data, f, indent=2)
+            print(f"✓ Wrote {args.output}: {len(data)} exercises")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())